@@ -1,7 +1,22 @@
-from flask import Flask, request, jsonify, render_template
-from scraper import GamePriceScraper
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
+from scraper import GamePriceScraper, get_driver_pool
+from sources import SOURCE_REGISTRY, get_enabled_sources
+from rate_limit import rate_limiter
+from resilience import CircuitBreaker, breaker_stats
+from transport import get_default_transport
+from cache import SearchCache
+from result_sets import SORT_KEYS, ResultSetCache
+from suggest import SuggestIndex
+from serialize import dumps, json_response
+from watch import PriceWatchScheduler
+from price_history import get_price_history
+from config import Config
+from metrics import REGISTRY, Trace, http_request_seconds, http_requests, tracing
+import atexit
 import logging
 import os
+import threading
+import time
 
 app = Flask(__name__)
 
@@ -15,54 +30,232 @@ logger = logging.getLogger(__name__)
 # 設定Flask配置
 app.config['JSON_AS_ASCII'] = False  # 支援中文JSON回應
 
+def prewarm_driver_pool():
+    """在背景預熱蝦皮搜尋使用的瀏覽器，避免第一個請求負擔啟動成本"""
+    if not Config.PLATFORMS['shopee']['enabled'] or Config.WEBDRIVER_POOL_PREWARM <= 0:
+        return
+    pool = get_driver_pool()
+    threading.Thread(
+        target=pool.prewarm,
+        args=(Config.WEBDRIVER_POOL_PREWARM,),
+        name='webdriver-prewarm',
+        daemon=True
+    ).start()
+    atexit.register(pool.close)
+
+# 搜尋結果快取，同一個程序內的請求共用
+search_cache = SearchCache()
+# 深度搜尋的結果與一般搜尋不同，存放在同一個 store 的另一組快取鍵
+deep_search_cache = SearchCache(search_cache.store, prefix='deep:')
+# 預先索引的搜尋結果，供 /results 篩選、排序與分頁
+result_sets = ResultSetCache()
+# 搜尋建議與搜尋名稱正規化（別名換成標準名稱，讓等價的搜尋共用快取）
+suggest_index = SuggestIndex()
+
+# 在背景更新熱門遊戲的快取，讓大部分搜尋可直接使用預先取得的結果
+price_watch = PriceWatchScheduler(search_cache, GamePriceScraper)
+
+def start_background_tasks():
+    """預熱瀏覽器，啟動指標寫入與價格追蹤排程
+    
+    執行緒與瀏覽器不能在 fork 前建立：gunicorn 以 preload_app 啟動時由
+    gunicorn.conf.py 的 post_fork 在每個 worker 中呼叫，其他情況在匯入時執行。
+    """
+    prewarm_driver_pool()
+    REGISTRY.start_snapshot_writer()
+    if Config.WATCH_ENABLED:
+        price_watch.start()
+        atexit.register(price_watch.stop)
+
+if Config.START_BACKGROUND_TASKS:
+    start_background_tasks()
+
+# 以 /metrics 輸出時才讀取目前值的指標
+REGISTRY.gauge(
+    'webdriver_pool_drivers', '瀏覽器池中的瀏覽器數', ('state',),
+    lambda: {(state,): get_driver_pool().stats()[state] for state in ('idle', 'in_use')}
+)
+REGISTRY.gauge(
+    'search_cache_entries', '搜尋快取的項目數', (),
+    lambda: {(): search_cache.store.size()}
+)
+REGISTRY.gauge(
+    'circuit_breaker_open', '斷路器是否開啟（1 為開啟）', ('breaker',),
+    lambda: {
+        (name,): int(snapshot['state'] == CircuitBreaker.OPEN)
+        for name, snapshot in breaker_stats().items()
+    }
+)
+
+def request_trace():
+    """debug 模式或 Config.TRACE_REQUESTS 開啟時回傳新的 Trace，否則回傳 None"""
+    return Trace() if app.debug or Config.TRACE_REQUESTS else None
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # 以路由規則作為標籤，避免每個不同的網址產生新的序列
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    http_requests.inc(endpoint, request.method, str(response.status_code))
+    started = g.get('request_started')
+    if started is not None:
+        # 串流回應在送出最後一段內容、回應關閉時才算完成
+        response.call_on_close(
+            lambda: http_request_seconds.observe(time.perf_counter() - started, endpoint)
+        )
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def parse_game_name(data):
+    """驗證請求內容，回傳 (遊戲名稱, 錯誤訊息)"""
+    if not data or not isinstance(data, dict):
+        return None, '無效的請求格式'
+        
+    game_name = data.get('game_name', '')
+    if not isinstance(game_name, str):
+        return None, 'game_name 必須是字串'
+    game_name = game_name.strip()
+    
+    if not game_name:
+        return None, '請輸入遊戲名稱'
+    
+    if len(game_name) < 2:
+        return None, '遊戲名稱至少需要2個字元'
+    
+    return suggest_index.canonicalize(game_name), None
+
+def parse_game_names(data):
+    """驗證批次搜尋的請求內容，回傳 (遊戲名稱列表, 錯誤訊息)，重複的名稱只保留一個"""
+    if not isinstance(data, dict):
+        return None, '無效的請求格式'
+    game_names = data.get('game_names')
+    if not isinstance(game_names, list) or not game_names:
+        return None, 'game_names 必須是遊戲名稱的列表'
+    
+    names = []
+    for game_name in game_names:
+        game_name, error = parse_game_name({'game_name': game_name if isinstance(game_name, str) else ''})
+        if error:
+            return None, error
+        if game_name not in names:
+            names.append(game_name)
+    
+    if len(names) > Config.BATCH_MAX_TITLES:
+        return None, f'單次最多搜尋 {Config.BATCH_MAX_TITLES} 個遊戲'
+    return names, None
+
+def parse_sources(data):
+    """解析請求中指定的平台代碼，回傳 (平台代碼列表或 None, 錯誤訊息)"""
+    sources = (data or {}).get('sources')
+    if sources is None:
+        return None, None
+    if not isinstance(sources, list) or not sources:
+        return None, 'sources 必須是平台代碼的列表'
+    unknown = [code for code in sources if code not in SOURCE_REGISTRY]
+    if unknown:
+        return None, f"不支援的平台: {', '.join(map(str, unknown))}"
+    return sources, None
+
+def parse_deep(data):
+    """解析請求是否要求深度搜尋（"deep": true），回傳 (是否深度搜尋, 錯誤訊息)"""
+    deep = (data or {}).get('deep', False)
+    if not isinstance(deep, bool):
+        return None, 'deep 必須是 true 或 false'
+    return deep, None
+
+def load_result_set(game_name, sources, deep=False):
+    """取得搜尋結果的 ResultSet
+
+    不在本程序的快取時（例如搜尋由其他 worker 處理），由搜尋快取中各平台的結果
+    重新建立；所有平台皆未快取時回傳 None。
+    """
+    cache = deep_search_cache if deep else search_cache
+    
+    def load():
+        cached = [cache.get(game_name, code) for code in sources]
+        if all(listings is None for listings in cached):
+            return None
+        all_listings = []
+        for listings in cached:
+            all_listings.extend(listings or [])
+        return GamePriceScraper().deduplicate_listings(all_listings)
+    
+    return result_sets.get_or_build(result_sets.make_key(game_name, sources, deep), load)
+
+def clusters_to_dicts(clusters, listings):
+    """將商品分群轉換為字典，listings 欄位為該群刊登在 results 中的索引"""
+    index = {id(listing): i for i, listing in enumerate(listings)}
+    return [
+        {
+            'title': cluster.title,
+            'platform': cluster.platform,
+            'count': cluster.count,
+            'min_price': cluster.min_price,
+            'median_price': cluster.median_price,
+            'max_price': cluster.max_price,
+            'listings': [index[id(listing)] for listing in cluster.listings]
+        }
+        for cluster in clusters
+    ]
+
 @app.route('/search', methods=['POST'])
 def search():
     try:
         data = request.get_json()
-        if not data:
-            return jsonify({'error': '無效的請求格式'}), 400
-            
-        game_name = data.get('game_name', '').strip()
-        
-        if not game_name:
-            return jsonify({'error': '請輸入遊戲名稱'}), 400
-        
-        if len(game_name) < 2:
-            return jsonify({'error': '遊戲名稱至少需要2個字元'}), 400
+        game_name, error = parse_game_name(data)
+        if error:
+            return jsonify({'error': error}), 400
+        requested_sources, error = parse_sources(data)
+        if error:
+            return jsonify({'error': error}), 400
+        deep, error = parse_deep(data)
+        if error:
+            return jsonify({'error': error}), 400
             
-        logger.info(f"開始搜尋遊戲: {game_name}")
+        logger.info(f"開始{'深度' if deep else ''}搜尋遊戲: {game_name}")
+        price_watch.record_search(game_name)
         
-        scraper = GamePriceScraper()
-        listings = scraper.search_all_platforms(game_name)
+        scraper = GamePriceScraper(deep=deep)
+        cache = deep_search_cache if deep else search_cache
+        sources = [code for code, _, _ in scraper.get_search_functions(requested_sources)]
         
-        # 轉換為字典格式
-        results = []
-        for listing in listings:
-            results.append({
-                'title': listing.title,
-                'price': listing.price,
-                'platform': listing.platform,
-                'condition': listing.condition,
-                'seller': listing.seller,
-                'location': listing.location,
-                'source': listing.source,
-                'url': listing.url,
-                'posted_time': listing.posted_time,
-                'seller_rating': listing.seller_rating
-            })
+        trace = request_trace()
+        with tracing(trace):
+            # 只有快取中沒有或已過期的平台才會重新爬取
+            all_listings = []
+            cached_sources = []
+            for source, source_listings, status, cached in cache.iter_results(
+                    game_name, sources, scraper.iter_platform_results):
+                all_listings.extend(source_listings)
+                if cached:
+                    cached_sources.append(source)
+            listings = scraper.deduplicate_listings(all_listings)
+            clusters = scraper.cluster_listings(listings)
+        result_sets.put(result_sets.make_key(game_name, sources, deep), listings)
+        if listings:
+            suggest_index.record_search(game_name, clusters)
         
-        logger.info(f"搜尋完成，找到 {len(results)} 個結果")
+        logger.info(f"搜尋完成，找到 {len(listings)} 個結果")
         
-        return jsonify({
+        # 刊登直接交給序列化器編碼，不先逐筆轉換為字典
+        payload = {
             'success': True,
-            'results': results,
-            'count': len(results),
-            'search_term': game_name
-        })
+            'results': listings,
+            'count': len(listings),
+            'clusters': clusters_to_dicts(clusters, listings),
+            'search_term': game_name,
+            'cached_sources': cached_sources,
+            'deep': deep
+        }
+        if trace is not None:
+            payload['trace'] = trace.to_dict()
+        return json_response(payload)
         
     except Exception as e:
         logger.error(f"搜尋錯誤: {str(e)}", exc_info=True)
@@ -71,25 +264,381 @@ def search():
             'success': False
         }), 500
 
+@app.route('/search/stream', methods=['POST'])
+def search_stream():
+    """以 NDJSON 串流回傳搜尋結果
+    
+    每行一個 JSON 事件：
+    - start: 開始搜尋，列出要搜尋的平台
+    - source: 某個平台完成（含該平台的結果、狀態與是否來自快取）
+    - summary: 全部完成，含去重並按價格排序後的結果與商品分群
+    - error: 搜尋過程中發生錯誤
+    """
+    data = request.get_json(silent=True)
+    game_name, error = parse_game_name(data)
+    if error:
+        return jsonify({'error': error}), 400
+    requested_sources, error = parse_sources(data)
+    if error:
+        return jsonify({'error': error}), 400
+    deep, error = parse_deep(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    logger.info(f"開始串流{'深度' if deep else ''}搜尋遊戲: {game_name}")
+    price_watch.record_search(game_name)
+    
+    scraper = GamePriceScraper(deep=deep)
+    cache = deep_search_cache if deep else search_cache
+    search_functions = scraper.get_search_functions(requested_sources)
+    platform_names = {code: name for code, name, _ in search_functions}
+    
+    def event(payload):
+        return dumps(payload, newline=True)
+    
+    def generate():
+        yield event({
+            'type': 'start',
+            'search_term': game_name,
+            'deep': deep,
+            'sources': [{'code': code, 'name': name} for code, name in platform_names.items()]
+        })
+        
+        all_listings = []
+        trace = request_trace()
+        try:
+            with tracing(trace):
+                for source, source_listings, status, cached in cache.iter_results(
+                        game_name, list(platform_names), scraper.iter_platform_results):
+                    all_listings.extend(source_listings)
+                    yield event({
+                        'type': 'source',
+                        'source': source,
+                        'name': platform_names[source],
+                        'status': status,
+                        'cached': cached,
+                        'count': len(source_listings),
+                        'results': source_listings
+                    })
+                
+                listings = scraper.deduplicate_listings(all_listings)
+                clusters = scraper.cluster_listings(listings)
+            result_sets.put(result_sets.make_key(game_name, platform_names, deep), listings)
+            if listings:
+                suggest_index.record_search(game_name, clusters)
+            logger.info(f"串流搜尋完成，找到 {len(listings)} 個結果")
+            summary = {
+                'type': 'summary',
+                'success': True,
+                'search_term': game_name,
+                'count': len(listings),
+                'results': listings,
+                'clusters': clusters_to_dicts(clusters, listings)
+            }
+            if trace is not None:
+                summary['trace'] = trace.to_dict()
+            yield event(summary)
+        except Exception as e:
+            logger.error(f"串流搜尋錯誤: {str(e)}", exc_info=True)
+            yield event({
+                'type': 'error',
+                'success': False,
+                'error': f'搜尋過程中發生錯誤: {str(e)}'
+            })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # 避免 Nginx 緩衝串流內容
+        }
+    )
+
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    """批次搜尋多個遊戲，以 NDJSON 串流回傳每個遊戲的結果
+    
+    所有 (遊戲, 平台) 搜尋共用同一個執行緒池，並限制每個主機的並行數；
+    快取中已有的結果直接回傳。每行一個 JSON 事件：
+    - start: 開始搜尋，列出遊戲數與要搜尋的平台
+    - title: 某個遊戲的所有平台都已完成（含去重後的結果、商品分群與各平台狀態）
+    - summary: 全部完成
+    - error: 搜尋過程中發生錯誤
+    """
+    data = request.get_json(silent=True)
+    game_names, error = parse_game_names(data)
+    if error:
+        return jsonify({'error': error}), 400
+    requested_sources, error = parse_sources(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    logger.info(f"開始批次搜尋 {len(game_names)} 個遊戲")
+    
+    scraper = GamePriceScraper()
+    tasks = scraper.batch_tasks(game_names, requested_sources)
+    sources = [code for code, _, _ in scraper.get_search_functions(requested_sources)]
+    
+    def event(payload):
+        return dumps(payload, newline=True)
+    
+    def generate():
+        start = time.monotonic()
+        yield event({
+            'type': 'start',
+            'titles': len(game_names),
+            'sources': sources
+        })
+        
+        remaining = {game_name: len(sources) for game_name in game_names}
+        all_listings = {game_name: [] for game_name in game_names}
+        statuses = {game_name: {} for game_name in game_names}
+        cached_sources = {game_name: [] for game_name in game_names}
+        completed = 0
+        try:
+            for game_name, source, source_listings, status, cached in search_cache.iter_batch_results(
+                    tasks, scraper.iter_batch_results):
+                all_listings[game_name].extend(source_listings)
+                statuses[game_name][source] = status
+                if cached:
+                    cached_sources[game_name].append(source)
+                
+                remaining[game_name] -= 1
+                if remaining[game_name]:
+                    continue
+                
+                # 這個遊戲的所有平台都已完成
+                completed += 1
+                listings = scraper.deduplicate_listings(all_listings.pop(game_name))
+                yield event({
+                    'type': 'title',
+                    'game_name': game_name,
+                    'success': any(value == 'ok' for value in statuses[game_name].values()),
+                    'statuses': statuses[game_name],
+                    'cached_sources': cached_sources[game_name],
+                    'count': len(listings),
+                    'results': listings,
+                    'clusters': clusters_to_dicts(scraper.cluster_listings(listings), listings)
+                })
+            
+            elapsed = time.monotonic() - start
+            logger.info(f"批次搜尋完成，{completed} 個遊戲，耗時 {elapsed:.1f} 秒")
+            yield event({
+                'type': 'summary',
+                'success': True,
+                'titles': len(game_names),
+                'completed': completed,
+                'elapsed': round(elapsed, 2)
+            })
+        except Exception as e:
+            logger.error(f"批次搜尋錯誤: {str(e)}", exc_info=True)
+            yield event({
+                'type': 'error',
+                'success': False,
+                'error': f'搜尋過程中發生錯誤: {str(e)}'
+            })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@app.route('/results')
+def get_results():
+    """篩選、排序與分頁已快取的搜尋結果，不會重新爬取
+    
+    參數：game_name（必填）、sources（平台代碼，以逗號分隔，與搜尋時相同）、deep、
+    platform（遊戲平台）、condition、source（平台代碼）、min_price、max_price、
+    sort（price / -price / platform / condition / source）、page、limit
+    """
+    args = request.args
+    game_name, error = parse_game_name(args)
+    if error:
+        return jsonify({'error': error}), 400
+    requested_sources = args.get('sources')
+    requested_sources, error = parse_sources(
+        {'sources': requested_sources.split(',')} if requested_sources else None
+    )
+    if error:
+        return jsonify({'error': error}), 400
+    deep = args.get('deep', 'false').lower() == 'true'
+    
+    try:
+        min_price = int(args['min_price']) if args.get('min_price') else None
+        max_price = int(args['max_price']) if args.get('max_price') else None
+        page = int(args.get('page', 1))
+        limit = int(args.get('limit', Config.RESULTS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'min_price、max_price、page 與 limit 必須是整數'}), 400
+    if page < 1 or not 1 <= limit <= Config.RESULTS_MAX_PAGE_SIZE:
+        return jsonify({'error': f'page 必須大於 0，limit 必須介於 1 到 {Config.RESULTS_MAX_PAGE_SIZE}'}), 400
+    sort = args.get('sort', 'price')
+    if sort not in SORT_KEYS:
+        return jsonify({'error': f"sort 必須是 {' / '.join(SORT_KEYS)}"}), 400
+    
+    source = args.get('source') or None
+    if source is not None:
+        if source not in Config.PLATFORMS:
+            return jsonify({'error': f'不支援的平台: {source}'}), 400
+        source = Config.PLATFORMS[source]['name']
+    
+    sources = [adapter.code for adapter in get_enabled_sources(requested_sources)]
+    result_set = load_result_set(game_name, sources, deep)
+    if result_set is None:
+        return jsonify({'error': '沒有此遊戲的搜尋結果，請先搜尋', 'success': False}), 404
+    
+    total, listings, price_stats = result_set.query(
+        platform=args.get('platform') or None,
+        condition=args.get('condition') or None,
+        source=source,
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort,
+        offset=(page - 1) * limit,
+        limit=limit
+    )
+    # 來源平台的篩選以平台代碼指定，分面統計也以平台代碼回傳
+    facets = result_set.facets()
+    codes = {settings['name']: code for code, settings in Config.PLATFORMS.items()}
+    facets['source'] = {codes.get(name, name): count for name, count in facets['source'].items()}
+    return json_response({
+        'success': True,
+        'search_term': game_name,
+        'deep': deep,
+        'total': total,
+        'count': len(listings),
+        'page': page,
+        'limit': limit,
+        'pages': -(-total // limit),
+        'sort': sort,
+        'results': listings,
+        'price_stats': price_stats,
+        'facets': facets
+    })
+
 @app.route('/health')
 def health_check():
+    history = get_price_history()
     return jsonify({
         'status': 'healthy',
         'service': 'Game Price Scraper',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'webdriver_pool': get_driver_pool().stats(),
+        'cache': search_cache.stats(),
+        'result_sets': result_sets.stats(),
+        'suggest': suggest_index.stats(),
+        'rate_limits': rate_limiter.stats(),
+        'circuit_breakers': breaker_stats(),
+        'transport': get_default_transport().stats(),
+        'price_watch': price_watch.stats(),
+        'price_history': history.stats() if history is not None else None
     })
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus 指標（各階段耗時、各平台結果、快取命中、連線耗時、瀏覽器池與斷路器狀態）"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/platforms')
 def get_platforms():
-    """回傳支援的平台列表"""
+    """回傳已啟用的平台列表（依優先順序）"""
     platforms = [
-        {'name': '露天拍賣', 'code': 'ruten'},
-        {'name': '蝦皮購物', 'code': 'shopee'},
-        {'name': 'Yahoo拍賣', 'code': 'yahoo'},
-        {'name': 'PChome 24h', 'code': 'pchome'}
+        {
+            'name': adapter.name,
+            'code': adapter.code,
+            'priority': Config.PLATFORMS[adapter.code]['priority'],
+            'fetch_method': adapter.fetch_method,
+            'cost': adapter.cost
+        }
+        for adapter in get_enabled_sources()
     ]
     return jsonify({'platforms': platforms})
 
+@app.route('/api/suggest')
+def get_suggestions():
+    """搜尋框的自動完成建議
+    
+    參數：q（輸入中的文字，空白時回傳最常搜尋的遊戲）、limit；
+    canonical 為搜尋時實際使用的名稱（q 是別名時為標準名稱）
+    """
+    query = request.args.get('q', '').strip()
+    try:
+        limit = int(request.args.get('limit', Config.SUGGEST_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit 必須是整數'}), 400
+    if not 1 <= limit <= Config.SUGGEST_MAX_LIMIT:
+        return jsonify({'error': f'limit 必須介於 1 到 {Config.SUGGEST_MAX_LIMIT}'}), 400
+    
+    return jsonify({
+        'query': query,
+        'canonical': suggest_index.canonicalize(query) if query else None,
+        'suggestions': suggest_index.suggest(query[:100], limit)
+    })
+
+@app.route('/api/history')
+def get_history():
+    """查詢價格歷史
+    
+    參數：game_name（必填）、platform（遊戲平台，例如 PlayStation 5）、
+    source（平台代碼）、days（最近幾天，預設 30）、percentiles（例如 25,50,90）
+    """
+    history = get_price_history()
+    if history is None:
+        return jsonify({'error': '價格歷史未啟用'}), 404
+    
+    game_name, error = parse_game_name(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        days = int(request.args.get('days', 30))
+        percentiles = [
+            float(value) for value in request.args.get('percentiles', '25,50,75,90').split(',') if value
+        ]
+    except ValueError:
+        return jsonify({'error': 'days 與 percentiles 必須是數字'}), 400
+    if not 1 <= days <= Config.HISTORY_MAX_DAYS:
+        return jsonify({'error': f'days 必須介於 1 到 {Config.HISTORY_MAX_DAYS}'}), 400
+    if any(not 0 <= value <= 100 for value in percentiles):
+        return jsonify({'error': 'percentiles 必須介於 0 到 100'}), 400
+    
+    platform = request.args.get('platform') or None
+    source = request.args.get('source') or None
+    if source is not None:
+        if source not in Config.PLATFORMS:
+            return jsonify({'error': f'不支援的平台: {source}'}), 400
+        source = Config.PLATFORMS[source]['name']
+    
+    return jsonify({
+        'game_name': game_name,
+        'platform': platform,
+        'source': source,
+        'days': days,
+        'summary': history.summary(game_name, platform, source, days, percentiles),
+        'daily': history.daily(game_name, platform, source, days, percentiles)
+    })
+
+@app.route('/api/watchlist', methods=['GET'])
+def get_watchlist():
+    """回傳價格追蹤清單與排程狀態"""
+    return jsonify({'watchlist': price_watch.watchlist(), 'stats': price_watch.stats()})
+
+@app.route('/api/watchlist', methods=['POST', 'DELETE'])
+def update_watchlist():
+    """加入（POST）或移除（DELETE）追蹤的遊戲"""
+    game_name, error = parse_game_name(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    if request.method == 'POST':
+        changed = price_watch.watch(game_name)
+    else:
+        changed = price_watch.unwatch(game_name)
+    return jsonify({'success': True, 'changed': changed, 'game_name': game_name})
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': '找不到請求的資源'}), 404
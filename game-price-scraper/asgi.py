@@ -0,0 +1,266 @@
+"""ASGI 進入點：搜尋路由以 asyncio 執行，其餘路由交給 Flask 應用程式
+
+    pip install -r requirements.txt
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+- POST /search 與 POST /search/stream 由 AsyncGamePriceScraper 處理，HTTP 平台
+  等待回應時不佔用執行緒，單一程序可同時處理數百個搜尋
+- 其他路由（首頁、/search/batch、/health、/api/...）由 a2wsgi 在執行緒中執行
+  app.py 的 Flask 應用程式，行為與以 WSGI 伺服器執行時相同
+"""
+import asyncio
+import logging
+import time
+
+from a2wsgi import WSGIMiddleware
+
+from app import (
+    app as flask_app, clusters_to_dicts, deep_search_cache, parse_deep, parse_game_name,
+    parse_sources, price_watch, request_trace, result_sets, search_cache, suggest_index
+)
+from async_scraper import AsyncGamePriceScraper
+from cache import AsyncSearchCache
+from metrics import http_request_seconds, http_requests, tracing
+from serialize import dumps, loads
+from transport import close_default_async_transport
+
+logger = logging.getLogger(__name__)
+
+async_cache = AsyncSearchCache(search_cache)
+async_deep_cache = AsyncSearchCache(deep_search_cache)
+
+NDJSON_HEADERS = [
+    (b'content-type', b'application/x-ndjson'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),  # 避免 Nginx 緩衝串流內容
+]
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            break
+    return body
+
+
+def parse_json(body):
+    try:
+        return loads(body) if body else None
+    except ValueError:
+        return None
+
+
+async def send_json(send, payload, status=200):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': dumps(payload)})
+
+
+def finish_search(scraper, game_name, sources, deep, all_listings):
+    """去重、分群，並記錄結果集與搜尋建議，回傳 (結果列表, 商品分群)
+
+    這些是 CPU 運算與加鎖的同步工作，以 asyncio.to_thread 在執行緒中執行，不阻塞事件迴圈。
+    """
+    listings = scraper.deduplicate_listings(all_listings)
+    clusters = scraper.cluster_listings(listings)
+    result_sets.put(result_sets.make_key(game_name, sources, deep), listings)
+    if listings:
+        suggest_index.record_search(game_name, clusters)
+    return listings, clusters
+
+
+def parse_search_request(data):
+    """驗證搜尋請求，回傳 (遊戲名稱, 平台代碼列表, 是否深度搜尋, 錯誤訊息)"""
+    game_name, error = parse_game_name(data)
+    if error:
+        return None, None, None, error
+    requested_sources, error = parse_sources(data)
+    if error:
+        return None, None, None, error
+    deep, error = parse_deep(data)
+    if error:
+        return None, None, None, error
+    return game_name, requested_sources, deep, None
+
+
+async def search(scope, receive, send):
+    """與 Flask 版 /search 相同的 JSON 回應"""
+    # 別名正規化第一次使用時會讀取價格歷史，在執行緒中執行
+    game_name, requested_sources, deep, error = await asyncio.to_thread(
+        parse_search_request, parse_json(await read_body(receive))
+    )
+    if error:
+        await send_json(send, {'error': error}, 400)
+        return
+
+    try:
+        logger.info(f"開始{'深度' if deep else ''}搜尋遊戲: {game_name}")
+        await asyncio.to_thread(price_watch.record_search, game_name)
+
+        scraper = AsyncGamePriceScraper(deep=deep)
+        cache = async_deep_cache if deep else async_cache
+        sources = [code for code, _, _ in scraper.aget_search_functions(requested_sources)]
+
+        trace = request_trace()
+        with tracing(trace):
+            all_listings = []
+            cached_sources = []
+            async for source, source_listings, status, cached in cache.iter_results(
+                    game_name, sources, scraper.aiter_platform_results):
+                all_listings.extend(source_listings)
+                if cached:
+                    cached_sources.append(source)
+            # to_thread 複製 contextvars，去重與分群的耗時仍記錄到此請求的追蹤
+            listings, clusters = await asyncio.to_thread(
+                finish_search, scraper, game_name, sources, deep, all_listings
+            )
+
+        logger.info(f"搜尋完成，找到 {len(listings)} 個結果")
+        payload = {
+            'success': True,
+            'results': listings,
+            'count': len(listings),
+            'clusters': clusters_to_dicts(clusters, listings),
+            'search_term': game_name,
+            'cached_sources': cached_sources,
+            'deep': deep
+        }
+        if trace is not None:
+            payload['trace'] = trace.to_dict()
+    except Exception as e:
+        logger.error(f"搜尋錯誤: {str(e)}", exc_info=True)
+        await send_json(send, {'error': f'搜尋過程中發生錯誤: {str(e)}', 'success': False}, 500)
+        return
+    await send_json(send, payload)
+
+
+async def search_stream(scope, receive, send):
+    """與 Flask 版 /search/stream 相同的 NDJSON 事件"""
+    # 別名正規化第一次使用時會讀取價格歷史，在執行緒中執行
+    game_name, requested_sources, deep, error = await asyncio.to_thread(
+        parse_search_request, parse_json(await read_body(receive))
+    )
+    if error:
+        await send_json(send, {'error': error}, 400)
+        return
+
+    logger.info(f"開始串流{'深度' if deep else ''}搜尋遊戲: {game_name}")
+    await asyncio.to_thread(price_watch.record_search, game_name)
+
+    scraper = AsyncGamePriceScraper(deep=deep)
+    cache = async_deep_cache if deep else async_cache
+    platform_names = {code: name for code, name, _ in scraper.aget_search_functions(requested_sources)}
+
+    async def event(payload):
+        await send({'type': 'http.response.body', 'body': dumps(payload, newline=True), 'more_body': True})
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': NDJSON_HEADERS})
+    await event({
+        'type': 'start',
+        'search_term': game_name,
+        'deep': deep,
+        'sources': [{'code': code, 'name': name} for code, name in platform_names.items()]
+    })
+
+    all_listings = []
+    try:
+        async for source, source_listings, status, cached in cache.iter_results(
+                game_name, list(platform_names), scraper.aiter_platform_results):
+            all_listings.extend(source_listings)
+            await event({
+                'type': 'source',
+                'source': source,
+                'name': platform_names[source],
+                'status': status,
+                'cached': cached,
+                'count': len(source_listings),
+                'results': source_listings
+            })
+
+        listings, clusters = await asyncio.to_thread(
+            finish_search, scraper, game_name, platform_names, deep, all_listings
+        )
+        logger.info(f"串流搜尋完成，找到 {len(listings)} 個結果")
+        await event({
+            'type': 'summary',
+            'success': True,
+            'search_term': game_name,
+            'count': len(listings),
+            'results': listings,
+            'clusters': clusters_to_dicts(clusters, listings)
+        })
+    except Exception as e:
+        logger.error(f"串流搜尋錯誤: {str(e)}", exc_info=True)
+        await event({
+            'type': 'error',
+            'success': False,
+            'error': f'搜尋過程中發生錯誤: {str(e)}'
+        })
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+# 其他路由交給 Flask：a2wsgi 在執行緒池中執行 WSGI 應用程式，整個請求（包含逐塊產生的
+# 回應）在同一個執行緒中執行，Flask 的請求上下文得以保持，串流回應也能即時送出
+call_wsgi = WSGIMiddleware(flask_app)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_default_async_transport()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# 以 asyncio 處理的路由 {(方法, 路徑): 處理函數}
+ASYNC_ROUTES = {
+    ('POST', '/search'): search,
+    ('POST', '/search/stream'): search_stream,
+}
+
+
+async def call_instrumented(handler, scope, receive, send):
+    """執行以 asyncio 處理的路由並記錄 HTTP 請求指標
+
+    交給 Flask 的路由由 app.py 的 after_request 記錄，這些路由不經過 Flask，需在此記錄。
+    """
+    endpoint = scope['path']
+    started = time.perf_counter()
+    statuses = []
+
+    async def send_with_metrics(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        await send(message)
+
+    try:
+        await handler(scope, receive, send_with_metrics)
+    finally:
+        # 串流回應（/search/stream）在送出最後一段內容後才算完成
+        http_request_seconds.observe(time.perf_counter() - started, endpoint)
+        http_requests.inc(endpoint, scope['method'], str(statuses[0] if statuses else 500))
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        await call_wsgi(scope, receive, send)
+        return
+    await call_instrumented(handler, scope, receive, send)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from functools import partial
+
+from config import Config
+from metrics import record_source_result
+from resilience import CircuitOpenError
+from scraper import GamePriceScraper
+from sources import get_enabled_sources, get_source
+from transport import get_default_async_transport
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGamePriceScraper(GamePriceScraper):
+    """以 asyncio 執行搜尋的 GamePriceScraper，供 asgi.py 使用
+
+    - HTTP 平台以 AsyncHttpTransport（httpx）發送請求，等待回應時不佔用執行緒，
+      同一個程序可同時進行數百個搜尋
+    - 蝦皮等瀏覽器平台仍使用 Selenium，在執行緒中執行（見 SourceAdapter.fetch_async），
+      並行數由瀏覽器池限制
+    - 限速器、重試、斷路器、去重與價格歷史與 GamePriceScraper 相同
+
+    非同步的搜尋方法以 a 開頭（asearch_source、aiter_platform_results、
+    asearch_all_platforms 等），為協程或非同步產生器，需在事件迴圈中使用；
+    繼承自 GamePriceScraper 的同名同步方法維持原本的行為，可照常使用。
+    """
+
+    def __init__(self, source_timeout=None, search_deadline=None, async_transport=None, history=None,
+                 deep=False):
+        super().__init__(source_timeout, search_deadline, history=history, deep=deep)
+        # 未指定時使用目前事件迴圈共用的連線池（需在協程中建立）；未安裝 httpx 時為 None
+        self.async_transport = async_transport or get_default_async_transport()
+
+    async def asearch_source(self, code, game_name):
+        """以指定平台的轉接器搜尋，失敗時拋出例外（見 SourceAdapter.search_async）"""
+        return await get_source(code).search_async(self, game_name)
+
+    def aget_search_functions(self, sources=None):
+        """回傳要搜尋的平台清單 (平台代碼, 平台名稱, 搜尋協程函數)"""
+        return [
+            (adapter.code, adapter.name, partial(adapter.search_async, self))
+            for adapter in get_enabled_sources(sources)
+        ]
+
+    async def aiter_platform_results(self, game_name, sources=None):
+        """並行搜尋各平台，依完成順序產出 (平台代碼, 結果列表, 狀態)
+
+        時限與狀態的規則與 iter_platform_results 相同：
+        超過時限的平台產出 'timeout'，失敗產出 'error'，斷路器開啟產出 'skipped'。
+        """
+        search_functions = self.aget_search_functions(sources)
+        if not search_functions:
+            return
+
+        start = time.monotonic()
+        overall_deadline = start + self.search_deadline
+
+        pending = {}
+        try:
+            for code, platform_name, search_func in search_functions:
+                logger.info(f"正在搜尋 {platform_name}...")
+                task = asyncio.ensure_future(search_func(game_name))
+                # 協程建立後即開始執行，平台的時限由此起算
+                deadline = min(time.monotonic() + get_source(code).timeout(self), overall_deadline)
+                pending[task] = (code, platform_name, deadline)
+
+            while pending:
+                nearest_deadline = min(deadline for _, _, deadline in pending.values())
+                timeout = max(nearest_deadline - time.monotonic(), 0)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    code, platform_name, _ = pending.pop(task)
+                    try:
+                        listings = task.result()
+                    except CircuitOpenError as e:
+                        logger.warning(str(e))
+                        record_source_result(code, 'skipped', [])
+                        yield code, [], 'skipped'
+                        continue
+                    except Exception as e:
+                        logger.error(f"搜尋 {platform_name} 時發生錯誤: {e}")
+                        record_source_result(code, 'error', [])
+                        yield code, [], 'error'
+                        continue
+
+                    if listings:
+                        logger.info(f"{platform_name} 找到 {len(listings)} 個結果")
+                    else:
+                        logger.info(f"{platform_name} 沒有找到結果")
+                    record_source_result(code, 'ok', listings)
+                    self.record_history(game_name, listings)
+                    yield code, listings, 'ok'
+
+                # 放棄超過時限仍未完成的平台
+                now = time.monotonic()
+                for task, (code, platform_name, deadline) in list(pending.items()):
+                    if deadline <= now:
+                        del pending[task]
+                        task.cancel()
+                        logger.warning(f"{platform_name} 超過時限，略過此平台的結果")
+                        record_source_result(code, 'timeout', [])
+                        yield code, [], 'timeout'
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aiter_batch_results(self, tasks, max_workers=None):
+        """非同步執行多個 (遊戲名稱, 平台代碼) 搜尋，依完成順序產出
+        (遊戲名稱, 平台代碼, 結果列表, 狀態)
+
+        同時進行的搜尋不超過 max_workers（預設 Config.BATCH_MAX_WORKERS），
+        每個主機不超過該平台的 concurrency；每個搜尋的時限為該平台的
+        SourceAdapter.timeout，自取得名額、實際開始搜尋時起算。
+        """
+        workers = asyncio.Semaphore(max_workers or Config.BATCH_MAX_WORKERS)
+        host_limits = {}
+
+        async def run(game_name, adapter):
+            host_limit = host_limits.setdefault(adapter.host, asyncio.Semaphore(adapter.concurrency))
+            # 先取得主機的名額，主機忙碌時不佔用整體的名額
+            async with host_limit, workers:
+                try:
+                    listings = await asyncio.wait_for(
+                        adapter.search_async(self, game_name), adapter.timeout(self)
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"{adapter.name} ({game_name}) 超過時限，略過此平台的結果")
+                    return game_name, adapter.code, [], 'timeout'
+                except CircuitOpenError:
+                    return game_name, adapter.code, [], 'skipped'
+                except Exception as e:
+                    logger.error(f"搜尋 {adapter.name} ({game_name}) 時發生錯誤: {e}")
+                    return game_name, adapter.code, [], 'error'
+            return game_name, adapter.code, listings, 'ok'
+
+        running = [asyncio.ensure_future(run(game_name, get_source(code))) for game_name, code in tasks]
+        try:
+            for future in asyncio.as_completed(running):
+                game_name, code, listings, status = await future
+                record_source_result(code, status, listings)
+                if status == 'ok':
+                    self.record_history(game_name, listings)
+                yield game_name, code, listings, status
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def asearch_many(self, game_names, sources=None):
+        """批次搜尋多個遊戲，回傳 {遊戲名稱: 去重並按價格排序的結果列表}"""
+        all_listings = {game_name: [] for game_name in game_names}
+        async for game_name, _, listings, _ in self.aiter_batch_results(
+                self.batch_tasks(all_listings, sources)):
+            all_listings[game_name].extend(listings)
+        return {
+            game_name: self.deduplicate_listings(listings)
+            for game_name, listings in all_listings.items()
+        }
+
+    async def asearch_platforms(self, game_name, sources=None):
+        """並行搜尋各平台，回傳 {平台代碼: 結果列表}，逾時或失敗的平台不會出現在結果中"""
+        results = {}
+        async for code, listings, status in self.aiter_platform_results(game_name, sources):
+            if status == 'ok':
+                results[code] = listings
+        return results
+
+    async def asearch_all_platforms(self, game_name, sources=None):
+        """並行搜尋所有平台，回傳去重並按價格排序的結果"""
+        logger.info(f"開始搜尋遊戲: {game_name}")
+        all_listings = []
+        for listings in (await self.asearch_platforms(game_name, sources)).values():
+            all_listings.extend(listings)
+
+        unique_listings = self.deduplicate_listings(all_listings)
+        logger.info(f"總共找到 {len(unique_listings)} 個去重後的結果")
+        return unique_listings
@@ -0,0 +1,113 @@
+"""比較舊版 detect_platform 與 classifier.py 的預先編譯平台辨識
+
+以 benchmarks/data/platform_titles.tsv 的標記語料計算準確率，並測量每個標題的辨識時間：
+
+    python benchmarks/bench_classifier.py [--repeat 200] [--errors] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import classify_platform, classify_platforms
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'platform_titles.tsv')
+
+
+def legacy_detect_platform(title):
+    """舊版 GamePriceScraper.detect_platform"""
+    title_lower = title.lower()
+
+    platform_keywords = {
+        'Nintendo Switch': ['switch', 'ns', 'nintendo switch'],
+        'PlayStation 5': ['ps5', 'playstation 5', 'play station 5'],
+        'PlayStation 4': ['ps4', 'playstation 4', 'play station 4'],
+        'Xbox Series X/S': ['xbox series x', 'xbox series s', 'xsx', 'xss'],
+        'Xbox One': ['xbox one', 'xbone'],
+        'PC': ['pc', 'steam', '電腦版']
+    }
+
+    for platform, keywords in platform_keywords.items():
+        if any(keyword in title_lower for keyword in keywords):
+            return platform
+
+    return '未知平台'
+
+
+def load_corpus(path=CORPUS):
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            label, title = line.split('\t', 1)
+            corpus.append((label, title))
+    return corpus
+
+
+def measure(classify_all, titles, repeat):
+    """回傳 (預測結果, 每個標題平均微秒)"""
+    predictions = classify_all(titles)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        classify_all(titles)
+    per_title_us = (time.perf_counter() - start) / (repeat * len(titles)) * 1e6
+    return predictions, per_title_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='整份語料重複辨識次數')
+    parser.add_argument('--errors', action='store_true', help='列出辨識錯誤的標題')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    labels = [label for label, _ in corpus]
+    titles = [title for _, title in corpus]
+
+    methods = [
+        ('legacy', lambda items: [legacy_detect_platform(title) for title in items]),
+        ('classify', lambda items: [classify_platform(title) for title in items]),
+        ('classify_many', classify_platforms),
+    ]
+    report = []
+    errors = {}
+    for name, classify_all in methods:
+        predictions, per_title_us = measure(classify_all, titles, args.repeat)
+        correct = sum(predicted == label for predicted, label in zip(predictions, labels))
+        errors[name] = [
+            (label, predicted, title)
+            for label, predicted, title in zip(labels, predictions, titles)
+            if predicted != label
+        ]
+        report.append({
+            'method': name,
+            'titles': len(titles),
+            'accuracy': round(correct / len(titles), 3),
+            'us_per_title': round(per_title_us, 2),
+        })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = f"{'method':<15}{'titles':>8}{'accuracy':>10}{'us/title':>10}"
+    print(header)
+    print('-' * len(header))
+    for row in report:
+        print(f"{row['method']:<15}{row['titles']:>8}{row['accuracy']:>10}{row['us_per_title']:>10}")
+
+    if args.errors:
+        for name, wrong in errors.items():
+            print(f"\n{name} 辨識錯誤 {len(wrong)} 筆:")
+            for label, predicted, title in wrong:
+                print(f"  {title}  標記={label} 結果={predicted}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""比較兩兩比對與 dedup.py 的 MinHash + LSH 商品分群
+
+以合成的刊登標題（同一商品帶有不同的平台、狀態與促銷字眼）測量分群時間。
+兩者皆從空的快取開始（標題正規化、shingle 與 MinHash 簽章），包含切 shingle 的時間：
+
+    python benchmarks/bench_dedup.py [--sizes 500 2000 10000] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup
+from dedup import cluster_listings, jaccard, normalize_title, title_shingles
+from models import GameListing
+
+GAMES = [
+    '薩爾達傳說 王國之淚', '薩爾達傳說 曠野之息', '瑪利歐賽車8 豪華版', '寶可夢 朱紫',
+    '艾爾登法環', '集合啦！動物森友會', '斯普拉遁3', '魔物獵人 崛起 破曉', '惡魔靈魂 重製版',
+    '星之卡比 探索發現', '異度神劍3', '火焰紋章 Engage', '超級瑪利歐兄弟 驚奇', '皮克敏4',
+    'Final Fantasy XVI', '戰神 諸神黃昏', '漫威蜘蛛人2', '跑車浪漫旅7', '隻狼 暗影雙死',
+    '勇者鬥惡龍 XI S',
+]
+PREFIXES = ['NS', 'Switch', '【現貨】', '二手', '全新', '', '免運', '任天堂 NS']
+SUFFIXES = ['中文版', '', '盒裝', '含特典', '日版', '二手良品', '台灣公司貨', '九成新']
+PLATFORMS = ['Nintendo Switch', 'PlayStation 5', 'PlayStation 4']
+
+
+def build_listings(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        GameListing(
+            title=f"{rng.choice(PREFIXES)} {rng.choice(GAMES)} {rng.choice(SUFFIXES)}",
+            price=rng.randint(300, 2500),
+            platform=rng.choice(PLATFORMS),
+            condition='二手',
+            seller=f'seller{i}',
+            location='台灣',
+            url=f'https://example.com/item/{i}',
+            source='露天拍賣'
+        )
+        for i in range(count)
+    ]
+
+
+def clear_caches():
+    normalize_title.cache_clear()
+    title_shingles.cache_clear()
+    dedup._hashers.clear()
+
+
+def pairwise_clusters(listings, threshold=0.5):
+    """兩兩比較所有刊登的 Jaccard 相似度（O(n²)，作為對照組）"""
+    parent = list(range(len(listings)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    shingles = [title_shingles(listing.title) for listing in listings]
+    for i in range(len(listings)):
+        for j in range(i):
+            if (listings[i].platform == listings[j].platform
+                    and jaccard(shingles[i], shingles[j]) >= threshold):
+                parent[find(i)] = find(j)
+    return len({find(i) for i in range(len(listings))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 10000], help='刊登數')
+    parser.add_argument('--pairwise-limit', type=int, default=5000, help='超過此數量時不執行兩兩比對')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        listings = build_listings(size)
+        clear_caches()
+
+        start = time.perf_counter()
+        lsh_count = len(cluster_listings(listings))
+        lsh_ms = (time.perf_counter() - start) * 1000
+
+        pairwise_ms = pairwise_count = None
+        if size <= args.pairwise_limit:
+            clear_caches()
+            start = time.perf_counter()
+            pairwise_count = pairwise_clusters(listings)
+            pairwise_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        report.append({
+            'listings': size,
+            'lsh_ms': round(lsh_ms, 1),
+            'pairwise_ms': pairwise_ms,
+            'lsh_clusters': lsh_count,
+            'pairwise_clusters': pairwise_count,
+        })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = f"{'listings':>9}{'lsh ms':>10}{'pairwise ms':>13}{'lsh clusters':>14}{'pairwise clusters':>19}"
+    print(header)
+    print('-' * len(header))
+    for row in report:
+        print(
+            f"{row['listings']:>9}{row['lsh_ms']:>10}{str(row['pairwise_ms'] or '-'):>13}"
+            f"{row['lsh_clusters']:>14}{str(row['pairwise_clusters'] or '-'):>19}"
+        )
+
+
+if __name__ == '__main__':
+    main()
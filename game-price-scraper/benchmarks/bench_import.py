@@ -0,0 +1,125 @@
+"""測量 worker 啟動時匯入應用程式模組的時間
+
+每輪以新的直譯器執行 `python -X importtime -c "import <模組>"`，扣除空直譯器的
+啟動時間，並列出最耗時的直接相依模組與是否匯入了 Selenium：
+
+    python benchmarks/bench_import.py [--modules app,scraper,cli] [--rounds 5] [--top 8] [--json]
+
+--preload-selenium 另外測量 gunicorn.conf.py 在 master 程序預先匯入 Selenium 的成本。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 匯入 app.py 時不預熱瀏覽器、不啟動價格追蹤排程，只測量匯入本身
+ENVIRONMENT = dict(os.environ, START_BACKGROUND_TASKS='False', WATCH_ENABLED='False')
+
+
+def run(code):
+    """以新的直譯器執行 code，回傳 (牆鐘時間 ms, -X importtime 的輸出)"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_DIR, env=ENVIRONMENT, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return elapsed, completed.stderr
+
+
+def parse_importtime(output):
+    """回傳 [(模組名稱, 巢狀深度, 自身 µs, 累計 µs)]"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def direct_dependencies(rows, baseline):
+    """回傳由測量的程式碼直接匯入的模組（深度 0，不含空直譯器本身匯入的模組）
+    及其直接相依（深度 1）的 [(模組名稱, 累計 µs)]"""
+    dependencies = []
+    children = []
+    # -X importtime 先輸出相依模組，再輸出匯入它們的模組
+    for name, depth, _, cumulative in rows:
+        if depth == 1:
+            children.append((name, cumulative))
+        elif depth == 0:
+            if name not in baseline:
+                dependencies.extend(children or [(name, cumulative)])
+            children = []
+    return sorted(dependencies, key=lambda row: row[1], reverse=True)
+
+
+def measure(code, rounds, baseline):
+    baseline_ms, baseline_modules = baseline
+    walls = []
+    rows = []
+    for _ in range(rounds):
+        elapsed, output = run(code)
+        walls.append(elapsed - baseline_ms)
+        rows = [row for row in parse_importtime(output) if row[0] not in baseline_modules]
+    return {
+        'ms': round(statistics.median(walls), 1),
+        'min_ms': round(min(walls), 1),
+        'modules': len(rows),
+        'selenium': any(name.split('.')[0] == 'selenium' for name, _, _, _ in rows),
+        'dependencies': [
+            {'module': name, 'ms': round(cumulative / 1000, 1)}
+            for name, cumulative in direct_dependencies(rows, baseline_modules)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', default='app,scraper', help='要測量的模組，以逗號分隔')
+    parser.add_argument('--rounds', type=int, default=5, help='每個模組的測量次數（取中位數）')
+    parser.add_argument('--top', type=int, default=8, help='列出最耗時的相依模組數')
+    parser.add_argument('--preload-selenium', action='store_true', help='另外測量預先匯入 Selenium 的成本')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    baseline_runs = [run('pass') for _ in range(args.rounds)]
+    baseline_ms = statistics.median(elapsed for elapsed, _ in baseline_runs)
+    baseline_modules = {name for name, _, _, _ in parse_importtime(baseline_runs[-1][1])}
+    cases = [(module, f'import {module}') for module in args.modules.split(',')]
+    if args.preload_selenium:
+        cases.append(('app + preload_selenium', 'import app, driver_pool; driver_pool.preload_selenium()'))
+
+    results = {}
+    for name, code in cases:
+        result = measure(code, args.rounds, (baseline_ms, baseline_modules))
+        result['dependencies'] = result['dependencies'][:args.top]
+        results[name] = result
+
+    if args.json:
+        print(json.dumps({
+            'python': sys.version.split()[0],
+            'baseline_ms': round(baseline_ms, 1),
+            'results': results
+        }, indent=2, ensure_ascii=False))
+        return
+
+    print(f"空直譯器啟動 {baseline_ms:.1f} ms（以下已扣除）")
+    for name, result in results.items():
+        print()
+        print(f"{name}: {result['ms']} ms（最快 {result['min_ms']} ms），{result['modules']} 個模組，"
+              f"Selenium {'已' if result['selenium'] else '未'}匯入")
+        for dependency in result['dependencies']:
+            print(f"  {dependency['module']:<36}{dependency['ms']:>8} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""比較舊版 GameListing / 逐筆轉字典再 json.dumps 與 models.py、serialize.py 的記憶體與序列化速度
+
+以合成的 100k 筆刊登測量：
+
+    python benchmarks/bench_listings.py [--count 100000] [--rounds 3] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialize
+from models import GameListing
+
+SOURCES = ['露天拍賣', '蝦皮購物', 'Yahoo拍賣', 'PChome 24h']
+PLATFORMS = ['Nintendo Switch', 'PlayStation 5', 'PlayStation 4', '未知平台']
+CONDITIONS = ['二手', '全新']
+SELLERS = ['未知賣家', '蝦皮賣家', 'Yahoo賣家', 'PChome']
+
+
+@dataclass
+class LegacyGameListing:
+    """舊版沒有 __slots__、不共用字串的 GameListing"""
+    title: str
+    price: int
+    platform: str
+    condition: str
+    seller: str
+    location: str
+    url: str
+    source: str
+    posted_time: Optional[str] = None
+    seller_rating: Optional[str] = None
+
+
+def legacy_listing_to_dict(listing):
+    return {
+        'title': listing.title,
+        'price': listing.price,
+        'platform': listing.platform,
+        'condition': listing.condition,
+        'seller': listing.seller,
+        'location': listing.location,
+        'source': listing.source,
+        'url': listing.url,
+        'posted_time': listing.posted_time,
+        'seller_rating': listing.seller_rating
+    }
+
+
+def _fresh(value):
+    """模擬解析 HTML 時每筆各自產生的新字串物件"""
+    return ''.join(list(value))
+
+
+def build_listings(cls, count):
+    return [
+        cls(
+            title=f'NS 薩爾達傳說 王國之淚 中文版 #{i}',
+            price=500 + i % 2000,
+            platform=_fresh(PLATFORMS[i % len(PLATFORMS)]),
+            condition=_fresh(CONDITIONS[i % len(CONDITIONS)]),
+            seller=_fresh(SELLERS[i % len(SELLERS)]),
+            location=_fresh('台灣'),
+            url=f'https://www.ruten.com.tw/item/{i}',
+            source=_fresh(SOURCES[i % len(SOURCES)]),
+        )
+        for i in range(count)
+    ]
+
+
+def measure_memory(cls, count):
+    """回傳建立 count 筆刊登後仍佔用的記憶體（MiB）與建立時間（ms）"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    listings = build_listings(cls, count)
+    elapsed = (time.perf_counter() - start) * 1000
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del listings
+    return current / 1024 / 1024, elapsed
+
+
+def measure_dumps(func, listings, rounds):
+    """回傳 (每次序列化的平均 ms, 輸出大小 KiB, 序列化時配置的記憶體峰值 MiB)"""
+    output = func(listings)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(listings)
+    per_round_ms = (time.perf_counter() - start) / rounds * 1000
+
+    tracemalloc.start()
+    func(listings)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_round_ms, len(output) / 1024, peak / 1024 / 1024
+
+
+def legacy_dumps(listings):
+    results = [legacy_listing_to_dict(listing) for listing in listings]
+    return json.dumps({'results': results}, ensure_ascii=False).encode('utf-8')
+
+
+def fallback_dumps(listings):
+    orjson, serialize.orjson = serialize.orjson, None
+    try:
+        return serialize.dumps({'results': listings})
+    finally:
+        serialize.orjson = orjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help='刊登筆數')
+    parser.add_argument('--rounds', type=int, default=3, help='序列化重複次數')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    legacy_mib, legacy_build_ms = measure_memory(LegacyGameListing, args.count)
+    slotted_mib, slotted_build_ms = measure_memory(GameListing, args.count)
+    memory = {
+        'legacy_mib': round(legacy_mib, 1),
+        'slotted_mib': round(slotted_mib, 1),
+        'legacy_build_ms': round(legacy_build_ms, 1),
+        'slotted_build_ms': round(slotted_build_ms, 1),
+    }
+
+    legacy_listings = build_listings(LegacyGameListing, args.count)
+    listings = build_listings(GameListing, args.count)
+    cases = [('dict + json.dumps', legacy_dumps, legacy_listings)]
+    if serialize.orjson is not None:
+        cases.append(('serialize (orjson)', lambda items: serialize.dumps({'results': items}), listings))
+    cases.append(('serialize (json)', fallback_dumps, listings))
+
+    throughput = []
+    for name, func, items in cases:
+        per_round_ms, size_kib, peak_mib = measure_dumps(func, items, args.rounds)
+        throughput.append({
+            'method': name,
+            'ms': round(per_round_ms, 1),
+            'listings_per_s': round(args.count / per_round_ms * 1000),
+            'output_kib': round(size_kib),
+            'peak_mib': round(peak_mib, 1),
+        })
+
+    if args.json:
+        print(json.dumps({'count': args.count, 'memory': memory, 'serialize': throughput}, indent=2))
+        return
+
+    print(f"{args.count} 筆刊登")
+    print(f"  舊版 dataclass: {memory['legacy_mib']} MiB，建立 {memory['legacy_build_ms']} ms")
+    print(f"  slots + intern: {memory['slotted_mib']} MiB，建立 {memory['slotted_build_ms']} ms")
+    print()
+    header = f"{'method':<20}{'ms':>10}{'listings/s':>14}{'KiB':>10}{'peak MiB':>10}"
+    print(header)
+    print('-' * len(header))
+    for row in throughput:
+        print(f"{row['method']:<20}{row['ms']:>10}{row['listings_per_s']:>14}{row['output_kib']:>10}{row['peak_mib']:>10}")
+
+
+if __name__ == '__main__':
+    main()
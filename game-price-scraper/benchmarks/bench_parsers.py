@@ -0,0 +1,169 @@
+"""比較舊版 BeautifulSoup 解析與 parsers.py 的 lxml 增量解析
+
+以合成的搜尋結果頁測量每頁解析時間與記憶體配置：
+
+    python benchmarks/bench_parsers.py [--items 60] [--rounds 50] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from parsers import RUTEN_PARSER, YAHOO_PARSER, PCHOME_PARSER, parse_price
+
+FILLER = '<div class="nav"><ul>' + ''.join(
+    f'<li><a href="/c/{i}">分類 {i}</a></li>' for i in range(80)
+) + '</ul></div>'
+SCRIPT = '<script>' + 'var x = 1;' * 2000 + '</script>'
+
+
+def build_page(item_html, count):
+    """產生含導覽列、腳本與 count 個商品的搜尋結果頁"""
+    items = ''.join(item_html.format(i=i, price=300 + i * 7) for i in range(count))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>搜尋</title>'
+        f'{SCRIPT}</head><body>{FILLER}<div class="results">{items}</div>'
+        f'<footer>{FILLER}</footer></body></html>'
+    ).encode('utf-8')
+
+
+RUTEN_ITEM = (
+    '<div class="rt-item"><div class="rt-item-img"><img src="/img/{i}.jpg"></div>'
+    '<div class="rt-item-body"><a class="rt-item-title" href="/item/{i}">NS 薩爾達傳說 王國之淚 中文版 #{i}</a>'
+    '<b class="rt-item-price">$ {price}</b><span class="rt-item-seller">seller{i}</span></div></div>'
+)
+YAHOO_ITEM = (
+    '<li class="BaseGridItem"><a href="/item/{i}"><img src="/img/{i}.jpg">'
+    '<h3>PS5 艾爾登法環 黃金樹幽影 #{i}</h3></a><span class="price">${price}</span></li>'
+)
+PCHOME_ITEM = (
+    '<div class="prod_item"><a href="/prod/{i}"><img src="/img/{i}.jpg"></a>'
+    '<h5>Switch 寶可夢 朱紫 #{i}</h5><b class="price">{price}</b></div>'
+)
+
+
+def legacy_ruten(content, limit):
+    soup = BeautifulSoup(content, 'html.parser')
+    items = soup.find_all('div', class_='rt-item') or soup.find_all('div', class_='item')
+    results = []
+    for item in items[:limit]:
+        title_elem = item.find('a', class_='rt-item-title') or item.find('h3')
+        price_elem = item.find('b', class_='rt-item-price') or item.find('span', class_='price')
+        if not title_elem or not price_elem:
+            continue
+        seller_elem = item.find('span', class_='rt-item-seller')
+        results.append({
+            'title': title_elem.get_text(strip=True),
+            'price': parse_price(price_elem.get_text(strip=True)),
+            'url': title_elem.get('href', ''),
+            'seller': seller_elem.get_text(strip=True) if seller_elem else None,
+        })
+    return results
+
+
+def legacy_yahoo(content, limit):
+    soup = BeautifulSoup(content, 'html.parser')
+    items = soup.find_all('li', class_='BaseGridItem') or soup.find_all('div', class_='srp-item')
+    results = []
+    for item in items[:limit]:
+        title_elem = item.find('h3') or item.find('a', class_='product-name')
+        price_elem = item.find('span', class_='price') or item.find('em', class_='price')
+        if not title_elem or not price_elem:
+            continue
+        url_elem = item.find('a')
+        results.append({
+            'title': title_elem.get_text(strip=True),
+            'price': parse_price(price_elem.get_text(strip=True)),
+            'url': url_elem.get('href', '') if url_elem else '',
+        })
+    return results
+
+
+def legacy_pchome(content, limit):
+    soup = BeautifulSoup(content, 'html.parser')
+    items = soup.find_all('div', class_='prod_item') or soup.find_all('li', class_='item')
+    results = []
+    for item in items[:limit]:
+        title_elem = item.find('h5') or item.find('a', class_='prod_name')
+        price_elem = item.find('b', class_='price') or item.find('span', class_='price')
+        if not title_elem or not price_elem:
+            continue
+        url_elem = item.find('a')
+        results.append({
+            'title': title_elem.get_text(strip=True),
+            'price': parse_price(price_elem.get_text(strip=True)),
+            'url': url_elem.get('href', '') if url_elem else '',
+        })
+    return results
+
+
+CASES = [
+    ('ruten', RUTEN_ITEM, legacy_ruten, RUTEN_PARSER, 10),
+    ('yahoo', YAHOO_ITEM, legacy_yahoo, YAHOO_PARSER, 8),
+    ('pchome', PCHOME_ITEM, legacy_pchome, PCHOME_PARSER, 5),
+]
+
+
+def measure(func, content, limit, rounds):
+    """回傳 (每頁平均毫秒, 單次解析的記憶體配置峰值 KiB, 結果數)"""
+    results = func(content, limit)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(content, limit)
+    per_page_ms = (time.perf_counter() - start) / rounds * 1000
+
+    tracemalloc.start()
+    func(content, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_page_ms, peak / 1024, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=60, help='每頁商品數')
+    parser.add_argument('--rounds', type=int, default=50, help='每種解析方式重複次數')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    report = []
+    for name, item_html, legacy, engine, limit in CASES:
+        content = build_page(item_html, args.items)
+        legacy_ms, legacy_kib, legacy_count = measure(legacy, content, limit, args.rounds)
+        engine_ms, engine_kib, engine_count = measure(
+            lambda c, n: engine.parse(c, n), content, limit, args.rounds
+        )
+        report.append({
+            'source': name,
+            'page_kib': round(len(content) / 1024, 1),
+            'bs4_ms': round(legacy_ms, 3),
+            'lxml_ms': round(engine_ms, 3),
+            'speedup': round(legacy_ms / engine_ms, 1),
+            'bs4_peak_kib': round(legacy_kib, 1),
+            'lxml_peak_kib': round(engine_kib, 1),
+            'bs4_items': legacy_count,
+            'lxml_items': engine_count,
+        })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = f"{'source':<8}{'page KiB':>10}{'bs4 ms':>10}{'lxml ms':>10}{'speedup':>9}{'bs4 KiB':>10}{'lxml KiB':>10}"
+    print(header)
+    print('-' * len(header))
+    for row in report:
+        print(
+            f"{row['source']:<8}{row['page_kib']:>10}{row['bs4_ms']:>10}{row['lxml_ms']:>10}"
+            f"{row['speedup']:>8}x{row['bs4_peak_kib']:>10}{row['lxml_peak_kib']:>10}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""測量 suggest.py 搜尋建議索引的查詢延遲
+
+以別名表、合成的搜尋紀錄與商品標題建立不同大小的索引，測量前綴、別名、
+部分輸入與錯字查詢的延遲（目標為 p99 低於 5 ms）：
+
+    python benchmarks/bench_suggest.py [--sizes 1000 5000 20000] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from suggest import SuggestIndex
+
+Config.HISTORY_ENABLED = False  # 只測量合成的資料
+
+Cluster = namedtuple('Cluster', 'title count')
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'platform_titles.tsv')
+
+GAMES = [
+    '薩爾達傳說 王國之淚', '薩爾達傳說 曠野之息', '瑪利歐賽車8 豪華版', '寶可夢 朱紫',
+    '艾爾登法環', '集合啦！動物森友會', '斯普拉遁3', '魔物獵人 崛起 破曉', '惡魔靈魂 重製版',
+    '星之卡比 探索發現', '異度神劍3', '火焰紋章 Engage', '超級瑪利歐兄弟 驚奇', '皮克敏4',
+    'Final Fantasy XVI', '戰神 諸神黃昏', '漫威蜘蛛人2', '跑車浪漫旅7', '隻狼 暗影雙死',
+    '勇者鬥惡龍 XI S',
+]
+SUFFIXES = ['中文版', '盒裝', '含特典', '限定版', '豪華版', '典藏版', '季票', '序號']
+
+QUERIES = [
+    '薩', '薩爾', '薩爾達傳', '王國之淚', '薩爾達王國', '薩爾達傳說 王國之涙', 'zel', 'zelda', 'totk',
+    '寶可', 'pokemon sc', '瑪利', 'mario k', '魔物獵人崛起', 'monster', '艾爾登', 'elden', '動森',
+    '斯普拉遁', 'final fan', '戰神 諸神', '蜘蛛人', '勇者鬥惡龍', '不存在的遊戲', '',
+]
+
+
+def sample_titles():
+    with open(DATA_PATH, encoding='utf-8') as f:
+        return [line.split('\t', 1)[1].strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def build_index(size, seed=0):
+    """建立約 size 個項目的索引：合成的搜尋名稱與商品標題各半"""
+    rng = random.Random(seed)
+    index = SuggestIndex(max_entries=size)
+    titles = sample_titles()
+    for i in range(size // 2):
+        game = rng.choice(GAMES)
+        name = f'{game} {rng.choice(SUFFIXES)} {i}'
+        cluster = Cluster(f'{rng.choice(titles)} {rng.choice(SUFFIXES)} {i}', rng.randint(2, 20))
+        index.record_search(name, [cluster])
+    return index
+
+
+def measure(index, rounds):
+    timings = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.suggest(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p99_ms': round(timings[int(len(timings) * 0.99) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000], help='索引的項目數')
+    parser.add_argument('--rounds', type=int, default=20, help='每個查詢的測量次數')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        start = time.perf_counter()
+        index = build_index(size)
+        build_ms = (time.perf_counter() - start) * 1000
+        stats = index.stats()
+        report.append(dict(entries=stats['entries'], terms=stats['terms'], build_ms=round(build_ms, 1),
+                           **measure(index, args.rounds)))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = f"{'entries':>8}{'terms':>8}{'build ms':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    print(header)
+    print('-' * len(header))
+    for row in report:
+        print(
+            f"{row['entries']:>8}{row['terms']:>8}{row['build_ms']:>10}"
+            f"{row['p50_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""離線效能測試：以 fixtures 與本機假拍賣平台測量搜尋各階段的效能，不連線到真實網站
+
+    python benchmarks/bench_suite.py [--only parse,dedup,e2e,throughput] [--output results.json]
+
+- parse: 各平台結果頁（benchmarks/data/fixtures）的解析時間
+- dedup: 去重（deduplicate_listings）與商品分群（cluster_listings）的時間
+- e2e: 對 fake_marketplace.py 執行 search_all_platforms 的端對端延遲
+- throughput: 以多個執行緒同時呼叫 Flask 的 /search，測量每秒請求數與延遲
+
+蝦皮需要 Chrome，預設不納入 e2e 與 throughput（--browser 可加入）。結果以
+--json 輸出到 stdout，或以 --output 寫入檔案，方便比較不同版本的數據。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from config import Config
+from fake_marketplace import FIXTURES_DIR, FakeMarketplace
+
+BENCHMARKS = ('parse', 'dedup', 'e2e', 'throughput')
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def latency_summary(seconds):
+    ms = [value * 1000 for value in seconds]
+    return {
+        'count': len(ms),
+        'mean_ms': round(sum(ms) / len(ms), 2) if ms else None,
+        'p50_ms': round(percentile(ms, 50), 2) if ms else None,
+        'p95_ms': round(percentile(ms, 95), 2) if ms else None,
+        'max_ms': round(max(ms), 2) if ms else None,
+    }
+
+
+def read_fixture(filename):
+    with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+        return f.read()
+
+
+def configure(args):
+    """在匯入 app / scraper 之前套用效能測試用的設定"""
+    # 先設定根日誌，app.py 的 basicConfig 不會再把每個搜尋的 INFO 日誌印出
+    logging.basicConfig(level=logging.WARNING)
+    Config.CACHE_BACKEND = 'memory'
+    Config.HISTORY_ENABLED = False
+    Config.WATCH_ENABLED = False
+    Config.WEBDRIVER_POOL_PREWARM = 0
+    Config.PLATFORMS['shopee']['enabled'] = args.browser
+    # 所有平台都在同一個本機主機上，連線池需容納全部同時進行的請求
+    Config.HTTP_POOL_MAXSIZE = max(Config.HTTP_POOL_MAXSIZE, args.concurrency * len(Config.PLATFORMS))
+
+
+def unthrottle(args):
+    """預設放寬各平台的限速，只測量爬蟲本身的成本；--respect-rate-limits 時保留原設定"""
+    if args.respect_rate_limits:
+        return
+    from rate_limit import rate_limiter
+    from sources import SOURCE_REGISTRY
+    for adapter in SOURCE_REGISTRY.values():
+        rate_limiter.configure(adapter.host, 10000, 10000)
+
+
+def bench_parse(args):
+    from parsers import PCHOME_PARSER, RUTEN_PARSER, YAHOO_PARSER, parse_shopee_search
+    from serialize import loads
+
+    cases = [
+        ('ruten', lambda content: RUTEN_PARSER.parse(content, args.limit), read_fixture('ruten_search.html')),
+        ('yahoo', lambda content: YAHOO_PARSER.parse(content, args.limit), read_fixture('yahoo_search.html')),
+        ('pchome', lambda content: PCHOME_PARSER.parse(content, args.limit), read_fixture('pchome_search.html')),
+        ('shopee', lambda content: parse_shopee_search(loads(content), args.limit),
+         read_fixture('shopee_search_items.json')),
+    ]
+    results = {}
+    for code, parse, content in cases:
+        items = parse(content)
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            parse(content)
+        elapsed = time.perf_counter() - start
+        results[code] = {
+            'items': len(items),
+            'page_kib': round(len(content) / 1024, 1),
+            'ms_per_page': round(elapsed / args.rounds * 1000, 3),
+        }
+    return results
+
+
+def build_listings(count, seed=0):
+    """由 fixtures 的商品組合出 count 筆刊登，約一成為重複網址"""
+    from classifier import classify_platform
+    from models import GameListing
+    from parsers import PCHOME_PARSER, RUTEN_PARSER, YAHOO_PARSER
+
+    items = []
+    for parser, name in ((RUTEN_PARSER, 'ruten'), (YAHOO_PARSER, 'yahoo'), (PCHOME_PARSER, 'pchome')):
+        items.extend(parser.parse(read_fixture(f'{name}_search.html'), 1000))
+
+    rng = random.Random(seed)
+    listings = []
+    for i in range(count):
+        item = items[i % len(items)]
+        serial = rng.randrange(count) if rng.random() < 0.1 else i
+        listings.append(GameListing(
+            title=item['title'] if i < len(items) else f"{item['title']} {serial % 97}",
+            price=max(item['price'] + rng.randrange(-200, 200), 1),
+            platform=classify_platform(item['title']),
+            condition='二手',
+            seller=item['seller'] or '未知賣家',
+            location='台灣',
+            url=f"{item['url']}?n={serial}",
+            source='露天拍賣',
+        ))
+    return listings
+
+
+def bench_dedup(args):
+    from scraper import GamePriceScraper
+
+    scraper = GamePriceScraper()
+    results = {}
+    for size in args.dedup_sizes:
+        listings = build_listings(size)
+        start = time.perf_counter()
+        unique = scraper.deduplicate_listings(listings)
+        dedup_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        clusters = scraper.cluster_listings(unique)
+        cluster_ms = (time.perf_counter() - start) * 1000
+        results[str(size)] = {
+            'unique': len(unique),
+            'clusters': len(clusters),
+            'dedup_ms': round(dedup_ms, 2),
+            'cluster_ms': round(cluster_ms, 2),
+        }
+    return results
+
+
+def bench_e2e(args, marketplace):
+    from scraper import GamePriceScraper
+
+    scraper = GamePriceScraper()
+    durations = []
+    result_counts = []
+    for i in range(args.searches):
+        start = time.perf_counter()
+        listings = scraper.search_all_platforms(f'效能測試 {i}')
+        durations.append(time.perf_counter() - start)
+        result_counts.append(len(listings))
+    summary = latency_summary(durations)
+    summary['avg_results'] = round(sum(result_counts) / len(result_counts), 1) if result_counts else 0
+    return summary
+
+
+def bench_throughput(args, marketplace):
+    import requests
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='bench-app', daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_port}/search'
+
+    local = threading.local()
+
+    def search(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        # 每個請求使用不同的遊戲名稱，不會命中快取
+        response = session.post(url, json={'game_name': f'併發測試 {i}'}, timeout=120)
+        return response.status_code, time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            outcomes = list(executor.map(search, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        thread.join()
+
+    summary = latency_summary([duration for _, duration in outcomes])
+    summary.update({
+        'concurrency': args.concurrency,
+        'requests_per_s': round(len(outcomes) / elapsed, 2),
+        'statuses': dict(Counter(str(status) for status, _ in outcomes)),
+    })
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report):
+    meta = report['meta']
+    print(f"版本 {meta['revision'] or '-'}，Python {meta['python']}，{meta['timestamp']}")
+    results = report['results']
+    if 'parse' in results:
+        print('\n解析（每頁）')
+        for code, row in results['parse'].items():
+            print(f"  {code:<8}{row['ms_per_page']:>10.3f} ms  {row['items']:>4} 項  {row['page_kib']:>7} KiB")
+    if 'dedup' in results:
+        print('\n去重與分群')
+        for size, row in results['dedup'].items():
+            print(f"  {size:>8} 筆  去重 {row['dedup_ms']:>9.2f} ms  分群 {row['cluster_ms']:>9.2f} ms"
+                  f"  ({row['unique']} 筆 / {row['clusters']} 群)")
+    if 'e2e' in results:
+        row = results['e2e']
+        print(f"\nsearch_all_platforms  p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  max {row['max_ms']} ms"
+              f"  平均 {row['avg_results']} 筆結果")
+    if 'throughput' in results:
+        row = results['throughput']
+        print(f"\n/search 併發 {row['concurrency']}  {row['requests_per_s']} req/s"
+              f"  p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  狀態 {row['statuses']}")
+    if 'marketplace' in report:
+        print(f"\n假拍賣平台回應: {report['marketplace']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='要執行的項目，以逗號分隔')
+    parser.add_argument('--rounds', type=int, default=200, help='解析的重複次數')
+    parser.add_argument('--limit', type=int, default=10, help='每頁解析的商品數（與 MAX_RESULTS_PER_PLATFORM 相同）')
+    parser.add_argument('--dedup-sizes', type=lambda value: [int(n) for n in value.split(',')],
+                        default=[1000, 10000], help='去重與分群的刊登筆數，以逗號分隔')
+    parser.add_argument('--searches', type=int, default=20, help='端對端搜尋次數')
+    parser.add_argument('--requests', type=int, default=200, help='/search 的請求數')
+    parser.add_argument('--concurrency', type=int, default=16, help='同時進行的 /search 請求數')
+    parser.add_argument('--latency', type=float, default=0.05, help='假拍賣平台每個請求的延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.02, help='延遲的隨機抖動秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='假拍賣平台回應 HTTP 500 的機率')
+    parser.add_argument('--rate-limit', type=int, default=None, help='假拍賣平台每個平台每秒最多的請求數')
+    parser.add_argument('--respect-rate-limits', action='store_true', help='保留各平台原本的限速設定')
+    parser.add_argument('--browser', action='store_true', help='e2e 與 throughput 也搜尋蝦皮（需要 Chrome）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    parser.add_argument('--output', help='將 JSON 結果寫入檔案')
+    args = parser.parse_args()
+
+    selected = [name for name in args.only.split(',') if name]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"未知的項目: {', '.join(sorted(unknown))}")
+
+    configure(args)
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('json', 'output')},
+        },
+        'results': {},
+    }
+
+    if 'parse' in selected:
+        report['results']['parse'] = bench_parse(args)
+    if 'dedup' in selected:
+        report['results']['dedup'] = bench_dedup(args)
+
+    if 'e2e' in selected or 'throughput' in selected:
+        marketplace = FakeMarketplace(
+            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            rate_limit=args.rate_limit, seed=0
+        )
+        Config.SOURCE_BASE_URLS.update(marketplace.base_urls())
+        unthrottle(args)
+        with marketplace:
+            if 'e2e' in selected:
+                report['results']['e2e'] = bench_e2e(args, marketplace)
+            if 'throughput' in selected:
+                report['results']['throughput'] = bench_throughput(args, marketplace)
+        report['marketplace'] = marketplace.stats()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
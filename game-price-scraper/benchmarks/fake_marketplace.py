@@ -0,0 +1,173 @@
+"""本機的假拍賣平台伺服器，以 benchmarks/data/fixtures 的頁面模擬各平台的搜尋結果
+
+可設定延遲、錯誤率與限速（超過每秒請求數時回應 429 與 Retry-After）：
+
+    python benchmarks/fake_marketplace.py [--port 8900] [--latency 0.2] [--jitter 0.05]
+                                          [--error-rate 0.05] [--rate-limit 5]
+
+啟動後以 SOURCE_BASE_URLS 讓應用程式改為搜尋本機伺服器：
+
+    SOURCE_BASE_URLS=ruten=http://127.0.0.1:8900/ruten,yahoo=http://127.0.0.1:8900/yahoo,\\
+pchome=http://127.0.0.1:8900/pchome,shopee=http://127.0.0.1:8900/shopee python app.py
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fixtures')
+
+# 各平台的搜尋路徑（與 sources.py 的 search_url 相同）與回應的 fixture
+ROUTES = {
+    ('ruten', '/find/'): ('ruten_search.html', 'text/html; charset=utf-8'),
+    ('yahoo', '/search/auction/product'): ('yahoo_search.html', 'text/html; charset=utf-8'),
+    ('pchome', '/search/v3.3/'): ('pchome_search.html', 'text/html; charset=utf-8'),
+    ('shopee', '/search'): ('shopee_search.html', 'text/html; charset=utf-8'),
+    ('shopee', '/api/v4/search/search_items'): ('shopee_search_items.json', 'application/json'),
+}
+
+
+class FakeMarketplace:
+    """在背景執行緒中提供各平台 fixture 的 HTTP 伺服器
+
+    - latency / jitter: 每個請求的延遲秒數與隨機抖動
+    - error_rate: 回應 HTTP 500 的機率
+    - rate_limit: 每個平台每秒最多的請求數，超過時回應 429
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit=None, fixtures_dir=FIXTURES_DIR, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.fixtures = {}
+        for key, (filename, content_type) in ROUTES.items():
+            with open(os.path.join(fixtures_dir, filename), 'rb') as f:
+                self.fixtures[key] = (f.read(), content_type)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = defaultdict(deque)
+        self.counts = Counter()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def base_urls(self):
+        """回傳可直接設定到 Config.SOURCE_BASE_URLS 的 {平台代碼: 網址}"""
+        return {site: f'{self.url}/{site}' for site, _ in ROUTES}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-marketplace', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def _throttled(self, site):
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent[site]
+            while recent and recent[0] <= now - 1:
+                recent.popleft()
+            if len(recent) >= self.rate_limit:
+                return True
+            recent.append(now)
+            return False
+
+    def respond(self, path):
+        """回傳 (狀態碼, 標頭, 內容)"""
+        site, _, rest = path.lstrip('/').partition('/')
+        fixture = self.fixtures.get((site, '/' + rest))
+        if fixture is None:
+            return 404, {}, b'not found'
+
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter) if self.latency else 0
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._throttled(site):
+            status, headers, body = 429, {'Retry-After': '1'}, b'too many requests'
+        elif self.error_rate and self._random.random() < self.error_rate:
+            status, headers, body = 500, {}, b'internal error'
+        else:
+            body, content_type = fixture
+            status, headers = 200, {'Content-Type': content_type}
+        with self._lock:
+            self.counts[f'{site}_{status}'] += 1
+        return status, headers, body
+
+    def _handler(self):
+        marketplace = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, headers, body = marketplace.respond(urlsplit(self.path).path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.0, help='每個請求的延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延遲的隨機抖動秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回應 HTTP 500 的機率')
+    parser.add_argument('--rate-limit', type=int, default=None, help='每個平台每秒最多的請求數')
+    args = parser.parse_args()
+
+    marketplace = FakeMarketplace(
+        args.host, args.port, args.latency, args.jitter, args.error_rate, args.rate_limit
+    )
+    print(f"假拍賣平台已啟動: {marketplace.url}")
+    print('SOURCE_BASE_URLS=' + ','.join(f'{code}={url}' for code, url in marketplace.base_urls().items()))
+    try:
+        marketplace.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        marketplace.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""由實際網站重新錄製 benchmarks/data/fixtures 的搜尋結果頁
+
+    python benchmarks/record_fixtures.py [--query 薩爾達傳說] [--sources ruten,yahoo,pchome,shopee]
+
+HTTP 平台儲存搜尋結果頁原始的 HTML；蝦皮儲存搜尋 API 的 JSON 回應（與
+ShopeeSource 在頁面中攔截到的內容相同）。錄製後請以 bench_suite.py --only parse
+確認各平台仍解析得到商品，選擇器失效時需先更新 parsers.py。
+"""
+import argparse
+import os
+import sys
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_marketplace import FIXTURES_DIR
+from sources import get_source
+from transport import get_default_transport
+
+SHOPEE_API_URL = 'https://shopee.tw/api/v4/search/search_items?by=relevancy&limit=60&newest=0&keyword={query}'
+
+FIXTURE_FILES = {
+    'ruten': 'ruten_search.html',
+    'yahoo': 'yahoo_search.html',
+    'pchome': 'pchome_search.html',
+    'shopee': 'shopee_search_items.json',
+}
+
+
+def record(code, query):
+    if code == 'shopee':
+        url = SHOPEE_API_URL.format(query=quote(query))
+        headers = {'Referer': get_source('shopee').search_url(query), 'Accept': 'application/json'}
+    else:
+        url = get_source(code).search_url(query)
+        headers = {}
+    response = get_default_transport().get(url, headers=headers, timeout=30)
+    response.raise_for_status()
+    path = os.path.join(FIXTURES_DIR, FIXTURE_FILES[code])
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    return path, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--query', default='薩爾達傳說', help='搜尋的遊戲名稱')
+    parser.add_argument('--sources', default=','.join(FIXTURE_FILES), help='要錄製的平台代碼，以逗號分隔')
+    args = parser.parse_args()
+
+    for code in args.sources.split(','):
+        try:
+            path, size = record(code, args.query)
+        except Exception as e:
+            print(f"{code}: 錄製失敗 ({e})")
+            continue
+        print(f"{code}: {path} ({size / 1024:.1f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
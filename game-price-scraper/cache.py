@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import re
+import threading
+import unicodedata
+
+from cache_store import create_cache_store
+from config import Config
+from metrics import cache_requests
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_game_name(game_name):
+    """正規化遊戲名稱作為快取鍵：全形轉半形、轉小寫並合併空白"""
+    name = unicodedata.normalize('NFKC', game_name).lower()
+    return _WHITESPACE_RE.sub(' ', name).strip()
+
+
+class _Flight:
+    """進行中的搜尋，讓同一個 (遊戲, 平台) 的並行請求共用一次爬取"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.listings = []
+        self.status = 'error'
+
+
+class SearchCache:
+    """搜尋結果快取
+
+    - 以 (正規化遊戲名稱, 平台代碼) 為單位儲存，過期的平台可單獨重新爬取
+    - 實際資料存放在 store（見 cache_store），預設為多個 worker 共用的 SQLite 檔案
+    - 同一個 (遊戲, 平台) 同時只會有一個爬取在進行，其他請求等待其結果
+    - prefix 區分同一個 store 中不同搜尋模式的結果（例如深度搜尋）
+    """
+
+    def __init__(self, store=None, prefix=''):
+        self.store = store or create_cache_store()
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self._flights = {}
+
+        self.coalesced = 0
+
+    def make_key(self, game_name, source):
+        return f"{self.prefix}{source}:{normalize_game_name(game_name)}"
+
+    def get(self, game_name, source):
+        """取得單一平台的快取結果，不存在或已過期時回傳 None"""
+        return self.store.get(self.make_key(game_name, source))
+
+    def set(self, game_name, source, listings):
+        """寫入單一平台的搜尋結果"""
+        self.store.set(self.make_key(game_name, source), listings)
+
+    def touch(self, game_name, source):
+        """延長單一平台快取的有效期限（結果沒有變化時使用），項目不存在時回傳 False"""
+        try:
+            return self.store.touch(self.make_key(game_name, source))
+        except Exception as e:
+            logger.warning(f"更新快取期限失敗: {e}")
+            return False
+
+    def invalidate(self, game_name, source=None):
+        """清除指定遊戲（或其中一個平台）的快取"""
+        sources = [source] if source else list(Config.PLATFORMS)
+        for code in sources:
+            self.store.delete(self.make_key(game_name, code))
+
+    def clear(self):
+        self.store.clear()
+
+    def iter_results(self, game_name, sources, fetch):
+        """依序產出各平台的 (平台代碼, 結果列表, 狀態, 是否來自快取)
+
+        fetch(game_name, sources) 需產出 (平台代碼, 結果列表, 狀態)，
+        例如 GamePriceScraper.iter_platform_results。只有快取中沒有、
+        且沒有其他請求正在爬取的平台會交給 fetch。
+        """
+        def fetch_tasks(tasks):
+            for source, listings, status in fetch(game_name, [source for _, source in tasks]):
+                yield game_name, source, listings, status
+
+        for _, source, listings, status, cached in self.iter_batch_results(
+                [(game_name, source) for source in sources], fetch_tasks):
+            yield source, listings, status, cached
+
+    def iter_batch_results(self, tasks, fetch):
+        """批次版本的 iter_results：tasks 為 (遊戲名稱, 平台代碼) 列表，
+        依序產出 (遊戲名稱, 平台代碼, 結果列表, 狀態, 是否來自快取)
+
+        fetch(tasks) 需產出 (遊戲名稱, 平台代碼, 結果列表, 狀態)，例如
+        GamePriceScraper.iter_batch_results。正規化後相同的遊戲名稱只會爬取一次。
+
+        self._lock 只保護進行中搜尋的對照表；讀寫 store 時不持有鎖，較慢的
+        SQLite / Redis 存取不會阻塞其他請求與等待結果的請求。
+        """
+        keys = [self.make_key(game_name, source) for game_name, source in tasks]
+        stored = [self.store.get(key) for key in keys]
+
+        cached = []
+        owned = {}
+        waiting = []
+
+        with self._lock:
+            for (game_name, source), key, listings in zip(tasks, keys, stored):
+                if listings is not None:
+                    cache_requests.inc(source, 'hit')
+                    cached.append((game_name, source, listings))
+                    continue
+
+                flight = self._flights.get(key)
+                if flight is not None:
+                    if key not in owned:
+                        self.coalesced += 1
+                    cache_requests.inc(source, 'coalesced')
+                    waiting.append((game_name, source, flight))
+                else:
+                    flight = _Flight()
+                    self._flights[key] = flight
+                    owned[key] = (game_name, source, flight)
+
+        # 讀取 store 之後、取得鎖之前，其他請求可能剛完成同一個搜尋並寫入 store
+        # （寫入 store 後才移除進行中的搜尋），因此再讀取一次，避免重複爬取
+        for key, (game_name, source, flight) in list(owned.items()):
+            listings = self.store.get(key)
+            if listings is None:
+                cache_requests.inc(source, 'miss')
+                continue
+            del owned[key]
+            cache_requests.inc(source, 'hit')
+            cached.append((game_name, source, listings))
+            self._release(key, flight, listings, 'ok')
+
+        for game_name, source, listings in cached:
+            yield game_name, source, listings, 'ok', True
+
+        if owned:
+            try:
+                for game_name, source, listings, status in fetch(
+                        [(game_name, source) for game_name, source, _ in owned.values()]):
+                    key = self.make_key(game_name, source)
+                    entry = owned.pop(key, None)
+                    if entry is None:
+                        continue
+                    self._land(key, entry[2], listings, status)
+                    yield game_name, source, listings, status, False
+            finally:
+                # fetch 未回報的項目（例如產生器被提前關閉）也要通知等待者
+                for key, (_, _, flight) in owned.items():
+                    self._land(key, flight, [], 'error')
+
+        if waiting:
+            logger.info(f"{'、'.join(source for _, source, _ in waiting)} 已有相同的搜尋進行中，等待其結果")
+        for game_name, source, flight in waiting:
+            if not flight.event.wait(Config.SEARCH_DEADLINE):
+                yield game_name, source, [], 'timeout', False
+                continue
+            yield game_name, source, list(flight.listings), flight.status, False
+
+    def get_or_fetch(self, game_name, sources, fetch):
+        """回傳 {平台代碼: 結果列表}，只包含成功取得結果的平台"""
+        results = {}
+        for source, listings, status, _ in self.iter_results(game_name, sources, fetch):
+            if status == 'ok':
+                results[source] = listings
+        return results
+
+    def stats(self):
+        stats = self.store.stats()
+        with self._lock:
+            stats['in_flight'] = len(self._flights)
+            stats['coalesced'] = self.coalesced
+        return stats
+
+    def _land(self, key, flight, listings, status):
+        if status == 'ok':
+            try:
+                self.store.set(key, listings)
+            except Exception as e:
+                logger.error(f"寫入快取失敗: {e}")
+        self._release(key, flight, listings, status)
+
+    def _release(self, key, flight, listings, status):
+        """移除進行中的搜尋並通知等待者（不存取 store）"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.listings = listings
+        flight.status = status
+        flight.event.set()
+
+
+class AsyncSearchCache:
+    """SearchCache 的非同步介面，供 asgi.py 與 AsyncGamePriceScraper 使用
+
+    與 SearchCache 共用同一個 store 與快取鍵；存取 store 在執行緒中進行，
+    不阻塞事件迴圈。同一個事件迴圈內相同 (遊戲, 平台) 的並行請求以
+    asyncio.Future 共用一次爬取。
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._flights = {}
+
+    async def iter_results(self, game_name, sources, fetch):
+        """SearchCache.iter_results 的非同步版本，fetch 為非同步產生器函數，
+        例如 AsyncGamePriceScraper.aiter_platform_results"""
+        async def fetch_tasks(tasks):
+            async for source, listings, status in fetch(game_name, [source for _, source in tasks]):
+                yield game_name, source, listings, status
+
+        async for _, source, listings, status, cached in self.iter_batch_results(
+                [(game_name, source) for source in sources], fetch_tasks):
+            yield source, listings, status, cached
+
+    async def iter_batch_results(self, tasks, fetch):
+        """SearchCache.iter_batch_results 的非同步版本，fetch 為非同步產生器函數，
+        例如 AsyncGamePriceScraper.aiter_batch_results"""
+        keys = [self.cache.make_key(game_name, source) for game_name, source in tasks]
+        stored = await asyncio.to_thread(lambda: [self.cache.store.get(key) for key in keys])
+
+        loop = asyncio.get_running_loop()
+        cached = []
+        owned = {}
+        waiting = []
+        for (game_name, source), key, listings in zip(tasks, keys, stored):
+            if listings is not None:
+                cache_requests.inc(source, 'hit')
+                cached.append((game_name, source, listings))
+                continue
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                if key not in owned:
+                    with self.cache._lock:
+                        self.cache.coalesced += 1
+                cache_requests.inc(source, 'coalesced')
+                waiting.append((game_name, source, flight))
+            else:
+                cache_requests.inc(source, 'miss')
+                flight = loop.create_future()
+                self._flights[key] = flight
+                owned[key] = (game_name, source, flight)
+
+        for game_name, source, listings in cached:
+            yield game_name, source, listings, 'ok', True
+
+        if owned:
+            try:
+                async for game_name, source, listings, status in fetch(
+                        [(game_name, source) for game_name, source, _ in owned.values()]):
+                    key = self.cache.make_key(game_name, source)
+                    entry = owned.pop(key, None)
+                    if entry is None:
+                        continue
+                    if status == 'ok':
+                        await asyncio.to_thread(self._store, key, listings)
+                    self._land(key, entry[2], listings, status)
+                    yield game_name, source, listings, status, False
+            finally:
+                # fetch 未回報的項目（例如產生器被提前關閉）也要通知等待者
+                for key, (_, _, flight) in owned.items():
+                    self._land(key, flight, [], 'error')
+
+        for game_name, source, flight in waiting:
+            try:
+                listings, status = await asyncio.wait_for(asyncio.shield(flight), Config.SEARCH_DEADLINE)
+            except asyncio.TimeoutError:
+                yield game_name, source, [], 'timeout', False
+                continue
+            yield game_name, source, list(listings), status, False
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['async_in_flight'] = len(self._flights)
+        return stats
+
+    def _store(self, key, listings):
+        try:
+            self.cache.store.set(key, listings)
+        except Exception as e:
+            logger.error(f"寫入快取失敗: {e}")
+
+    def _land(self, key, flight, listings, status):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.done():
+            flight.set_result((listings, status))
@@ -0,0 +1,299 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from config import Config
+from models import GameListing, listing_to_row
+from serialize import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+def encode_listings(listings):
+    """將結果列表序列化為壓縮的 JSON 陣列（每筆只存欄位值，不重複欄位名稱）"""
+    return zlib.compress(dumps([listing_to_row(listing) for listing in listings]))
+
+
+def decode_listings(blob):
+    return [GameListing(*row) for row in loads(zlib.decompress(blob))]
+
+
+class CacheStore:
+    """快取儲存後端的共同介面，key 為字串、value 為 GameListing 列表"""
+
+    backend = 'base'
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, key):
+        """回傳未過期的結果列表，不存在或讀取失敗時回傳 None"""
+        try:
+            listings = self._get(key)
+        except Exception as e:
+            logger.warning(f"讀取快取失敗 ({self.backend}): {e}")
+            listings = None
+        with self._counter_lock:
+            if listings is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return listings
+
+    def set(self, key, listings):
+        raise NotImplementedError
+
+    def touch(self, key):
+        """延長項目的有效期限而不重寫內容，項目不存在時回傳 False"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def size(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'entries': self.size(),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _get(self, key):
+        raise NotImplementedError
+
+
+class MemoryStore(CacheStore):
+    """程序內的 LRU 快取，超過 max_entries 時淘汰最久未使用的項目"""
+
+    backend = 'memory'
+
+    def __init__(self, timeout, max_entries):
+        super().__init__(timeout)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, listings = entry
+            if time.monotonic() - stored_at > self.timeout:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(listings)
+
+    def set(self, key, listings):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), list(listings))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            self._entries[key] = (time.monotonic(), entry[1])
+            self._entries.move_to_end(key)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteStore(CacheStore):
+    """以 SQLite 檔案儲存的快取，同一台機器上的所有 gunicorn worker 共用
+
+    使用 WAL 模式讓多個程序可同時讀取；每個執行緒各自持有連線。
+    過期項目會在寫入時定期清除，並與 MemoryStore 相同，淘汰最久未使用
+    （依最後讀取或寫入的時間）的項目，保留最多 max_entries 筆。
+
+    讀取時只在最後使用時間已超過 ACCESS_RESOLUTION × 快取時間才更新，
+    熱門項目的讀取大多不需要寫入，不會因寫入鎖而互相等待。
+    """
+
+    backend = 'sqlite'
+    PURGE_EVERY = 100  # 每寫入幾次清除一次過期項目
+    ACCESS_RESOLUTION = 0.1  # 最後使用時間的精度（快取時間的比例）
+
+    def __init__(self, path, timeout, max_entries):
+        super().__init__(timeout)
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS search_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' expires_at REAL NOT NULL,'
+                ' value BLOB NOT NULL,'
+                ' accessed_at REAL NOT NULL DEFAULT 0)'
+            )
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(search_cache)')}
+            if 'accessed_at' not in columns:
+                # 舊版建立的資料表沒有最後使用時間
+                conn.execute('ALTER TABLE search_cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_cache (expires_at)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache (accessed_at)'
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # SQLite 連線不能跨 fork 使用（gunicorn preload_app 時 store 在 master 程序建立）
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, key):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value, accessed_at FROM search_cache WHERE key = ? AND expires_at > ?',
+            (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        value, accessed_at = row
+        if now - accessed_at >= self.timeout * self.ACCESS_RESOLUTION:
+            conn.execute('UPDATE search_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return decode_listings(value)
+
+    def set(self, key, listings):
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO search_cache (key, expires_at, value, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, now + self.timeout, encode_listings(listings), now)
+        )
+        with self._counter_lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def touch(self, key):
+        now = time.time()
+        cursor = self._connection().execute(
+            'UPDATE search_cache SET expires_at = ?, accessed_at = ? WHERE key = ?',
+            (now + self.timeout, now, key)
+        )
+        return cursor.rowcount > 0
+
+    def purge(self):
+        """清除過期項目，並只保留最近使用的 max_entries 筆"""
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM search_cache WHERE expires_at <= ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM search_cache WHERE key NOT IN ('
+                ' SELECT key FROM search_cache ORDER BY accessed_at DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM search_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM search_cache')
+
+    def size(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM search_cache WHERE expires_at > ?', (time.time(),)
+        ).fetchone()[0]
+
+
+class RedisStore(CacheStore):
+    """Redis 協定的快取後端
+
+    client 可傳入任何提供 get/setex/expire/delete/scan_iter 的物件（例如測試用的
+    fakeredis）；未提供時以 url 建立 redis.Redis 連線，需另外安裝 redis 套件。
+    """
+
+    backend = 'redis'
+
+    def __init__(self, timeout, url=None, client=None, prefix='game-price:'):
+        super().__init__(timeout)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('使用 Redis 快取需要安裝 redis 套件: pip install redis')
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _get(self, key):
+        blob = self.client.get(self.prefix + key)
+        if blob is None:
+            return None
+        return decode_listings(blob)
+
+    def set(self, key, listings):
+        self.client.setex(self.prefix + key, int(self.timeout), encode_listings(listings))
+
+    def touch(self, key):
+        return bool(self.client.expire(self.prefix + key, int(self.timeout)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+def create_cache_store(backend=None, timeout=None):
+    """依 Config.CACHE_BACKEND 建立快取後端"""
+    backend = backend or Config.CACHE_BACKEND
+    timeout = Config.CACHE_TIMEOUT if timeout is None else timeout
+    if hasattr(timeout, 'total_seconds'):
+        timeout = timeout.total_seconds()
+
+    if backend == 'memory':
+        return MemoryStore(timeout, Config.CACHE_MAX_ENTRIES)
+    if backend == 'sqlite':
+        return SQLiteStore(Config.CACHE_PATH, timeout, Config.CACHE_MAX_ENTRIES)
+    if backend == 'redis':
+        return RedisStore(timeout, url=Config.CACHE_REDIS_URL)
+    raise ValueError(f'不支援的快取後端: {backend}')
@@ -0,0 +1,112 @@
+import re
+import unicodedata
+from bisect import bisect_right
+
+UNKNOWN_PLATFORM = '未知平台'
+
+# (平台, 關鍵字)；關鍵字中的空白可對應任意數量的空白（含沒有空白）
+PLATFORM_KEYWORDS = [
+    ('Nintendo Switch', ['nintendo switch', 'switch', 'nsw', 'ns', '任天堂switch']),
+    ('PlayStation 5', ['playstation 5', 'play station 5', 'ps5', 'ps 5']),
+    ('PlayStation 4', ['playstation 4', 'play station 4', 'ps4', 'ps 4']),
+    ('Xbox Series X/S', ['xbox series x', 'xbox series s', 'xbox series', 'xsx', 'xss']),
+    ('Xbox One', ['xbox one', 'xbone']),
+    ('PC', ['pc', 'steam', '電腦版']),
+]
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _keyword_pattern(keyword):
+    # 關鍵字之間只允許換行以外的空白：classify_many 以換行分隔各標題，
+    # 符合的範圍不可跨到下一個標題
+    pattern = r'[^\S\n]*'.join(re.escape(part) for part in keyword.split())
+    # 英數字關鍵字前後不可緊接英數字，避免 "ns" 符合 "bonus"、"pc" 符合 "pchome"；
+    # 中文字不算，"NS薩爾達" 仍可辨識
+    if keyword[0].isascii() and keyword[0].isalnum():
+        pattern = r'(?<![a-z0-9])' + pattern
+    if keyword[-1].isascii() and keyword[-1].isalnum():
+        pattern += r'(?![a-z0-9])'
+    return pattern
+
+
+class PlatformClassifier:
+    """以單一預先編譯的正規表示式辨識商品標題的遊戲平台
+
+    - 所有關鍵字合併為一個 alternation，較長的關鍵字優先（"xbox series x" 先於 "xbox"）
+    - 英數字關鍵字需符合字詞邊界
+    - 標題提到多個平台時（例如 "PS4 艾爾登法環 可升級PS5"），以最早出現的平台為準，
+      不受關鍵字表的順序影響
+    """
+
+    def __init__(self, platform_keywords=None, unknown=UNKNOWN_PLATFORM):
+        self.unknown = unknown
+        self._platforms = {}
+        keywords = []
+        for platform, platform_words in platform_keywords or PLATFORM_KEYWORDS:
+            for keyword in platform_words:
+                keyword = keyword.lower()
+                self._platforms.setdefault(_SPACE_RE.sub('', keyword), platform)
+                keywords.append(keyword)
+
+        keywords.sort(key=len, reverse=True)
+        # 先以 lookahead 檢查關鍵字的首字，讓不可能符合的位置立即跳過
+        first_chars = ''.join(sorted({keyword[0] for keyword in keywords}))
+        self._pattern = re.compile(
+            f'(?=[{re.escape(first_chars)}])(?:'
+            + '|'.join(_keyword_pattern(keyword) for keyword in keywords)
+            + ')'
+        )
+
+    def _platform_of(self, match):
+        return self._platforms[_SPACE_RE.sub('', match.group())]
+
+    def classify(self, title):
+        """回傳單一標題的平台，無法辨識時回傳 unknown"""
+        match = self._pattern.search(_normalize(title))
+        return self._platform_of(match) if match else self.unknown
+
+    def classify_many(self, titles):
+        """一次辨識多個標題，回傳與 titles 相同順序的平台列表
+
+        所有標題先合併成一個字串，只呼叫一次正規表示式掃描，
+        再依每個符合的位置對應回原本的標題。
+        """
+        titles = list(titles)
+        results = [self.unknown] * len(titles)
+        if not titles:
+            return results
+
+        normalized = [_normalize(title) for title in titles]
+        starts = []
+        offset = 0
+        for line in normalized:
+            starts.append(offset)
+            offset += len(line) + 1
+        starts.append(offset)
+        text = '\n'.join(normalized)
+        search = self._pattern.search
+        match = search(text)
+        while match:
+            index = bisect_right(starts, match.start()) - 1
+            results[index] = self._platform_of(match)
+            # 每個標題只取最早出現的平台，直接跳到下一個標題繼續掃描
+            match = search(text, starts[index + 1])
+        return results
+
+
+def _normalize(title):
+    # 標題內的換行視為空白，單一標題與批次辨識的結果一致
+    return unicodedata.normalize('NFKC', title or '').lower().replace('\n', ' ')
+
+
+# 匯入時建立一次，整個程序共用
+platform_classifier = PlatformClassifier()
+
+
+def classify_platform(title):
+    return platform_classifier.classify(title)
+
+
+def classify_platforms(titles):
+    return platform_classifier.classify_many(titles)
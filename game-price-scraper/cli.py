@@ -0,0 +1,356 @@
+"""命令列批次爬取：由檔案或標準輸入讀取遊戲名稱，將各平台的刊登串流寫入 JSONL、CSV 或 Parquet
+
+    python cli.py titles.txt -o prices.jsonl
+    python cli.py titles.txt -o prices.csv --sources ruten,yahoo --workers 8
+    cat titles.txt | python cli.py -o prices.parquet --resume
+
+- 每行一個遊戲名稱，空白行與 # 開頭的行會被略過，重複的名稱只搜尋一次
+- 以 GamePriceScraper.iter_batch_results 執行，同時進行的搜尋不超過 --workers，
+  每個主機仍受各平台的限速器與並行數限制
+- 每個 (遊戲, 平台) 完成後立即寫出（同一平台內去重、過濾異常價格並按價格排序），
+  記憶體只保留目前這一批遊戲名稱，不保留已寫出的刊登
+- 成功的 (遊戲, 平台) 在寫出後記錄到檢查點檔案；中斷後以 --resume 接續，只搜尋
+  尚未成功的項目。寫出與檢查點之間中斷時，該項目的刊登可能重複一次
+- 結束時（包含 Ctrl-C 中斷）輸出吞吐量與各平台的錯誤率
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from config import Config
+from models import LISTING_FIELDS, listing_to_row
+from scraper import GamePriceScraper
+from serialize import dumps, loads
+from sources import SOURCE_REGISTRY, get_enabled_sources
+
+logger = logging.getLogger(__name__)
+
+# 輸出的欄位：遊戲名稱、平台代碼、刊登欄位、爬取時間
+OUTPUT_FIELDS = ('game_name', 'source_code') + LISTING_FIELDS + ('scraped_at',)
+
+FORMATS = ('jsonl', 'csv', 'parquet')
+
+
+def read_titles(stream):
+    """讀取遊戲名稱，略過空白行、註解與重複的名稱"""
+    seen = set()
+    for line in stream:
+        title = line.strip()
+        if not title or title.startswith('#') or title in seen:
+            continue
+        seen.add(title)
+        yield title
+
+
+def listing_rows(game_name, code, listings, scraped_at):
+    return [(game_name, code) + listing_to_row(listing) + (scraped_at,) for listing in listings]
+
+
+class JsonlWriter:
+    """每筆刊登一行 JSON，寫入後立即 flush"""
+
+    def __init__(self, path, append=False):
+        self.file = sys.stdout.buffer if path == '-' else open(path, 'ab' if append else 'wb')
+
+    def write(self, rows):
+        """寫出刊登，回傳資料是否已寫入檔案（可記錄到檢查點）"""
+        for row in rows:
+            self.file.write(dumps(dict(zip(OUTPUT_FIELDS, row)), newline=True))
+        self.file.flush()
+        return True
+
+    def close(self):
+        self.file.flush()
+        if self.file is not sys.stdout.buffer:
+            self.file.close()
+
+
+class CsvWriter:
+    """UTF-8 CSV（含 BOM 讓 Excel 正確顯示中文），接續寫入時不重複標題列"""
+
+    def __init__(self, path, append=False):
+        if path == '-':
+            self.file = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+            write_header = True
+        else:
+            write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+            self.file = open(path, 'a' if append else 'w', encoding='utf-8-sig' if write_header else 'utf-8',
+                             newline='')
+        self.writer = csv.writer(self.file)
+        if write_header:
+            self.writer.writerow(OUTPUT_FIELDS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+        return True
+
+    def close(self):
+        self.file.flush()
+        if isinstance(self.file, io.TextIOWrapper) and self.file.buffer is sys.stdout.buffer:
+            self.file.detach()
+        else:
+            self.file.close()
+
+
+class ParquetWriter:
+    """Parquet（需安裝 pyarrow），每累積 row_group_size 筆寫出一個 row group
+
+    Parquet 檔案無法附加內容，接續寫入時另外寫到 <檔名>.<序號>.parquet。
+    """
+
+    def __init__(self, path, append=False, row_group_size=5000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('Parquet 輸出需要安裝 pyarrow: pip install pyarrow')
+        if path == '-':
+            raise RuntimeError('Parquet 輸出需要指定檔案路徑')
+
+        if append and os.path.exists(path):
+            stem, extension = os.path.splitext(path)
+            part = 1
+            while os.path.exists(f'{stem}.{part}{extension}'):
+                part += 1
+            path = f'{stem}.{part}{extension}'
+        self.path = path
+        self.pa = pa
+        self.schema = pa.schema([
+            (field, pa.int64() if field == 'price' else pa.string()) for field in OUTPUT_FIELDS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) < self.row_group_size:
+            return False
+        self.flush()
+        return True
+
+    def flush(self):
+        if not self.rows:
+            return
+        columns = list(zip(*self.rows))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter, 'parquet': ParquetWriter}
+
+
+class Checkpoint:
+    """記錄已成功寫出的 (遊戲, 平台)，每行一個 JSON"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done = set()
+        if resume and os.path.exists(path):
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except ValueError:
+                        continue  # 中斷時寫到一半的最後一行
+                    self.done.add((entry['game_name'], entry['source']))
+        self.file = open(path, 'ab' if resume else 'wb')
+        self.pending = []
+
+    def __contains__(self, task):
+        return task in self.done
+
+    def add(self, game_name, source, listings):
+        """登記已寫給輸出的項目，commit() 時才寫入檢查點"""
+        self.pending.append((game_name, source, listings))
+
+    def commit(self):
+        for game_name, source, listings in self.pending:
+            self.file.write(dumps({'game_name': game_name, 'source': source, 'listings': listings}, newline=True))
+            self.done.add((game_name, source))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = []
+
+    def close(self):
+        self.file.close()
+
+
+class Report:
+    """統計吞吐量與各平台的結果"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.titles = set()
+        self.listings = 0
+        self.skipped = 0
+        self.statuses = defaultdict(Counter)  # 平台代碼 -> 狀態 -> 次數
+
+    def record(self, game_name, code, status, listings):
+        self.titles.add(game_name)
+        self.listings += listings
+        if status == 'ok' and not listings:
+            status = 'empty'
+        self.statuses[code][status] += 1
+
+    def to_dict(self):
+        elapsed = time.monotonic() - self.started
+        searches = sum(sum(counts.values()) for counts in self.statuses.values())
+        sources = {}
+        for code, counts in sorted(self.statuses.items()):
+            total = sum(counts.values())
+            failed = counts['error'] + counts['timeout'] + counts['skipped']
+            sources[code] = dict(counts, total=total, error_rate=round(failed / total, 4) if total else 0.0)
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'titles': len(self.titles),
+            'searches': searches,
+            'resumed': self.skipped,
+            'listings': self.listings,
+            'searches_per_second': round(searches / elapsed, 2) if elapsed else 0.0,
+            'listings_per_second': round(self.listings / elapsed, 2) if elapsed else 0.0,
+            'sources': sources,
+        }
+
+    def print(self, stream=sys.stderr):
+        report = self.to_dict()
+        print(
+            f"\n完成 {report['titles']} 個遊戲、{report['searches']} 次搜尋（略過 {report['resumed']} 次已完成），"
+            f"寫出 {report['listings']} 筆刊登，耗時 {report['elapsed_seconds']} 秒",
+            file=stream
+        )
+        print(
+            f"吞吐量: {report['searches_per_second']} 次搜尋/秒，{report['listings_per_second']} 筆刊登/秒",
+            file=stream
+        )
+        header = f"{'平台':<10}{'ok':>7}{'empty':>7}{'error':>7}{'timeout':>9}{'skipped':>9}{'錯誤率':>9}"
+        print(header, file=stream)
+        for code, counts in report['sources'].items():
+            print(
+                f"{code:<10}{counts.get('ok', 0):>7}{counts.get('empty', 0):>7}{counts.get('error', 0):>7}"
+                f"{counts.get('timeout', 0):>9}{counts.get('skipped', 0):>9}{counts['error_rate']:>10.1%}",
+                file=stream
+            )
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(titles, writer, checkpoint, report, sources=None, workers=None, chunk_size=100, deep=False):
+    scraper = GamePriceScraper(deep=deep)
+    for chunk in chunks(titles, chunk_size):
+        tasks = []
+        for task in scraper.batch_tasks(chunk, sources):
+            if task in checkpoint:
+                report.skipped += 1
+            else:
+                tasks.append(task)
+
+        for game_name, code, listings, status in scraper.iter_batch_results(tasks, workers):
+            scraped_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            listings = scraper.deduplicate_listings(listings)
+            report.record(game_name, code, status, len(listings))
+            if status != 'ok':
+                continue
+            checkpoint.add(game_name, code, len(listings))
+            if writer.write(listing_rows(game_name, code, listings, scraped_at)):
+                checkpoint.commit()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', nargs='?', default='-', help='遊戲名稱檔案，每行一個（預設為標準輸入）')
+    parser.add_argument('-o', '--output', required=True, help='輸出檔案（- 為標準輸出，僅限 jsonl / csv）')
+    parser.add_argument('-f', '--format', choices=FORMATS, help='輸出格式，預設依副檔名判斷')
+    parser.add_argument('--sources', help='只搜尋這些平台代碼，以逗號分隔')
+    parser.add_argument('--workers', type=int, default=Config.BATCH_MAX_WORKERS, help='同時進行的搜尋數')
+    parser.add_argument('--chunk-size', type=int, default=100, help='每批派發的遊戲數')
+    parser.add_argument('--deep', action='store_true', help='深度搜尋（讀取多頁結果）')
+    parser.add_argument('--checkpoint', help='檢查點檔案，預設為 <輸出檔案>.checkpoint')
+    parser.add_argument('--resume', action='store_true', help='由檢查點接續，略過已成功的項目並附加到輸出檔案')
+    parser.add_argument('--report', help='另外將統計結果以 JSON 寫到此檔案')
+    parser.add_argument('-v', '--verbose', action='store_true', help='輸出各平台的搜尋日誌')
+    args = parser.parse_args(argv)
+
+    if args.format is None:
+        extension = os.path.splitext(args.output)[1].lstrip('.').lower()
+        args.format = {'ndjson': 'jsonl', 'json': 'jsonl', 'pq': 'parquet'}.get(extension, extension)
+        if args.format not in FORMATS:
+            parser.error('無法由副檔名判斷輸出格式，請以 --format 指定')
+    if args.sources:
+        args.sources = [code.strip() for code in args.sources.split(',') if code.strip()]
+        unknown = [code for code in args.sources if code not in SOURCE_REGISTRY]
+        if unknown:
+            parser.error(f"不支援的平台: {', '.join(unknown)}")
+    if args.checkpoint is None:
+        if args.output == '-':
+            parser.error('輸出到標準輸出時需以 --checkpoint 指定檢查點檔案')
+        args.checkpoint = args.output + '.checkpoint'
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+    if not get_enabled_sources(args.sources):
+        print('沒有可搜尋的平台', file=sys.stderr)
+        return 2
+
+    try:
+        writer = WRITERS[args.format](args.output, append=args.resume)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    report = Report()
+
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    status = 0
+    try:
+        run(read_titles(stream), writer, checkpoint, report, args.sources, args.workers, args.chunk_size, args.deep)
+    except KeyboardInterrupt:
+        print('\n已中斷，可加上 --resume 接續', file=sys.stderr)
+        status = 130
+    finally:
+        writer.close()
+        checkpoint.commit()
+        checkpoint.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    report.print()
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
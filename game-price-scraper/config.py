@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -10,19 +11,152 @@ class Config:
     # 爬蟲設定
     REQUEST_TIMEOUT = 30  # 請求超時時間（秒）
     MAX_RETRIES = 3      # 最大重試次數
-    RETRY_DELAY = 2      # 重試延遲時間（秒）
+    RETRY_DELAY = 2      # 重試延遲時間（秒），之後每次重試加倍並加入隨機抖動
+    CIRCUIT_FAILURE_THRESHOLD = 5  # 平台連續失敗幾次後暫停搜尋該平台
+    CIRCUIT_COOLDOWN = 120         # 暫停搜尋的冷卻時間（秒）
+    
+    # 並行搜尋設定
+    CONCURRENT_SEARCH = True  # 是否並行搜尋各平台
+    SOURCE_TIMEOUT = 20       # 單一平台搜尋時限（秒），自該平台的搜尋實際開始執行時起算
+    # 個別平台的搜尋時限，格式為 "平台代碼=秒數,..."（例如 "shopee=25"），未列出的平台使用 SOURCE_TIMEOUT
+    SOURCE_TIMEOUTS = {
+        code.strip(): float(seconds)
+        for code, _, seconds in (item.partition('=') for item in os.environ.get('SOURCE_TIMEOUTS', 'shopee=25').split(','))
+        if seconds.strip()
+    }
+    SEARCH_DEADLINE = 30      # 整體搜尋時限（秒），時限到時合併已完成的結果
+    
+    # 批次搜尋設定
+    BATCH_MAX_TITLES = 500        # 單次批次搜尋最多的遊戲數
+    BATCH_MAX_WORKERS = 16        # 批次搜尋同時進行的 (遊戲, 平台) 搜尋數
+    BATCH_HOST_CONCURRENCY = 4    # 每個主機同時進行的搜尋數（瀏覽器平台另受 WebDriver 池限制）
+    
+    # HTTP 連線池設定
+    HTTP_POOL_CONNECTIONS = 10  # 保留連線池的主機數
+    HTTP_POOL_MAXSIZE = 10      # 每個主機最多保留的 keep-alive 連線數
+    HTTP2_ENABLED = os.environ.get('HTTP2_ENABLED', 'True').lower() == 'true'  # 非同步傳輸層是否使用 HTTP/2
     
     # Selenium 設定
     SELENIUM_TIMEOUT = 10        # Selenium 等待超時時間
     SELENIUM_IMPLICIT_WAIT = 5   # 隱式等待時間
     
+    # WebDriver 池設定
+    WEBDRIVER_POOL_SIZE = int(os.environ.get('WEBDRIVER_POOL_SIZE', 2))        # 每個程序最多同時開啟的瀏覽器數
+    WEBDRIVER_POOL_PREWARM = int(os.environ.get('WEBDRIVER_POOL_PREWARM', 1))  # 啟動時預熱的瀏覽器數
+    WEBDRIVER_MAX_USES = 50            # 瀏覽器使用幾次後回收重建
+    WEBDRIVER_CHECKOUT_TIMEOUT = 15    # 等待可用瀏覽器的時限（秒）
+    WEBDRIVER_BLOCK_RESOURCES = os.environ.get('WEBDRIVER_BLOCK_RESOURCES', 'True').lower() == 'true'  # 不載入圖片、字型與 CSS
+    
+    # 蝦皮擷取方式：'api' 攔截頁面的搜尋 API 回應（取不到時改由 DOM 擷取）；'dom' 只從 DOM 擷取
+    SHOPEE_EXTRACTION = os.environ.get('SHOPEE_EXTRACTION', 'api').lower()
+    
     # 搜尋限制
     MAX_RESULTS_PER_PLATFORM = 10  # 每個平台最大結果數
     MIN_PRICE_FILTER = 10          # 最低價格過濾
     MAX_PRICE_FILTER = 50000       # 最高價格過濾
     
+    # 深度搜尋設定（請求帶 "deep": true 時讀取多頁結果，只保留各平台最便宜的結果）
+    DEEP_SEARCH_MAX_PAGES = int(os.environ.get('DEEP_SEARCH_MAX_PAGES', 5))       # 每個平台最多讀取的頁數
+    DEEP_SEARCH_BUDGET = float(os.environ.get('DEEP_SEARCH_BUDGET', 8))           # 每個平台翻頁的時限（秒），另受 SOURCE_TIMEOUT 限制
+    DEEP_SEARCH_PAGE_CONCURRENCY = 2   # 同一平台同時讀取的頁數（仍受該平台的限速）
+    DEEP_SEARCH_PAGE_RESULTS = 60      # 每頁最多解析的結果數
+    DEEP_SEARCH_TOP_N = 20             # 每個平台保留的最低價結果數；依價格排序的平台取得足夠結果後即停止翻頁
+    DEEP_SEARCH_WORKERS = 8            # 同步搜尋時讀取後續頁面的執行緒數（整個程序共用）
+    
+    # 相似商品分群設定
+    DEDUP_SIMILARITY = 0.5      # 標題 Jaccard 相似度達此值視為同一商品
+    MINHASH_PERMUTATIONS = 96   # MinHash 簽章長度
+    MINHASH_BANDS = 32          # LSH 分段數（每段 MINHASH_PERMUTATIONS / MINHASH_BANDS 個值）
+    
     # 快取設定
     CACHE_TIMEOUT = timedelta(minutes=30)  # 快取超時時間
+    CACHE_MAX_ENTRIES = 2000               # 快取最多保存的 (遊戲, 平台) 項目數
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'sqlite')  # sqlite / memory / redis
+    CACHE_PATH = os.environ.get('CACHE_PATH') or os.path.join(
+        tempfile.gettempdir(), 'game-price-scraper', 'search_cache.sqlite3'
+    )
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # 結果集設定（/results 以預先索引的搜尋結果篩選、排序與分頁，不重新爬取）
+    RESULT_SET_MAX_ENTRIES = 256   # 每個程序保留的結果集數
+    RESULT_SET_TTL = 300           # 結果集保留的秒數，之後由搜尋快取重新建立
+    RESULTS_PAGE_SIZE = 20         # /results 預設每頁的結果數
+    RESULTS_MAX_PAGE_SIZE = 100    # /results 每頁最多的結果數
+    
+    # 價格歷史設定（記錄每次爬取到的刊登，供 /api/history 查詢）
+    HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', 'True').lower() == 'true'
+    HISTORY_PATH = os.environ.get('HISTORY_PATH') or os.path.join(
+        tempfile.gettempdir(), 'game-price-scraper', 'price_history.sqlite3'
+    )
+    HISTORY_MAX_DAYS = 365  # 查詢的最長時間區間（天）
+    
+    # 搜尋建議設定（/api/suggest 與搜尋名稱正規化，見 suggest.py）
+    SUGGEST_CANONICALIZE = os.environ.get('SUGGEST_CANONICALIZE', 'True').lower() == 'true'  # 搜尋前將別名換成標準名稱
+    SUGGEST_LIMIT = 8                # /api/suggest 預設的建議數
+    SUGGEST_MAX_LIMIT = 20           # /api/suggest 最多的建議數
+    SUGGEST_MAX_ENTRIES = 5000       # 索引最多的項目數（不含別名表）
+    SUGGEST_MAX_CANDIDATES = 200     # 前綴相符時最多檢查的項目數
+    SUGGEST_MIN_SIMILARITY = 0.5     # 部分相符的項目至少需含查詢中此比例的 n-gram（見 suggest.ngrams）
+    SUGGEST_MIN_CLUSTER_SIZE = 2     # 商品標題至少出現在幾筆刊登才加入索引
+    SUGGEST_TITLES_PER_SEARCH = 5    # 每次搜尋最多加入的商品標題數
+    SUGGEST_MAX_TITLE_LENGTH = 40    # 加入索引的商品標題最長字數
+    GAME_ALIASES_PATH = os.environ.get('GAME_ALIASES_PATH')  # 額外的別名表（JSON：{"標準名稱": ["別名", ...]}）
+    
+    # 遊戲名稱的別名表：別名（中英文名稱、簡稱）搜尋時換成標準名稱，共用同一組快取
+    GAME_ALIASES = {
+        '薩爾達傳說 王國之淚': ['王國之淚', '薩爾達 王國之淚', 'zelda tears of the kingdom',
+                          'the legend of zelda tears of the kingdom', 'tears of the kingdom', 'totk'],
+        '薩爾達傳說 曠野之息': ['曠野之息', '薩爾達 曠野之息', 'zelda breath of the wild',
+                          'the legend of zelda breath of the wild', 'breath of the wild', 'botw'],
+        '薩爾達傳說': ['薩爾達', 'zelda', 'the legend of zelda'],
+        '超級瑪利歐兄弟 驚奇': ['瑪利歐 驚奇', '瑪利歐兄弟 驚奇', 'super mario bros wonder', 'mario wonder'],
+        '瑪利歐賽車 8 豪華版': ['瑪利歐賽車 8', 'mario kart 8 deluxe', 'mario kart 8', 'mk8dx'],
+        '瑪利歐': ['馬力歐', '瑪莉歐', 'mario', 'super mario'],
+        '寶可夢 朱紫': ['寶可夢 朱', '寶可夢 紫', 'pokemon scarlet violet', 'pokemon scarlet', 'pokemon violet'],
+        '寶可夢': ['精靈寶可夢', '神奇寶貝', 'pokemon', 'pokémon'],
+        '集合啦！動物森友會': ['動物森友會', '動森', 'animal crossing', 'animal crossing new horizons'],
+        '斯普拉遁 3': ['splatoon 3'],
+        'FIFA 24': ['ea sports fc 24'],
+        '戰神 諸神黃昏': ['god of war ragnarok'],
+        '戰神': ['god of war'],
+        '最後生還者': ['the last of us', 'last of us'],
+        '血源詛咒': ['bloodborne'],
+        '艾爾登法環': ['老頭環', 'elden ring'],
+        '魔物獵人 崛起': ['monster hunter rise', 'mh rise'],
+        '魔物獵人': ['monster hunter'],
+    }
+    
+    # 匯入 app.py 時是否啟動背景工作（瀏覽器預熱、價格追蹤排程）；gunicorn.conf.py
+    # 以 preload_app 啟動時設為 False，改在每個 worker fork 後啟動
+    START_BACKGROUND_TASKS = os.environ.get('START_BACKGROUND_TASKS', 'True').lower() == 'true'
+    
+    # 價格追蹤排程設定（在背景定期更新熱門遊戲的快取）
+    WATCH_ENABLED = os.environ.get('WATCH_ENABLED', 'False').lower() == 'true'
+    WATCHLIST = [name.strip() for name in os.environ.get('WATCHLIST', '').split(',') if name.strip()]
+    WATCH_POPULAR_THRESHOLD = 3    # 搜尋幾次後自動加入追蹤清單
+    WATCH_MAX_TITLES = 200         # 追蹤清單最多的遊戲數
+    WATCH_DEFAULT_INTERVAL = 600   # 新項目的更新間隔（秒）
+    WATCH_MIN_INTERVAL = 300       # 價格經常變動的項目最短更新間隔（秒）
+    WATCH_MAX_INTERVAL = 1500      # 價格沒有變動的項目最長更新間隔（秒），需小於 CACHE_TIMEOUT
+    WATCH_BACKOFF = 1.5            # 結果沒有變動時間隔乘以此倍數
+    WATCH_BATCH_SIZE = 100         # 每輪最多更新的 (遊戲, 平台) 數
+    WATCH_TICK = 5                 # 排程檢查的最短間隔（秒）
+    WATCH_POLL_INTERVAL = 30       # 排程重新讀取追蹤清單的最長間隔（秒），其他 worker 加入的遊戲最晚在此時間內開始更新
+    WATCH_FLUSH_INTERVAL = 5       # 各 worker 寫入累計的搜尋次數、並重新嘗試接手排程的間隔（秒）
+    WATCH_SEARCH_TTL = 7 * 86400   # 超過此時間（秒）沒被搜尋、也不在追蹤清單中的遊戲不保留搜尋次數
+    WATCH_LOCK_PATH = os.path.join(tempfile.gettempdir(), 'game-price-scraper', 'price_watch.lock')
+    # 追蹤清單、搜尋次數與排程的 SQLite 檔案，同一台機器上的所有 worker 共用
+    WATCH_PATH = os.environ.get('WATCH_PATH') or os.path.join(
+        tempfile.gettempdir(), 'game-price-scraper', 'price_watch.sqlite3'
+    )
+    
+    # 監控設定：/metrics 提供 Prometheus 指標；開啟 TRACE_REQUESTS（或 debug 模式）時，
+    # /search 的回應會附上該請求各階段的耗時（trace 欄位）
+    TRACE_REQUESTS = os.environ.get('TRACE_REQUESTS', 'False').lower() == 'true'
+    # 多個 worker 共用的指標目錄：各 worker 將計數寫入此目錄，/metrics 輸出所有 worker 的總和
+    # （gunicorn.conf.py 預設設定並在啟動時清空；未設定時 /metrics 只輸出回應的程序）
+    METRICS_DIR = os.environ.get('METRICS_DIR') or None
+    METRICS_FLUSH_INTERVAL = 5  # 各 worker 寫入指標的間隔（秒）
     
     # User Agent 池
     USER_AGENTS = [
@@ -33,6 +167,14 @@ class Config:
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0'
     ]
     
+    # 覆寫各平台搜尋網址的前綴，格式為「平台代碼=網址」並以逗號分隔，
+    # 例如 ruten=http://127.0.0.1:8900/ruten（見 benchmarks/fake_marketplace.py）
+    SOURCE_BASE_URLS = {
+        code.strip(): url.strip()
+        for code, _, url in (item.partition('=') for item in os.environ.get('SOURCE_BASE_URLS', '').split(','))
+        if url.strip()
+    }
+    
     # 平台設定
     PLATFORMS = {
         'ruten': {
@@ -88,6 +230,9 @@ class TestingConfig(Config):
     # 測試環境設定
     REQUEST_TIMEOUT = 10
     MAX_RESULTS_PER_PLATFORM = 2
+    WEBDRIVER_POOL_PREWARM = 0
+    WATCH_ENABLED = False
+    HISTORY_ENABLED = False
 
 # 配置映射
 config_map = {
@@ -0,0 +1,251 @@
+import hashlib
+import random
+import re
+import statistics
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List
+
+from config import Config
+from models import GameListing
+
+_MASK64 = (1 << 64) - 1
+# MinHasher 快取的 shingle 數與 shingle 集合數（每筆約 num_perm 個整數）
+_PERMUTED_CACHE_SIZE = 8192
+_SIGNATURE_CACHE_SIZE = 4096
+
+# 標題中與商品本身無關的平台、狀態與促銷字眼，比對前先移除
+# 英數字縮寫前後不可緊接英數字（中文字不算），避免誤刪 "dns"、"ps4pro" 之類的詞
+_NOISE_RE = re.compile(
+    r'nintendo\s*switch|switch|任天堂|playstation\s*[45]|play\s*station\s*[45]|'
+    r'xbox\s*series\s*[xs]|xbox\s*one|xbox|'
+    r'(?<![a-z0-9])(?:nsw|ns|ps[45]|ps|xs[xs]|pc)(?![a-z0-9])|'
+    r'中文版|中英文版|中英日版|日文版|英文版|繁體中文|繁中|亞版|港版|日版|美版|'
+    r'二手|全新|現貨|免運費?|正版|盒裝|實體版?|遊戲片|光碟|卡帶'
+)
+_PUNCT_RE = re.compile(r'[^\w\s]|_')
+_SPACE_RE = re.compile(r'\s+')
+# 連續的中日韓文字、或由英數字組成的詞
+_TOKEN_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]+|[a-z0-9]+')
+_CJK_RE = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+
+@lru_cache(maxsize=65536)
+def normalize_title(title):
+    """正規化商品標題：全形轉半形、轉小寫、移除標點及平台 / 狀態等雜訊字眼"""
+    text = unicodedata.normalize('NFKC', title or '').lower()
+    text = _PUNCT_RE.sub(' ', text)
+    text = _NOISE_RE.sub(' ', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+@lru_cache(maxsize=65536)
+def title_shingles(title):
+    """將標題切成 shingle：中文取連續兩字（單字詞取單字），英數字取整個詞
+
+    回傳 64 位元雜湊值的 frozenset，供 Jaccard 相似度與 MinHash 使用。
+    """
+    shingles = set()
+    for token in _TOKEN_RE.findall(normalize_title(title)):
+        if _CJK_RE.match(token) and len(token) > 1:
+            shingles.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            shingles.add(token)
+    return frozenset(_hash64(shingle) for shingle in shingles)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """以 multiply-shift 雜湊模擬 num_perm 個排列的 MinHash
+
+    兩個集合的簽章中相同位置數值相等的比例，即為其 Jaccard 相似度的估計值。
+
+    商品標題的 shingle 重複率很高（同一遊戲的各種寫法共用大部分的字），
+    因此快取每個 shingle 在各排列下的雜湊值，以及每個 shingle 集合的簽章；
+    簽章只需對快取的雜湊值逐位置取最小值（zip + min 在 C 中執行）。
+    """
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.getrandbits(64) | 1, rng.getrandbits(64))
+            for _ in range(num_perm)
+        ]
+        self._permuted = lru_cache(maxsize=_PERMUTED_CACHE_SIZE)(self._permute)
+        self.signature = lru_cache(maxsize=_SIGNATURE_CACHE_SIZE)(self._signature)
+
+    def _permute(self, shingle):
+        """單一 shingle 在各排列下的雜湊值"""
+        return tuple((a * shingle + b) & _MASK64 for a, b in self._params)
+
+    def _signature(self, shingles):
+        if not shingles:
+            return (0,) * self.num_perm
+        return tuple(map(min, zip(*map(self._permuted, shingles))))
+
+
+@dataclass
+class ListingCluster:
+    """同一商品的一群刊登（不同賣家、不同平台的相似標題）"""
+    title: str
+    platform: str
+    listings: List[GameListing] = field(default_factory=list)
+
+    @property
+    def count(self):
+        return len(self.listings)
+
+    @property
+    def min_price(self):
+        return min(listing.price for listing in self.listings)
+
+    @property
+    def max_price(self):
+        return max(listing.price for listing in self.listings)
+
+    @property
+    def median_price(self):
+        return round(statistics.median(listing.price for listing in self.listings))
+
+
+def listing_key(listing):
+    """同一筆刊登的識別鍵：優先使用網址，沒有網址時才用來源、標題、價格與賣家"""
+    if listing.url:
+        return listing.url.split('#', 1)[0].rstrip('/')
+    return (listing.source, listing.title, listing.price, listing.seller)
+
+
+def dedupe_listings(listings):
+    """移除重複出現的同一筆刊登（例如重試或多次分頁取得同一項目），保留先出現者
+
+    標題相同但網址不同的刊登視為不同商品，不會被合併；相似商品的分群見 cluster_listings。
+    """
+    seen = set()
+    unique = []
+    for listing in listings:
+        key = listing_key(listing)
+        if key not in seen:
+            seen.add(key)
+            unique.append(listing)
+    return unique
+
+
+class _DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # 以較小的索引為根，讓分群順序與輸入順序一致
+            if root_j < root_i:
+                root_i, root_j = root_j, root_i
+            self.parent[root_j] = root_i
+
+
+# 每筆刊登與 bucket 中同一群的刊登最多比較幾筆（取最近加入的）
+_MAX_COMPARISONS = 8
+
+_hashers = {}
+
+
+def _get_hasher(num_perm):
+    hasher = _hashers.get(num_perm)
+    if hasher is None:
+        hasher = _hashers[num_perm] = MinHasher(num_perm)
+    return hasher
+
+
+def cluster_listings(listings, threshold=None, num_perm=None, bands=None):
+    """將刊登依商品分群，回傳依最低價排序的 ListingCluster 列表
+
+    以 MinHash + LSH 分段找出候選配對（每筆刊登只和落在相同 bucket 的刊登比較，
+    不需兩兩比對），再以實際的 Jaccard 相似度確認是否達到 threshold。
+    只有偵測到相同遊戲平台的刊登才會分在同一群。
+    """
+    threshold = Config.DEDUP_SIMILARITY if threshold is None else threshold
+    num_perm = num_perm or Config.MINHASH_PERMUTATIONS
+    bands = bands or Config.MINHASH_BANDS
+    rows = num_perm // bands
+    hasher = _get_hasher(num_perm)
+
+    # 平台與標題 shingle 完全相同的刊登直接視為同一個節點，只對不同的節點做 LSH
+    nodes = {}
+    node_of = []
+    empty = set()
+    for listing in listings:
+        shingles = title_shingles(listing.title)
+        if shingles:
+            node = (listing.platform, shingles)
+        else:
+            # 標題沒有可比對的字詞（例如只有標點或表情符號），無法判斷是否為同一商品，
+            # 每筆刊登各自成為一個節點（同一網址仍是同一節點），不與其他刊登合併
+            node = (listing.platform, shingles, listing_key(listing))
+        index = nodes.setdefault(node, len(nodes))
+        if not shingles:
+            empty.add(index)
+        node_of.append(index)
+    nodes = list(nodes)
+
+    # 每個遊戲平台各有 bands 個 bucket 表，以該段簽章為鍵
+    buckets = {}
+    band_slices = [slice(band * rows, (band + 1) * rows) for band in range(bands)]
+    groups = _DisjointSet(len(nodes))
+    find = groups.find
+    for i, (platform, shingles, *_) in enumerate(nodes):
+        if i in empty:
+            continue
+        signature = hasher.signature(shingles)
+        tables = buckets.get(platform)
+        if tables is None:
+            tables = buckets[platform] = [{} for _ in band_slices]
+        root = i
+        checked = set()
+        for table, band_slice in zip(tables, band_slices):
+            # bucket 內的節點依所屬的群分組，已在同一群的整組略過
+            bucket = table.setdefault(signature[band_slice], {})
+            for members in bucket.values():
+                if find(members[0]) == root:
+                    continue
+                for j in members[-_MAX_COMPARISONS:]:
+                    if j in checked:
+                        continue
+                    checked.add(j)
+                    if jaccard(shingles, nodes[j][1]) >= threshold:
+                        groups.union(i, j)
+                        root = find(i)
+                        break
+            bucket.setdefault(root, []).append(i)
+
+    clusters = {}
+    for listing, node in zip(listings, node_of):
+        root = groups.find(node)
+        cluster = clusters.get(root)
+        if cluster is None:
+            cluster = clusters[root] = ListingCluster(title=listing.title, platform=listing.platform)
+        cluster.listings.append(listing)
+
+    result = list(clusters.values())
+    for cluster in result:
+        cluster.listings.sort(key=lambda listing: listing.price)
+        cluster.title = cluster.listings[0].title
+    result.sort(key=lambda cluster: cluster.min_price)
+    return result
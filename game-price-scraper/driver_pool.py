@@ -0,0 +1,330 @@
+import importlib
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import Config
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+class WebDriverPoolTimeout(Exception):
+    """在時限內無法取得可用的 WebDriver"""
+
+
+def is_browser_failure(error):
+    """例外是否表示瀏覽器已崩潰或連線中斷（Selenium 的 WebDriverException）
+
+    等待搜尋結果逾時（TimeoutException）時瀏覽器仍可使用，不視為失敗。
+    """
+    # 有借出的瀏覽器時 Selenium 必定已匯入
+    exceptions = sys.modules.get('selenium.common.exceptions')
+    if exceptions is None:
+        return False
+    return (isinstance(error, exceptions.WebDriverException)
+            and not isinstance(error, exceptions.TimeoutException))
+
+
+class _PooledDriver:
+    """池中的 WebDriver 及其使用紀錄"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class WebDriverPool:
+    """可在多執行緒間共用的 WebDriver 池
+
+    - 以 checkout()/checkin() 借出與歸還瀏覽器，或使用 with pool.driver() as driver
+    - 池的大小上限為 max_size，借不到時最多等待 checkout_timeout 秒
+    - 歸還時會清除 cookies 與 storage；重設失敗（瀏覽器已崩潰）的實例會被丟棄
+    - with 區塊中拋出 WebDriverException 時，該實例視為已損壞並直接丟棄
+    - 使用超過 max_uses 次的實例會被回收並於下次需要時重新建立
+    """
+
+    def __init__(self, factory, max_size=2, max_uses=50, checkout_timeout=30):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+
+        self._lock = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+
+        # 統計資料
+        self._created = 0
+        self._recycled = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def prewarm(self, count=None):
+        """預先啟動瀏覽器，回傳實際建立的數量"""
+        count = self.max_size if count is None else min(count, self.max_size)
+        created = 0
+        while True:
+            with self._lock:
+                if self._closed or self._size >= count:
+                    break
+                self._size += 1
+            try:
+                pooled = self._create()
+            except Exception as e:
+                logger.error(f"預熱 WebDriver 失敗: {e}")
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                break
+            with self._lock:
+                self._idle.append(pooled)
+                self._lock.notify()
+            created += 1
+        if created:
+            logger.info(f"已預熱 {created} 個 WebDriver")
+        return created
+
+    def checkout(self, timeout=None):
+        """借出一個 WebDriver，必要時建立新實例或等待其他執行緒歸還"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError('WebDriver 池已關閉')
+                if self._idle:
+                    pooled = self._idle.popleft()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise WebDriverPoolTimeout(f'等待 WebDriver 超過 {timeout} 秒')
+                waited = True
+                self._lock.wait(remaining)
+
+        if pooled is None:
+            try:
+                pooled = self._create()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+
+        with self._lock:
+            pooled.uses += 1
+            self._in_use[id(pooled.driver)] = pooled
+            self._checkouts += 1
+            self._record_wait(time.monotonic() - start, waited=waited)
+        return pooled.driver
+
+    def checkin(self, driver, broken=False):
+        """歸還 WebDriver；broken 為 True 或重設失敗時會丟棄該實例"""
+        with self._lock:
+            pooled = self._in_use.pop(id(driver), None)
+        if pooled is None:
+            logger.warning('歸還了不屬於此池的 WebDriver')
+            return
+
+        if broken:
+            self._discard(pooled)
+            return
+        if pooled.uses >= self.max_uses:
+            with self._lock:
+                self._recycled += 1
+            self._discard(pooled, reason=f'已使用 {pooled.uses} 次')
+            return
+        if not self._reset(pooled.driver):
+            self._discard(pooled, reason='重設失敗')
+            return
+
+        with self._lock:
+            if not self._closed:
+                self._idle.append(pooled)
+                self._lock.notify()
+                return
+        self._discard(pooled)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """借出 WebDriver 的 context manager，離開時自動歸還"""
+        with stage('browser_checkout'):
+            driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception as e:
+            broken = is_browser_failure(e)
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def stats(self):
+        """回傳池的大小與等待時間統計"""
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'created': self._created,
+                'recycled': self._recycled,
+                'discarded': self._discarded,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'avg_wait_seconds': round(self._total_wait / self._checkouts, 4) if self._checkouts else 0.0,
+                'max_wait_seconds': round(self._max_wait, 4),
+            }
+
+    def close(self):
+        """關閉池中所有閒置的瀏覽器，借出中的實例會在歸還時關閉"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._lock.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def _create(self):
+        with stage('browser_launch'):
+            driver = self.factory()
+        if driver is None:
+            raise RuntimeError('WebDriver 建立失敗')
+        with self._lock:
+            self._created += 1
+        return _PooledDriver(driver)
+
+    def _reset(self, driver):
+        """清除瀏覽器狀態，讓下一個請求不受前一次搜尋影響"""
+        try:
+            driver.delete_all_cookies()
+            driver.execute_script(
+                'try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}'
+            )
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logger.warning(f"重設 WebDriver 失敗: {e}")
+            return False
+
+    def _discard(self, pooled, reason=None):
+        if reason:
+            logger.info(f"回收 WebDriver ({reason})")
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"關閉 WebDriver 時發生錯誤: {e}")
+        with self._lock:
+            self._size -= 1
+            self._discarded += 1
+            self._lock.notify()
+
+    def _record_wait(self, elapsed, waited):
+        if waited:
+            self._waits += 1
+        self._total_wait += elapsed
+        self._max_wait = max(self._max_wait, elapsed)
+
+
+# 不需要的資源：只讀取頁面資料，不需要繪製畫面
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.css', '*.css?*',
+]
+
+
+def block_resources(driver):
+    """以 Chrome DevTools Protocol 阻擋圖片、字型與 CSS 的請求"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logger.warning(f"設定資源阻擋失敗: {e}")
+
+
+# 瀏覽器平台使用的 Selenium 模組
+SELENIUM_MODULES = (
+    'selenium.webdriver',
+    'selenium.webdriver.chrome.options',
+    'selenium.webdriver.support.ui',
+    'selenium.common.exceptions',
+)
+
+
+def preload_selenium():
+    """預先匯入 Selenium
+
+    Selenium 平時在第一次建立瀏覽器時才匯入，不使用蝦皮的程序不需負擔匯入時間；
+    gunicorn 以 preload_app 啟動時在 master 程序呼叫（見 gunicorn.conf.py），
+    讓各 worker 以 copy-on-write 共用已匯入的模組。
+    """
+    for name in SELENIUM_MODULES:
+        importlib.import_module(name)
+
+
+def create_chrome_driver(user_agent=None):
+    """建立無頭 Chrome WebDriver"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    # DOMContentLoaded 後即返回，搜尋結果改由各平台明確等待
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument(f'--user-agent={user_agent or random.choice(Config.USER_AGENTS)}')
+    if Config.WEBDRIVER_BLOCK_RESOURCES:
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    if Config.WEBDRIVER_BLOCK_RESOURCES:
+        block_resources(driver)
+    return driver
+
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """取得整個程序共用的 WebDriver 池"""
+    global _driver_pool
+    if _driver_pool is None:
+        with _driver_pool_lock:
+            if _driver_pool is None:
+                _driver_pool = WebDriverPool(
+                    create_chrome_driver,
+                    max_size=Config.WEBDRIVER_POOL_SIZE,
+                    max_uses=Config.WEBDRIVER_MAX_USES,
+                    checkout_timeout=Config.WEBDRIVER_CHECKOUT_TIMEOUT
+                )
+    return _driver_pool
@@ -0,0 +1,54 @@
+"""gunicorn 設定：在 master 程序預先載入應用程式，worker 以 fork 複製
+
+    gunicorn -c gunicorn.conf.py app:app
+
+- preload_app：Flask、requests、lxml 與平台轉接器只在 master 匯入一次，worker 以
+  copy-on-write 共用，啟動與自動擴展時新 worker 不需重新匯入
+- 啟用蝦皮時 Selenium 也在 master 預先匯入（見 driver_pool.preload_selenium）
+- 瀏覽器預熱與價格追蹤排程的執行緒在每個 worker fork 後才啟動（post_fork）
+- 各 worker 的指標寫入 METRICS_DIR，/metrics 輸出所有 worker 的總和；目錄在啟動時
+  清空，結束的 worker 的數值合併到 archive.json，重啟 worker 不會讓計數歸零
+"""
+import os
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+# 匯入 app.py 時不啟動背景工作，改由 post_fork 在各 worker 中啟動
+os.environ['START_BACKGROUND_TASKS'] = 'False'
+# 需在匯入 app.py（Config）之前設定
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'game-price-scraper', 'metrics'))
+
+
+def on_starting(server):
+    from metrics import clear_snapshots
+
+    os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+    clear_snapshots(os.environ['METRICS_DIR'])
+
+
+def when_ready(server):
+    """應用程式已在 master 載入，fork worker 之前預先匯入瀏覽器平台的模組"""
+    from config import Config
+
+    if Config.PLATFORMS['shopee']['enabled']:
+        from driver_pool import preload_selenium
+
+        preload_selenium()
+        server.log.info('已預先匯入 Selenium')
+
+
+def post_fork(server, worker):
+    from app import start_background_tasks
+
+    start_background_tasks()
+
+
+def child_exit(server, worker):
+    from metrics import archive_snapshot
+
+    archive_snapshot(os.environ['METRICS_DIR'], worker.pid)
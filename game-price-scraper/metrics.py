@@ -0,0 +1,389 @@
+import bisect
+import atexit
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 各階段耗時的直方圖桶（秒），涵蓋解析的毫秒級到瀏覽器搜尋的數十秒
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不減的計數器，以標籤值的 tuple 區分各序列"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def snapshot(self):
+        """回傳 {標籤值 tuple: 值} 的複本"""
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(total, values):
+        for label_values, value in values.items():
+            total[label_values] = total.get(label_values, 0) + value
+
+    def samples(self, values=None):
+        values = self.snapshot() if values is None else values
+        for label_values, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """固定桶的直方圖，輸出 Prometheus 的 _bucket / _sum / _count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # 標籤值 -> [各桶次數..., 總和, 次數]
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        """回傳 {標籤值 tuple: [各桶次數..., 總和, 次數]} 的複本"""
+        with self._lock:
+            return {label_values: list(series) for label_values, series in self._series.items()}
+
+    @staticmethod
+    def merge(total, values):
+        for label_values, series in values.items():
+            merged = total.get(label_values)
+            if merged is None:
+                total[label_values] = list(series)
+            elif len(merged) == len(series):
+                total[label_values] = [a + b for a, b in zip(merged, series)]
+
+    def samples(self, values=None):
+        values = self.snapshot() if values is None else values
+        for label_values, series in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield self.name + '_bucket' + _format_labels(
+                    self.labels, label_values, [('le', _format_value(float(bound)))]
+                ), cumulative
+            yield self.name + '_bucket' + _format_labels(self.labels, label_values, [('le', '+Inf')]), series[-1]
+            yield self.name + '_sum' + _format_labels(self.labels, label_values), series[-2]
+            yield self.name + '_count' + _format_labels(self.labels, label_values), series[-1]
+
+
+class Gauge:
+    """在輸出時才呼叫 collect() 取得目前值的量測，collect 回傳 {標籤值 tuple: 值}"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def samples(self, values=None):
+        try:
+            values = self.collect() if self.collect else {}
+        except Exception:
+            values = {}
+        for label_values, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labels, label_values), value
+
+
+class Registry:
+    """指標的集合
+
+    directory 為 None 時只輸出本程序的數值。設定 directory（Config.METRICS_DIR）時，
+    各程序定期將計數器與直方圖的數值寫入 directory/<pid>.json，render() 合併目錄中
+    所有檔案，任一個 gunicorn worker 回應的 /metrics 都是所有 worker 的總和，
+    worker 重新啟動也不會讓計數歸零。Gauge 在輸出時才取值，只反映回應的程序。
+    """
+
+    ARCHIVE = 'archive.json'  # 已結束的程序合併後的數值
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._writer = None
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=STAGE_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, labels=(), collect=None):
+        return self.register(Gauge(name, documentation, labels, collect))
+
+    def render(self):
+        """輸出 Prometheus 文字格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        merged = self._merged_snapshots() if self.directory else {}
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(
+                f'{sample} {_format_value(value)}'
+                for sample, value in metric.samples(merged.get(metric.name))
+            )
+        return '\n'.join(lines) + '\n'
+
+    # 多程序共用
+
+    def snapshot(self):
+        """本程序計數器與直方圖的數值 {指標名稱: {標籤值 tuple: 值}}"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics if hasattr(metric, 'snapshot')}
+
+    def write_snapshot(self):
+        """將本程序的數值寫入 directory/<pid>.json（先寫暫存檔再取代，讀取端不會讀到一半的檔案）"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        _write_json(path, self.snapshot())
+
+    def start_snapshot_writer(self, interval=None):
+        """在背景每 interval 秒寫入一次本程序的數值，程序結束時再寫入一次（需在 fork 後呼叫）"""
+        if not self.directory or self._writer is not None:
+            return
+        interval = interval or Config.METRICS_FLUSH_INTERVAL
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except Exception as e:
+                    logger.warning(f"寫入指標失敗: {e}")
+
+        self._writer = threading.Thread(target=run, name='metrics-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.write_snapshot)
+
+    def _merged_snapshots(self):
+        # 先寫入本程序的最新數值，回應 /metrics 的 worker 不會少算
+        self.write_snapshot()
+        with self._lock:
+            metrics = dict(self._metrics)
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            for name, values in _read_snapshot(path).items():
+                metric = metrics.get(name)
+                if metric is not None and hasattr(metric, 'merge'):
+                    metric.merge(merged.setdefault(name, {}), values)
+        return merged
+
+
+def _write_json(path, snapshot):
+    payload = {
+        name: [[list(label_values), value] for label_values, value in values.items()]
+        for name, values in snapshot.items()
+    }
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {
+        name: {tuple(label_values): value for label_values, value in values}
+        for name, values in payload.items()
+    }
+
+
+def archive_snapshot(directory, pid):
+    """將已結束程序的數值合併到 archive.json 並刪除其檔案，讓目錄中的檔案數不隨 worker 重啟增加
+
+    只能在單一程序中呼叫（gunicorn master 的 child_exit）。
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive_path = os.path.join(directory, Registry.ARCHIVE)
+    archive = _read_snapshot(archive_path)
+    for name, values in _read_snapshot(path).items():
+        total = archive.setdefault(name, {})
+        for label_values, value in values.items():
+            if isinstance(value, list):
+                Histogram.merge(total, {label_values: value})
+            else:
+                Counter.merge(total, {label_values: value})
+    _write_json(archive_path, archive)
+    os.remove(path)
+
+
+def clear_snapshots(directory):
+    """刪除目錄中所有程序的數值（gunicorn master 啟動時呼叫，不沿用上次執行的計數）"""
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
+
+
+# 整個程序共用的指標；設定 Config.METRICS_DIR 時合併所有 worker 的數值
+REGISTRY = Registry(Config.METRICS_DIR)
+
+stage_seconds = REGISTRY.histogram(
+    'scraper_stage_seconds', '搜尋各階段的耗時（秒）', ('stage', 'source')
+)
+source_results = REGISTRY.counter(
+    'scraper_source_results_total', '各平台搜尋的結果（ok / empty / error / timeout / skipped）', ('source', 'status')
+)
+source_listings = REGISTRY.counter(
+    'scraper_source_listings_total', '各平台取得的刊登數', ('source',)
+)
+cache_requests = REGISTRY.counter(
+    'search_cache_requests_total', '搜尋快取的查詢結果（hit / miss / coalesced）', ('source', 'result')
+)
+transport_seconds = REGISTRY.histogram(
+    'transport_phase_seconds', 'HTTP 連線各階段的耗時（connect / tls / ttfb）', ('host', 'phase')
+)
+http_requests = REGISTRY.counter(
+    'http_requests_total', 'HTTP 請求數', ('endpoint', 'method', 'status')
+)
+http_request_seconds = REGISTRY.histogram(
+    'http_request_seconds', 'HTTP 請求到送出完整回應的耗時（秒）', ('endpoint',)
+)
+
+
+def record_source_result(source, status, listings):
+    """記錄單一平台的搜尋結果，成功但沒有結果的記為 'empty'"""
+    if status == 'ok' and not listings:
+        status = 'empty'
+    source_results.inc(source, status)
+    if listings:
+        source_listings.inc(source, amount=len(listings))
+
+
+# 請求追蹤：debug 模式或 Config.TRACE_REQUESTS 時，記錄單一請求各階段的耗時
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """單一請求的各階段耗時，多個搜尋執行緒可同時寫入"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans = []
+
+    def add(self, stage, source, started, elapsed):
+        with self._lock:
+            self.spans.append((stage, source, started - self.started, elapsed))
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span[2])
+        totals = {}
+        for stage, _, _, elapsed in spans:
+            totals[stage] = totals.get(stage, 0.0) + elapsed
+        return {
+            'elapsed_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'totals_ms': {stage: round(elapsed * 1000, 2) for stage, elapsed in totals.items()},
+            'spans': [
+                {
+                    'stage': stage,
+                    'source': source or None,
+                    'start_ms': round(start * 1000, 2),
+                    'ms': round(elapsed * 1000, 2),
+                }
+                for stage, source, start, elapsed in spans
+            ],
+        }
+
+
+@contextmanager
+def tracing(trace):
+    """在此區塊內（包含以 copy_context 派發的執行緒）將各階段耗時記錄到 trace，trace 為 None 時不記錄"""
+    if trace is None:
+        yield None
+        return
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def stage(name, source=''):
+    """計時一個搜尋階段，寫入 scraper_stage_seconds 與目前的請求追蹤"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, name, source)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, source, started, elapsed)
@@ -0,0 +1,39 @@
+import sys
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from typing import Optional
+
+# Python 3.10 以上使用 __slots__，每筆刊登不再各自帶一個 __dict__
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
+class GameListing:
+    title: str
+    price: int
+    platform: str
+    condition: str
+    seller: str
+    location: str
+    url: str
+    source: str
+    posted_time: Optional[str] = None
+    seller_rating: Optional[str] = None
+
+    def __post_init__(self):
+        # 重複出現的短字串（平台、狀態、來源、預設賣家與地區）共用同一個物件
+        self.platform = _intern(self.platform)
+        self.condition = _intern(self.condition)
+        self.seller = _intern(self.seller)
+        self.location = _intern(self.location)
+        self.source = _intern(self.source)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+LISTING_FIELDS = tuple(field.name for field in fields(GameListing))
+
+# 依欄位順序取出所有欄位值的 tuple，比 dataclasses.astuple 少了遞迴複製
+listing_to_row = attrgetter(*LISTING_FIELDS)
@@ -0,0 +1,220 @@
+import io
+import logging
+import re
+
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def parse_price(price_text):
+    """從價格文字中提取數字"""
+    if not price_text:
+        return 0
+    price_str = _NON_DIGIT_RE.sub('', str(price_text))
+    return int(price_str) if price_str else 0
+
+
+def _sniff_encoding(content):
+    """從 <meta charset> 判斷編碼，找不到時使用 UTF-8"""
+    match = _CHARSET_RE.search(content[:4096])
+    return match.group(1).decode('ascii').lower() if match else 'utf-8'
+
+
+def _class_xpath(tag, class_name):
+    """產生等同 BeautifulSoup find(tag, class_=...) 的 XPath"""
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+def _compile(paths):
+    """預先編譯一組依序嘗試的 XPath，每個只取第一個符合的元素"""
+    return [etree.XPath(f'({path})[1]') for path in paths]
+
+
+def _first(element, xpaths):
+    for xpath in xpaths:
+        found = xpath(element)
+        if found:
+            return found[0]
+    return None
+
+
+def _text(element):
+    """等同 BeautifulSoup get_text(strip=True)"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+class ListingParser:
+    """以 lxml 增量解析搜尋結果頁
+
+    - 使用 iterparse 逐段解析，只對商品容器的標籤產生事件，
+      每個商品項目解析完成後立即擷取欄位並釋放子樹
+    - 取得 limit 個有效項目後立即停止，不再解析頁面其餘部分
+    - item_classes 為主要的商品容器 (tag, class)；只有整頁都找不到主要容器時，
+      才使用 fallback_classes 找到的項目（與舊版 find_all(...) or find_all(...) 相同）
+    - 位於主要容器內的備用容器不視為商品；巢狀在其他容器中的元素不釋放子樹，
+      由最外層的容器擷取完成後一併釋放，避免外層的標題、價格被提前清除
+    """
+
+    def __init__(self, item_classes, fallback_classes, title_paths, price_paths,
+                 base_url, seller_paths=(), url_from_title=False):
+        self.item_classes = set(item_classes)
+        self.fallback_classes = set(fallback_classes)
+        self.item_tags = sorted({tag for tag, _ in self.item_classes | self.fallback_classes})
+        self.base_url = base_url
+        self.url_from_title = url_from_title
+
+        self._title = _compile(title_paths)
+        self._price = _compile(price_paths)
+        self._seller = _compile(seller_paths)
+        self._link = _compile(['.//a'])
+
+    def parse(self, content, limit):
+        """回傳最多 limit 個 dict(title, price, url, seller)，略過缺少標題或價格的項目"""
+        if not content:
+            return []
+
+        items = []
+        fallback_items = []
+
+        events = etree.iterparse(
+            io.BytesIO(content),
+            events=('end',),
+            tag=self.item_tags,
+            html=True,
+            recover=True,
+            no_network=True,
+            encoding=_sniff_encoding(content)
+        )
+        try:
+            for _, element in events:
+                kind = self._item_kind(element)
+                if kind is None or (kind == 'fallback' and (items or len(fallback_items) >= limit)):
+                    continue
+                ancestor_kinds = self._ancestor_kinds(element)
+                if kind == 'item':
+                    target = items
+                elif 'item' not in ancestor_kinds:
+                    target = fallback_items
+                else:
+                    continue
+
+                try:
+                    item = self._extract(element)
+                except Exception as e:
+                    logger.warning(f"解析商品項目時發生錯誤: {e}")
+                    item = None
+                if item:
+                    target.append(item)
+                    if len(items) >= limit:
+                        break
+
+                # 已擷取的商品子樹不再需要，釋放記憶體（外層容器尚未結束時保留）
+                if not ancestor_kinds:
+                    element.clear(keep_tail=True)
+        except etree.XMLSyntaxError as e:
+            logger.warning(f"解析頁面時發生錯誤: {e}")
+
+        return items or fallback_items
+
+    def _item_kind(self, element):
+        """回傳元素為主要容器 ('item')、備用容器 ('fallback') 或都不是 (None)"""
+        classes = element.get('class', '').split()
+        tag = element.tag
+        if any((tag, name) in self.item_classes for name in classes):
+            return 'item'
+        if any((tag, name) in self.fallback_classes for name in classes):
+            return 'fallback'
+        return None
+
+    def _ancestor_kinds(self, element):
+        """回傳元素外層的商品容器種類（見 _item_kind）"""
+        kinds = set()
+        for ancestor in element.iterancestors(*self.item_tags):
+            kind = self._item_kind(ancestor)
+            if kind is not None:
+                kinds.add(kind)
+        return kinds
+
+    def _extract(self, element):
+        title_elem = _first(element, self._title)
+        if title_elem is None:
+            return None
+        title = _text(title_elem)
+
+        price_elem = _first(element, self._price)
+        if price_elem is None:
+            return None
+        price = parse_price(_text(price_elem))
+        if price == 0:
+            return None
+
+        link_elem = title_elem if self.url_from_title else _first(element, self._link)
+        url = link_elem.get('href', '') if link_elem is not None else ''
+        if url and not url.startswith('http'):
+            url = self.base_url + url
+
+        seller_elem = _first(element, self._seller) if self._seller else None
+        seller = _text(seller_elem) if seller_elem is not None else None
+
+        return {'title': title, 'price': price, 'url': url, 'seller': seller}
+
+
+RUTEN_PARSER = ListingParser(
+    item_classes=[('div', 'rt-item')],
+    fallback_classes=[('div', 'item')],
+    title_paths=[_class_xpath('a', 'rt-item-title'), './/h3'],
+    price_paths=[_class_xpath('b', 'rt-item-price'), _class_xpath('span', 'price')],
+    seller_paths=[_class_xpath('span', 'rt-item-seller')],
+    base_url='https://www.ruten.com.tw',
+    url_from_title=True
+)
+
+YAHOO_PARSER = ListingParser(
+    item_classes=[('li', 'BaseGridItem')],
+    fallback_classes=[('div', 'srp-item')],
+    title_paths=['.//h3', _class_xpath('a', 'product-name')],
+    price_paths=[_class_xpath('span', 'price'), _class_xpath('em', 'price')],
+    base_url='https://tw.bid.yahoo.com'
+)
+
+PCHOME_PARSER = ListingParser(
+    item_classes=[('div', 'prod_item')],
+    fallback_classes=[('li', 'item')],
+    title_paths=['.//h5', _class_xpath('a', 'prod_name')],
+    price_paths=[_class_xpath('b', 'price'), _class_xpath('span', 'price')],
+    base_url='https://24h.pchome.com.tw'
+)
+
+
+# 蝦皮搜尋 API 的價格以 1/100000 元為單位
+_SHOPEE_PRICE_SCALE = 100000
+
+
+def parse_shopee_search(data, limit=None):
+    """解析蝦皮搜尋 API（/api/v4/search/search_items）的 JSON 回應
+
+    回傳與 ListingParser 相同格式的項目字典（另含 location），價格為 0 的項目會被略過。
+    """
+    results = []
+    for entry in (data or {}).get('items') or []:
+        item = entry.get('item_basic') or entry
+        title = (item.get('name') or '').strip()
+        price = (item.get('price') or item.get('price_min') or 0) // _SHOPEE_PRICE_SCALE
+        shop_id = item.get('shopid') or entry.get('shopid')
+        item_id = item.get('itemid') or entry.get('itemid')
+        if not title or not price or not shop_id or not item_id:
+            continue
+        results.append({
+            'title': title,
+            'price': price,
+            'url': f'https://shopee.tw/product/{shop_id}/{item_id}',
+            'seller': None,
+            'location': item.get('shop_location') or None,
+        })
+        if limit is not None and len(results) >= limit:
+            break
+    return results
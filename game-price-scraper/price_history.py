@@ -0,0 +1,286 @@
+import json
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from cache import normalize_game_name
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 價格直方圖的桶寬：相鄰兩桶相差 2%，百分位數的誤差不超過約 1%
+_BUCKET_BASE = 1.02
+_LOG_BASE = math.log(_BUCKET_BASE)
+
+
+def price_bucket(price):
+    return int(math.log(max(price, 1)) / _LOG_BASE)
+
+
+def histogram_percentile(histogram, percentile, low=None, high=None):
+    """由 {桶: 次數} 直方圖估計百分位數，結果限制在 [low, high] 之間"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = percentile / 100 * total
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if seen + count >= rank:
+            # 假設桶內價格依對數均勻分布，以排名在桶內的位置內插
+            value = round(_BUCKET_BASE ** (bucket + (rank - seen) / count))
+            break
+        seen += count
+    if low is not None:
+        value = max(value, low)
+    if high is not None:
+        value = min(value, high)
+    return value
+
+
+class PriceHistoryStore:
+    """只增不改的價格歷史資料庫（SQLite）
+
+    - price_observations：每次爬取到的每筆刊登各記錄一列，索引為
+      (遊戲鍵, 遊戲平台, 來源, 時間)
+    - price_daily：寫入時同步更新的每日彙總（筆數、最低、最高、總和與價格直方圖），
+      查詢時間區間的統計只讀取彙總表，不掃描原始資料
+    - record() 只將資料放入佇列，由背景執行緒批次寫入，不增加搜尋的延遲
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.HISTORY_PATH
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS price_observations ('
+                ' id INTEGER PRIMARY KEY,'
+                ' game_key TEXT NOT NULL,'
+                ' platform TEXT NOT NULL,'
+                ' source TEXT NOT NULL,'
+                ' observed_at REAL NOT NULL,'
+                ' price INTEGER NOT NULL,'
+                ' title TEXT NOT NULL,'
+                ' url TEXT,'
+                ' seller TEXT,'
+                ' condition TEXT)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_price_observations_key'
+                ' ON price_observations (game_key, platform, source, observed_at)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS price_daily ('
+                ' game_key TEXT NOT NULL,'
+                ' platform TEXT NOT NULL,'
+                ' source TEXT NOT NULL,'
+                ' day TEXT NOT NULL,'
+                ' count INTEGER NOT NULL,'
+                ' min_price INTEGER NOT NULL,'
+                ' max_price INTEGER NOT NULL,'
+                ' sum_price INTEGER NOT NULL,'
+                ' histogram TEXT NOT NULL,'
+                ' PRIMARY KEY (game_key, platform, source, day))'
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # 寫入
+
+    def record(self, game_name, listings, observed_at=None):
+        """記錄一次搜尋取得的刊登（非同步寫入）"""
+        if not listings:
+            return
+        self._ensure_writer()
+        self._queue.put((game_name, list(listings), observed_at or time.time()))
+
+    def flush(self):
+        """等待佇列中的資料全部寫入"""
+        self._queue.join()
+
+    def write(self, batch):
+        """同步寫入 [(遊戲名稱, 刊登列表, 時間戳記)]，並更新每日彙總"""
+        rows = []
+        daily = defaultdict(lambda: {'count': 0, 'min': None, 'max': None, 'sum': 0, 'histogram': Counter()})
+        for game_name, listings, observed_at in batch:
+            game_key = normalize_game_name(game_name)
+            day = datetime.fromtimestamp(observed_at).date().isoformat()
+            for listing in listings:
+                rows.append((
+                    game_key, listing.platform, listing.source, observed_at, listing.price,
+                    listing.title, listing.url, listing.seller, listing.condition
+                ))
+                rollup = daily[(game_key, listing.platform, listing.source, day)]
+                rollup['count'] += 1
+                rollup['sum'] += listing.price
+                rollup['min'] = listing.price if rollup['min'] is None else min(rollup['min'], listing.price)
+                rollup['max'] = listing.price if rollup['max'] is None else max(rollup['max'], listing.price)
+                rollup['histogram'][price_bucket(listing.price)] += 1
+        if not rows:
+            return
+
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO price_observations'
+                ' (game_key, platform, source, observed_at, price, title, url, seller, condition)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            for key, rollup in daily.items():
+                existing = conn.execute(
+                    'SELECT count, min_price, max_price, sum_price, histogram FROM price_daily'
+                    ' WHERE game_key = ? AND platform = ? AND source = ? AND day = ?',
+                    key
+                ).fetchone()
+                histogram = rollup['histogram']
+                if existing:
+                    count, min_price, max_price, sum_price, stored = existing
+                    histogram.update({int(bucket): n for bucket, n in json.loads(stored).items()})
+                    rollup['count'] += count
+                    rollup['sum'] += sum_price
+                    rollup['min'] = min(rollup['min'], min_price)
+                    rollup['max'] = max(rollup['max'], max_price)
+                conn.execute(
+                    'INSERT OR REPLACE INTO price_daily'
+                    ' (game_key, platform, source, day, count, min_price, max_price, sum_price, histogram)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    key + (rollup['count'], rollup['min'], rollup['max'], rollup['sum'],
+                           json.dumps(histogram, separators=(',', ':')))
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name='price-history-writer', daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # 一次寫入佇列中已累積的所有資料
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                logger.error(f"寫入價格歷史失敗: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    # 查詢
+
+    def _daily_rows(self, game_name, platform=None, source=None, days=30):
+        start_day = (date.today() - timedelta(days=days - 1)).isoformat()
+        query = (
+            'SELECT day, count, min_price, max_price, sum_price, histogram FROM price_daily'
+            ' WHERE game_key = ? AND day >= ?'
+        )
+        params = [normalize_game_name(game_name), start_day]
+        if platform:
+            query += ' AND platform = ?'
+            params.append(platform)
+        if source:
+            query += ' AND source = ?'
+            params.append(source)
+        return self._connection().execute(query + ' ORDER BY day', params).fetchall()
+
+    def searched_games(self, limit=1000):
+        """回傳最近有爬取紀錄的 [(正規化遊戲名稱, 有紀錄的天數)]，供搜尋建議使用"""
+        return self._connection().execute(
+            'SELECT game_key, COUNT(DISTINCT day) FROM price_daily'
+            ' GROUP BY game_key ORDER BY MAX(day) DESC LIMIT ?',
+            (limit,)
+        ).fetchall()
+
+    @staticmethod
+    def _summarize(rows, percentiles):
+        count = sum(row[1] for row in rows)
+        if not count:
+            return {'count': 0}
+        histogram = Counter()
+        for row in rows:
+            histogram.update({int(bucket): n for bucket, n in json.loads(row[5]).items()})
+        low = min(row[2] for row in rows)
+        high = max(row[3] for row in rows)
+        summary = {
+            'count': count,
+            'min': low,
+            'max': high,
+            'avg': round(sum(row[4] for row in rows) / count),
+        }
+        for percentile in percentiles:
+            summary[f'p{percentile:g}'] = histogram_percentile(histogram, percentile, low, high)
+        return summary
+
+    def summary(self, game_name, platform=None, source=None, days=30, percentiles=(25, 50, 75, 90)):
+        """回傳最近 days 天的筆數、最低、最高、平均與百分位數（由每日彙總計算）"""
+        return self._summarize(self._daily_rows(game_name, platform, source, days), percentiles)
+
+    def daily(self, game_name, platform=None, source=None, days=30, percentiles=(50,)):
+        """回傳最近 days 天每天的統計，同一天的不同平台 / 來源合併計算"""
+        by_day = defaultdict(list)
+        for row in self._daily_rows(game_name, platform, source, days):
+            by_day[row[0]].append(row)
+        return [
+            dict(day=day, **self._summarize(rows, percentiles))
+            for day, rows in by_day.items()
+        ]
+
+    def stats(self):
+        conn = self._connection()
+        return {
+            'observations': conn.execute('SELECT MAX(id) FROM price_observations').fetchone()[0] or 0,
+            'daily_rollups': conn.execute('SELECT COUNT(*) FROM price_daily').fetchone()[0],
+            'pending_writes': self._queue.qsize(),
+        }
+
+
+_default_history = None
+_default_history_lock = threading.Lock()
+
+
+def get_price_history():
+    """取得整個程序共用的價格歷史資料庫，Config.HISTORY_ENABLED 為 False 時回傳 None"""
+    global _default_history
+    if not Config.HISTORY_ENABLED:
+        return None
+    if _default_history is None:
+        with _default_history_lock:
+            if _default_history is None:
+                _default_history = PriceHistoryStore()
+    return _default_history
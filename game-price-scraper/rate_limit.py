@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 標頭（秒數或 HTTP 日期），回傳等待秒數或 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """自適應的 token bucket
+
+    - 以 rate（每秒請求數）補充 token，最多累積 burst 個
+    - 收到 429/503 時將速率減半，並在 Retry-After 指定的時間內暫停發送
+    - 之後每次成功回應都會逐步恢復速率，直到回到設定值
+    """
+
+    def __init__(self, rate, burst=1, min_rate=None, recovery=0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.recovery = recovery
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def reserve(self):
+        """預約一個 token，回傳需要等待的秒數（0 表示可立即發送）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0
+            if self._tokens < 0:
+                wait = -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, timeout=None):
+        """取得發送許可，只在必要時等待；超過 timeout 仍需等待時回傳 False"""
+        wait = self.reserve()
+        if timeout is not None and wait > timeout:
+            with self._lock:
+                self._tokens += 1  # 歸還預約的 token
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, timeout=None):
+        """acquire 的非同步版本，等待時不阻塞事件迴圈"""
+        wait = self.reserve()
+        if timeout is not None and wait > timeout:
+            with self._lock:
+                self._tokens += 1
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def on_response(self, status_code, retry_after=None):
+        """依回應狀態調整速率"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status_code in (429, 503):
+                self.rate = max(self.rate / 2, self.min_rate)
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self._paused_until = max(self._paused_until, now + pause)
+                self._tokens = min(self._tokens, 0.0)
+                return True
+            if self.rate < self.max_rate:
+                self.rate = min(self.rate + self.max_rate * self.recovery, self.max_rate)
+            return False
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'rate': round(self.rate, 3),
+                'max_rate': self.max_rate,
+                'tokens': round(self._tokens, 3),
+                'paused_for': round(max(self._paused_until - now, 0.0), 3),
+            }
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self._tokens + elapsed * self.rate, self.burst)
+
+
+class HostRateLimiter:
+    """以主機名稱區分的限速器，同一程序內所有並行搜尋共用"""
+
+    def __init__(self, default_rate=1.0, default_burst=1):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._limits = {}
+
+    def configure(self, host, rate, burst=1):
+        """設定某個主機的速率（每秒請求數）與突發量"""
+        with self._lock:
+            self._limits[host] = (rate, burst)
+            self._buckets.pop(host, None)
+
+    def bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self._limits.get(host, (self.default_rate, self.default_burst))
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url_or_host, timeout=None):
+        host = _host(url_or_host)
+        return self.bucket(host).acquire(timeout)
+
+    async def acquire_async(self, url_or_host, timeout=None):
+        host = _host(url_or_host)
+        return await self.bucket(host).acquire_async(timeout)
+
+    def on_response(self, url_or_host, status_code, retry_after=None):
+        host = _host(url_or_host)
+        if self.bucket(host).on_response(status_code, parse_retry_after(retry_after)):
+            logger.warning(f"{host} 回應 {status_code}，降低請求速率")
+
+    def stats(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.snapshot() for host, bucket in buckets.items()}
+
+
+def _host(url_or_host):
+    if '://' in url_or_host:
+        return urlsplit(url_or_host).hostname or url_or_host
+    return url_or_host
+
+
+# 整個程序共用的限速器
+rate_limiter = HostRateLimiter()
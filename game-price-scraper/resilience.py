@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+
+import requests
+
+from config import Config
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class SourceError(Exception):
+    """平台搜尋失敗；retryable 表示稍後重試可能成功（逾時、429、5xx 等）"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(SourceError):
+    """平台的斷路器開啟中，暫時不發送請求"""
+
+    def __init__(self, message):
+        super().__init__(message, retryable=False)
+
+
+class RateLimitTimeout(SourceError):
+    """本機限速器需等待的時間超過搜尋時限，請求沒有送出，不計入斷路器的失敗次數"""
+
+    def __init__(self, message):
+        super().__init__(message, retryable=False)
+
+
+def retryable_errors():
+    """RetryPolicy 預設重試的例外：SourceError（retryable 為 False 的除外）與
+    連線失敗、逾時等傳輸層錯誤；解析錯誤等程式問題不重試"""
+    errors = [SourceError, requests.RequestException, OSError, asyncio.TimeoutError]
+    if httpx is not None:
+        errors.append(httpx.TransportError)
+    # Selenium 在第一次使用瀏覽器平台時才匯入（見 driver_pool.preload_selenium）
+    selenium_errors = sys.modules.get('selenium.common.exceptions')
+    if selenium_errors is not None:
+        errors.append(selenium_errors.WebDriverException)
+    return tuple(errors)
+
+
+class RetryPolicy:
+    """有上限的重試，延遲以指數成長並加入隨機抖動
+
+    第 n 次重試前等待 RETRY_DELAY * 2^(n-1) 秒的 50%~100%；
+    若等待後會超過 deadline（time.monotonic() 的時間點）則不再重試。
+    retry_on 預設為 retryable_errors()，其他例外直接拋出。
+    """
+
+    def __init__(self, max_retries=None, base_delay=None, max_delay=30):
+        self.max_retries = Config.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = Config.RETRY_DELAY if base_delay is None else base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry_number):
+        delay = min(self.base_delay * (2 ** (retry_number - 1)), self.max_delay)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def call(self, func, deadline=None, retry_on=None, description=''):
+        """執行 func，失敗時依策略重試，最後一次的例外會被拋出"""
+        retry_on = retry_on or retryable_errors()
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except retry_on as e:
+                if isinstance(e, SourceError) and not e.retryable:
+                    raise
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = self.delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning(f"{description}失敗 ({e})，{delay:.1f} 秒後第 {attempt} 次重試")
+                time.sleep(delay)
+
+    async def call_async(self, func, deadline=None, retry_on=None, description=''):
+        """call 的非同步版本，func 為回傳 awaitable 的函數"""
+        retry_on = retry_on or retryable_errors()
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except retry_on as e:
+                if isinstance(e, SourceError) and not e.retryable:
+                    raise
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = self.delay(attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning(f"{description}失敗 ({e})，{delay:.1f} 秒後第 {attempt} 次重試")
+                await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """單一平台的斷路器
+
+    連續失敗 failure_threshold 次後開啟，cooldown 秒內直接略過該平台；
+    冷卻結束後放行一個試探請求（half-open），成功即恢復，失敗則重新開啟。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=None, cooldown=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.cooldown = cooldown or Config.CIRCUIT_COOLDOWN
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self):
+        """回傳是否可以發送請求"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"{self.name} 已恢復，關閉斷路器")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def cancel(self):
+        """allow() 放行後沒有實際發送請求（例如限速器等待逾時），讓下一個請求可以試探"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"{self.name} 連續失敗 {self._failures} 次，{self.cooldown} 秒內略過此平台")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'failures': self._failures,
+                'retry_in': round(max(self._opened_at + self.cooldown - time.monotonic(), 0.0), 1)
+                if self._state == self.OPEN else 0.0,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """取得（必要時建立）指定平台的斷路器，整個程序共用"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_stats():
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
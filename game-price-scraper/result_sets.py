@@ -0,0 +1,138 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+
+from cache import normalize_game_name
+from config import Config
+
+# /results 可用的排序方式，價格以外的排序在同一值內仍依價格由低到高
+SORT_KEYS = ('price', '-price', 'platform', 'condition', 'source')
+
+# 預先分桶的欄位（GameListing 的屬性）
+BUCKET_FIELDS = ('platform', 'condition', 'source')
+
+
+class ResultSet:
+    """預先索引的搜尋結果，供 /results 篩選、排序與分頁
+
+    建立時依價格排序一次，並依遊戲平台、商品狀況與來源平台分桶（桶內為依價格
+    排序的索引）。查詢時從最小的桶開始，價格區間以二分搜尋取得，不需重新排序；
+    只依價格排序且沒有其他條件時，分頁只是切片。
+    """
+
+    def __init__(self, listings):
+        self.listings = sorted(listings, key=lambda listing: listing.price)
+        self.prices = [listing.price for listing in self.listings]
+        self.buckets = {field: {} for field in BUCKET_FIELDS}
+        for index, listing in enumerate(self.listings):
+            for field, bucket in self.buckets.items():
+                bucket.setdefault(getattr(listing, field), []).append(index)
+        self.created = time.monotonic()
+
+    def __len__(self):
+        return len(self.listings)
+
+    def facets(self):
+        """各欄位每個值的刊登數，供前端產生篩選選項"""
+        return {
+            field: {value: len(indexes) for value, indexes in bucket.items()}
+            for field, bucket in self.buckets.items()
+        }
+
+    def query(self, platform=None, condition=None, source=None, min_price=None, max_price=None,
+              sort='price', offset=0, limit=None):
+        """回傳 (符合條件的總數, 該頁的刊登列表, 價格統計 dict 或 None)"""
+        lo = 0 if min_price is None else bisect.bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect.bisect_right(self.prices, max_price)
+
+        filters = [
+            (field, value)
+            for field, value in (('platform', platform), ('condition', condition), ('source', source))
+            if value is not None
+        ]
+        if filters:
+            buckets = [self.buckets[field].get(value, []) for field, value in filters]
+            candidates = min(buckets, key=len)
+            # 桶內索引依價格遞增，價格區間同樣以二分搜尋取得
+            candidates = candidates[bisect.bisect_left(candidates, lo):bisect.bisect_left(candidates, hi)]
+            if len(filters) > 1:
+                candidates = [
+                    index for index in candidates
+                    if all(getattr(self.listings[index], field) == value for field, value in filters)
+                ]
+        else:
+            candidates = range(lo, hi)
+
+        total = len(candidates)
+        if total == 0:
+            return 0, [], None
+
+        stats = {
+            'min': self.prices[candidates[0]],
+            'max': self.prices[candidates[-1]],
+            'avg': round(sum(self.prices[index] for index in candidates) / total),
+        }
+
+        if sort == '-price':
+            candidates = candidates[::-1]
+        elif sort != 'price':
+            # sorted 為穩定排序，同一值內保持價格順序
+            candidates = sorted(candidates, key=lambda index: getattr(self.listings[index], sort))
+
+        end = total if limit is None else offset + limit
+        return total, [self.listings[index] for index in candidates[offset:end]], stats
+
+
+class ResultSetCache:
+    """程序內的 ResultSet LRU 快取，以 (正規化遊戲名稱, 平台代碼, 是否深度搜尋) 為鍵
+
+    搜尋完成時寫入；其他 worker 或過期後的查詢可由 SearchCache 中各平台的
+    結果重新建立（見 app.load_result_set）。項目保留 RESULT_SET_TTL 秒，
+    避免背景更新快取後仍長時間使用舊的結果。
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or Config.RESULT_SET_MAX_ENTRIES
+        self.ttl = ttl or Config.RESULT_SET_TTL
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(game_name, sources, deep=False):
+        return normalize_game_name(game_name), tuple(sorted(sources)), bool(deep)
+
+    def get(self, key):
+        with self._lock:
+            result_set = self._entries.get(key)
+            if result_set is None:
+                return None
+            if time.monotonic() - result_set.created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result_set
+
+    def put(self, key, listings):
+        """建立並儲存 ResultSet，回傳建立的 ResultSet"""
+        result_set = ResultSet(listings)
+        with self._lock:
+            self._entries[key] = result_set
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result_set
+
+    def get_or_build(self, key, load):
+        """取得 ResultSet，不存在時以 load() 取得刊登列表建立；load() 回傳 None 時回傳 None"""
+        result_set = self.get(key)
+        if result_set is not None:
+            return result_set
+        listings = load()
+        if listings is None:
+            return None
+        return self.put(key, listings)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries}
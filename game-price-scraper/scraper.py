@@ -1,416 +1,351 @@
-import requests
+import contextvars
 import time
 import random
-import json
 import logging
-from dataclasses import dataclass
-from typing import List, Optional
-import re
-from urllib.parse import quote, urljoin
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from classifier import classify_platform
+from config import Config
+from dedup import cluster_listings, dedupe_listings
+from driver_pool import get_driver_pool
+from metrics import record_source_result, stage
+from models import GameListing
+from parsers import parse_price
+from price_history import get_price_history
+from resilience import CircuitOpenError
+from sources import get_enabled_sources, get_source
+from transport import get_default_transport
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class GameListing:
-    title: str
-    price: int
-    platform: str
-    condition: str
-    seller: str
-    location: str
-    url: str
-    source: str
-    posted_time: Optional[str] = None
-    seller_rating: Optional[str] = None
+def _run_started(started, func, *args):
+    """執行緒實際開始執行時記錄時間，在執行緒池中排隊的時間不計入平台的時限"""
+    started.append(time.monotonic())
+    return func(*args)
+
+def _task_deadline(started, timeout, now):
+    """已開始的搜尋於開始後 timeout 秒到期；尚未開始的搜尋最早在 now + timeout 到期"""
+    return (started[0] if started else now) + timeout
 
 class GamePriceScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, source_timeout=None, search_deadline=None, transport=None, history=None, deep=False):
+        self.source_timeout = source_timeout or Config.SOURCE_TIMEOUT
+        self.search_deadline = search_deadline or Config.SEARCH_DEADLINE
+        # 深度搜尋：各平台讀取多頁結果，只保留最便宜的 DEEP_SEARCH_TOP_N 個（見 sources.DeepSearchResults）
+        self.deep = deep
+        # 共用整個程序的連線池，讓各次搜尋可重用到各平台的 TCP/TLS 連線
+        self.transport = transport or get_default_transport()
+        # 爬取到的結果會記錄到價格歷史（HISTORY_ENABLED 為 False 時為 None）
+        self.history = history if history is not None else get_price_history()
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         ]
-        self.session.headers.update({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
         
     def get_random_user_agent(self):
         return random.choice(self.user_agents)
     
-    def setup_selenium_driver(self):
-        """設定 Selenium WebDriver"""
+    def record_history(self, game_name, listings):
+        """將新爬取的結果寫入價格歷史，失敗不影響搜尋"""
+        if self.history is None or not listings:
+            return
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument(f'--user-agent={self.get_random_user_agent()}')
-            
-            driver = webdriver.Chrome(options=chrome_options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            return driver
+            self.history.record(game_name, listings)
         except Exception as e:
-            logger.error(f"設定 Selenium WebDriver 失敗: {e}")
-            return None
+            logger.error(f"記錄價格歷史失敗: {e}")
     
     def extract_price(self, price_text):
         """從價格文字中提取數字"""
-        if not price_text:
-            return 0
-        # 移除所有非數字字符，但保留數字
-        price_str = re.sub(r'[^\d]', '', str(price_text))
-        if price_str:
-            return int(price_str)
-        return 0
+        return parse_price(price_text)
     
     def detect_platform(self, title):
         """根據標題偵測遊戲平台"""
-        title_lower = title.lower()
-        
-        platform_keywords = {
-            'Nintendo Switch': ['switch', 'ns', 'nintendo switch'],
-            'PlayStation 5': ['ps5', 'playstation 5', 'play station 5'],
-            'PlayStation 4': ['ps4', 'playstation 4', 'play station 4'],
-            'Xbox Series X/S': ['xbox series x', 'xbox series s', 'xsx', 'xss'],
-            'Xbox One': ['xbox one', 'xbone'],
-            'PC': ['pc', 'steam', '電腦版']
-        }
-        
-        for platform, keywords in platform_keywords.items():
-            if any(keyword in title_lower for keyword in keywords):
-                return platform
-        
-        return '未知平台'
+        return classify_platform(title)
+    
+    def search_source(self, code, game_name):
+        """以指定平台的轉接器搜尋，失敗時拋出例外（見 SourceAdapter.search）"""
+        return get_source(code).search(self, game_name)
     
     def search_ruten(self, game_name):
         """搜尋露天拍賣"""
-        listings = []
-        try:
-            logger.info(f"搜尋露天拍賣: {game_name}")
-            
-            # 使用露天拍賣的搜尋API
-            search_url = f"https://www.ruten.com.tw/find/?q={quote(game_name)}"
-            
-            self.session.headers['User-Agent'] = self.get_random_user_agent()
-            response = self.session.get(search_url, timeout=10)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 尋找商品項目
-                items = soup.find_all('div', class_='rt-item') or soup.find_all('div', class_='item')
-                
-                for item in items[:10]:  # 限制結果數量
-                    try:
-                        # 提取標題
-                        title_elem = item.find('a', class_='rt-item-title') or item.find('h3')
-                        if not title_elem:
-                            continue
-                        title = title_elem.get_text(strip=True)
-                        
-                        # 提取價格
-                        price_elem = item.find('b', class_='rt-item-price') or item.find('span', class_='price')
-                        if not price_elem:
-                            continue
-                        price = self.extract_price(price_elem.get_text(strip=True))
-                        
-                        if price == 0:
-                            continue
-                        
-                        # 提取網址
-                        url = title_elem.get('href', '')
-                        if url and not url.startswith('http'):
-                            url = 'https://www.ruten.com.tw' + url
-                        
-                        # 提取賣家資訊
-                        seller_elem = item.find('span', class_='rt-item-seller')
-                        seller = seller_elem.get_text(strip=True) if seller_elem else '未知賣家'
-                        
-                        listing = GameListing(
-                            title=title,
-                            price=price,
-                            platform=self.detect_platform(title),
-                            condition='二手',  # 預設為二手
-                            seller=seller,
-                            location='台灣',
-                            url=url,
-                            source='露天拍賣'
-                        )
-                        listings.append(listing)
-                        
-                    except Exception as e:
-                        logger.warning(f"解析露天拍賣項目時發生錯誤: {e}")
-                        continue
-                        
-            time.sleep(random.uniform(1, 2))  # 隨機延遲
-            
-        except Exception as e:
-            logger.error(f"搜尋露天拍賣時發生錯誤: {e}")
-        
-        return listings
+        return self.search_source('ruten', game_name)
     
     def search_shopee(self, game_name):
         """搜尋蝦皮購物"""
-        listings = []
-        try:
-            logger.info(f"搜尋蝦皮購物: {game_name}")
-            
-            driver = self.setup_selenium_driver()
-            if not driver:
-                return listings
-            
-            search_url = f"https://shopee.tw/search?keyword={quote(game_name)}"
-            driver.get(search_url)
-            
-            # 等待頁面載入
-            time.sleep(3)
-            
-            # 尋找商品項目
-            items = driver.find_elements(By.CSS_SELECTOR, '[data-sqe="item"]')
-            
-            for item in items[:8]:  # 限制結果數量
-                try:
-                    # 提取標題
-                    title_elem = item.find_element(By.CSS_SELECTOR, '[data-sqe="name"]')
-                    title = title_elem.text.strip()
-                    
-                    # 提取價格
-                    price_elem = item.find_element(By.CSS_SELECTOR, '.shopee-price')
-                    price_text = price_elem.text.strip()
-                    price = self.extract_price(price_text)
-                    
-                    if price == 0:
-                        continue
-                    
-                    # 提取網址
-                    link_elem = item.find_element(By.CSS_SELECTOR, 'a')
-                    url = link_elem.get_attribute('href')
-                    
-                    # 提取位置
-                    location_elem = item.find_elements(By.CSS_SELECTOR, '.shopee-item-card__location')
-                    location = location_elem[0].text.strip() if location_elem else '台灣'
-                    
-                    listing = GameListing(
-                        title=title,
-                        price=price,
-                        platform=self.detect_platform(title),
-                        condition='二手',
-                        seller='蝦皮賣家',
-                        location=location,
-                        url=url,
-                        source='蝦皮購物'
-                    )
-                    listings.append(listing)
-                    
-                except Exception as e:
-                    logger.warning(f"解析蝦皮項目時發生錯誤: {e}")
-                    continue
-            
-            driver.quit()
-            
-        except Exception as e:
-            logger.error(f"搜尋蝦皮購物時發生錯誤: {e}")
-            if 'driver' in locals():
-                driver.quit()
-        
-        return listings
+        return self.search_source('shopee', game_name)
     
     def search_yahoo_auction(self, game_name):
         """搜尋Yahoo拍賣"""
-        listings = []
+        return self.search_source('yahoo', game_name)
+    
+    def search_pchome_24h(self, game_name):
+        """搜尋PChome 24h購物"""
+        return self.search_source('pchome', game_name)
+    
+    def get_search_functions(self, sources=None):
+        """回傳要搜尋的平台清單 (平台代碼, 平台名稱, 搜尋函數)
+        
+        只包含 Config.PLATFORMS 中已啟用的平台，依 priority 排序；
+        sources 可指定只搜尋其中幾個平台。
+        """
+        return [
+            (adapter.code, adapter.name, partial(adapter.search, self))
+            for adapter in get_enabled_sources(sources)
+        ]
+    
+    def iter_platform_results(self, game_name, sources=None):
+        """並行搜尋各平台，依完成順序產出 (平台代碼, 結果列表, 狀態)
+        
+        每個平台有各自的時限（SourceAdapter.timeout，自該平台的搜尋實際開始
+        執行時起算），整體搜尋也有總時限 (search_deadline)。超過時限的平台會被放棄並產出狀態 'timeout'，
+        已完成的結果不受影響。搜尋失敗的平台產出 'error'，斷路器開啟中
+        而被略過的平台產出 'skipped'。
+        """
+        search_functions = self.get_search_functions(sources)
+        if not search_functions:
+            return
+        
+        start = time.monotonic()
+        overall_deadline = start + self.search_deadline
+        
+        executor = ThreadPoolExecutor(
+            max_workers=len(search_functions),
+            thread_name_prefix='search'
+        )
+        pending = {}
         try:
-            logger.info(f"搜尋Yahoo拍賣: {game_name}")
-            
-            search_url = f"https://tw.bid.yahoo.com/search/auction/product?p={quote(game_name)}"
-            
-            self.session.headers['User-Agent'] = self.get_random_user_agent()
-            response = self.session.get(search_url, timeout=10)
+            for code, platform_name, search_func in search_functions:
+                logger.info(f"正在搜尋 {platform_name}...")
+                started = []
+                # 複製 contextvars，讓搜尋執行緒的各階段耗時記錄到目前請求的追蹤
+                future = executor.submit(
+                    contextvars.copy_context().run, _run_started, started, search_func, game_name
+                )
+                pending[future] = (code, platform_name, get_source(code).timeout(self), started)
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 尋找商品項目
-                items = soup.find_all('li', class_='BaseGridItem') or soup.find_all('div', class_='srp-item')
+            while pending:
+                now = time.monotonic()
+                nearest_deadline = min(
+                    min(_task_deadline(started, timeout, now) for _, _, timeout, started in pending.values()),
+                    overall_deadline
+                )
+                done, _ = wait(pending, timeout=max(nearest_deadline - now, 0), return_when=FIRST_COMPLETED)
                 
-                for item in items[:8]:
+                for future in done:
+                    code, platform_name, _, _ = pending.pop(future)
                     try:
-                        # 提取標題
-                        title_elem = item.find('h3') or item.find('a', class_='product-name')
-                        if not title_elem:
-                            continue
-                        title = title_elem.get_text(strip=True)
-                        
-                        # 提取價格
-                        price_elem = item.find('span', class_='price') or item.find('em', class_='price')
-                        if not price_elem:
-                            continue
-                        price = self.extract_price(price_elem.get_text(strip=True))
-                        
-                        if price == 0:
-                            continue
-                        
-                        # 提取網址
-                        url_elem = item.find('a')
-                        url = url_elem.get('href', '') if url_elem else ''
-                        if url and not url.startswith('http'):
-                            url = 'https://tw.bid.yahoo.com' + url
-                        
-                        listing = GameListing(
-                            title=title,
-                            price=price,
-                            platform=self.detect_platform(title),
-                            condition='二手',
-                            seller='Yahoo賣家',
-                            location='台灣',
-                            url=url,
-                            source='Yahoo拍賣'
-                        )
-                        listings.append(listing)
-                        
+                        listings = future.result()
+                    except CircuitOpenError as e:
+                        logger.warning(str(e))
+                        record_source_result(code, 'skipped', [])
+                        yield code, [], 'skipped'
+                        continue
                     except Exception as e:
-                        logger.warning(f"解析Yahoo拍賣項目時發生錯誤: {e}")
+                        logger.error(f"搜尋 {platform_name} 時發生錯誤: {e}")
+                        record_source_result(code, 'error', [])
+                        yield code, [], 'error'
                         continue
-            
-            time.sleep(random.uniform(1, 2))
-            
-        except Exception as e:
-            logger.error(f"搜尋Yahoo拍賣時發生錯誤: {e}")
-        
-        return listings
+                    
+                    if listings:
+                        logger.info(f"{platform_name} 找到 {len(listings)} 個結果")
+                    else:
+                        logger.info(f"{platform_name} 沒有找到結果")
+                    record_source_result(code, 'ok', listings)
+                    self.record_history(game_name, listings)
+                    yield code, listings, 'ok'
+                
+                # 放棄超過時限仍未完成的平台
+                now = time.monotonic()
+                for future, (code, platform_name, timeout, started) in list(pending.items()):
+                    if now >= overall_deadline or _task_deadline(started, timeout, now) <= now:
+                        del pending[future]
+                        future.cancel()
+                        logger.warning(f"{platform_name} 超過時限，略過此平台的結果")
+                        record_source_result(code, 'timeout', [])
+                        yield code, [], 'timeout'
+        finally:
+            # 不等待逾時的執行緒，讓它們在背景自行結束
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def search_pchome_24h(self, game_name):
-        """搜尋PChome 24h購物"""
-        listings = []
+    def batch_tasks(self, game_names, sources=None):
+        """回傳批次搜尋的 (遊戲名稱, 平台代碼) 列表，依遊戲名稱的順序排列"""
+        codes = [adapter.code for adapter in get_enabled_sources(sources)]
+        return [(game_name, code) for game_name in game_names for code in codes]
+    
+    def iter_batch_results(self, tasks, max_workers=None):
+        """以共用的執行緒池執行多個 (遊戲名稱, 平台代碼) 搜尋，依完成順序產出
+        (遊戲名稱, 平台代碼, 結果列表, 狀態)
+        
+        - 同時進行的搜尋不超過 max_workers（預設 Config.BATCH_MAX_WORKERS）
+        - 每個主機同時進行的搜尋不超過該平台的 concurrency，主機忙碌時先派發
+          其他主機的工作，不佔用執行緒等待
+        - 每個搜尋仍受各平台的限速器、重試與斷路器控制，時限為該平台的
+          SourceAdapter.timeout（自搜尋實際開始執行時起算），
+          逾時的搜尋產出 'timeout'，但在執行緒實際結束前仍佔用該主機的名額
+        """
+        max_workers = max_workers or Config.BATCH_MAX_WORKERS
+        queues = {}
+        for game_name, code in tasks:
+            adapter = get_source(code)
+            queues.setdefault(adapter.host, (adapter, deque()))[1].append(game_name)
+        if not queues:
+            return
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch')
+        running = {host: 0 for host in queues}
+        pending = {}
+        abandoned = {}
+        
+        def dispatch():
+            # 輪流從各主機的佇列取出工作，直到執行緒或各主機的名額用完
+            submitted = True
+            while submitted and len(pending) + len(abandoned) < max_workers:
+                submitted = False
+                for host, (adapter, queue) in queues.items():
+                    if not queue or running[host] >= adapter.concurrency:
+                        continue
+                    if len(pending) + len(abandoned) >= max_workers:
+                        break
+                    game_name = queue.popleft()
+                    started = []
+                    future = executor.submit(
+                        contextvars.copy_context().run, _run_started, started, adapter.search, self, game_name
+                    )
+                    pending[future] = (game_name, adapter, started)
+                    running[host] += 1
+                    submitted = True
+        
         try:
-            logger.info(f"搜尋PChome 24h: {game_name}")
-            
-            search_url = f"https://24h.pchome.com.tw/search/v3.3/?q={quote(game_name)}"
-            
-            self.session.headers['User-Agent'] = self.get_random_user_agent()
-            response = self.session.get(search_url, timeout=10)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 尋找商品項目
-                items = soup.find_all('div', class_='prod_item') or soup.find_all('li', class_='item')
+            dispatch()
+            # 已沒有待派發的工作時，不再等待逾時的執行緒
+            while pending or (abandoned and any(queue for _, queue in queues.values())):
+                timeout = None
+                if pending:
+                    now = time.monotonic()
+                    nearest_deadline = min(
+                        _task_deadline(started, adapter.timeout(self), now)
+                        for _, adapter, started in pending.values()
+                    )
+                    timeout = max(nearest_deadline - now, 0)
+                done, _ = wait(
+                    list(pending) + list(abandoned), timeout=timeout, return_when=FIRST_COMPLETED
+                )
                 
-                for item in items[:5]:  # PChome通常是新品，限制較少結果
+                for future in done:
+                    if future in abandoned:
+                        running[abandoned.pop(future).host] -= 1
+                        continue
+                    game_name, adapter, _ = pending.pop(future)
+                    running[adapter.host] -= 1
                     try:
-                        # 提取標題
-                        title_elem = item.find('h5') or item.find('a', class_='prod_name')
-                        if not title_elem:
-                            continue
-                        title = title_elem.get_text(strip=True)
-                        
-                        # 提取價格
-                        price_elem = item.find('b', class_='price') or item.find('span', class_='price')
-                        if not price_elem:
-                            continue
-                        price = self.extract_price(price_elem.get_text(strip=True))
-                        
-                        if price == 0:
-                            continue
-                        
-                        # 提取網址
-                        url_elem = item.find('a')
-                        url = url_elem.get('href', '') if url_elem else ''
-                        if url and not url.startswith('http'):
-                            url = 'https://24h.pchome.com.tw' + url
-                        
-                        listing = GameListing(
-                            title=title,
-                            price=price,
-                            platform=self.detect_platform(title),
-                            condition='全新',  # PChome多為全新商品
-                            seller='PChome',
-                            location='台灣',
-                            url=url,
-                            source='PChome 24h'
-                        )
-                        listings.append(listing)
-                        
+                        listings = future.result()
+                    except CircuitOpenError:
+                        record_source_result(adapter.code, 'skipped', [])
+                        yield game_name, adapter.code, [], 'skipped'
+                        continue
                     except Exception as e:
-                        logger.warning(f"解析PChome項目時發生錯誤: {e}")
+                        logger.error(f"搜尋 {adapter.name} ({game_name}) 時發生錯誤: {e}")
+                        record_source_result(adapter.code, 'error', [])
+                        yield game_name, adapter.code, [], 'error'
                         continue
-            
-            time.sleep(random.uniform(0.5, 1))
-            
-        except Exception as e:
-            logger.error(f"搜尋PChome 24h時發生錯誤: {e}")
-        
-        return listings
+                    record_source_result(adapter.code, 'ok', listings)
+                    self.record_history(game_name, listings)
+                    yield game_name, adapter.code, listings, 'ok'
+                
+                now = time.monotonic()
+                for future, (game_name, adapter, started) in list(pending.items()):
+                    if _task_deadline(started, adapter.timeout(self), now) <= now:
+                        del pending[future]
+                        abandoned[future] = adapter
+                        logger.warning(f"{adapter.name} ({game_name}) 超過時限，略過此平台的結果")
+                        record_source_result(adapter.code, 'timeout', [])
+                        yield game_name, adapter.code, [], 'timeout'
+                
+                dispatch()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def search_all_platforms(self, game_name):
-        """搜尋所有平台"""
+    def search_many(self, game_names, sources=None):
+        """批次搜尋多個遊戲，回傳 {遊戲名稱: 去重並按價格排序的結果列表}"""
+        all_listings = {game_name: [] for game_name in game_names}
+        for game_name, _, listings, status in self.iter_batch_results(
+                self.batch_tasks(all_listings, sources)):
+            all_listings[game_name].extend(listings)
+        return {
+            game_name: self.deduplicate_listings(listings)
+            for game_name, listings in all_listings.items()
+        }
+
+    def search_platforms(self, game_name, sources=None):
+        """並行搜尋各平台，回傳 {平台代碼: 結果列表}，逾時或失敗的平台不會出現在結果中"""
+        results = {}
+        for code, listings, status in self.iter_platform_results(game_name, sources):
+            if status == 'ok':
+                results[code] = listings
+        return results
+    
+    def search_all_platforms(self, game_name, sources=None, concurrent=None):
+        """搜尋所有平台
+        
+        concurrent 為 True 時並行搜尋各平台，總耗時取決於最慢的平台；
+        為 False 時依序搜尋 (舊有行為)。預設依 Config.CONCURRENT_SEARCH 決定。
+        """
         logger.info(f"開始搜尋遊戲: {game_name}")
         
-        all_listings = []
+        if concurrent is None:
+            concurrent = Config.CONCURRENT_SEARCH
         
-        # 搜尋各個平台
-        search_functions = [
-            ('露天拍賣', self.search_ruten),
-            ('蝦皮購物', self.search_shopee),
-            ('Yahoo拍賣', self.search_yahoo_auction),
-            ('PChome 24h', self.search_pchome_24h),
-        ]
+        all_listings = []
         
-        for platform_name, search_func in search_functions:
-            try:
-                logger.info(f"正在搜尋 {platform_name}...")
-                listings = search_func(game_name)
-                
-                if listings:
-                    all_listings.extend(listings)
-                    logger.info(f"{platform_name} 找到 {len(listings)} 個結果")
-                else:
-                    logger.info(f"{platform_name} 沒有找到結果")
+        if concurrent:
+            for listings in self.search_platforms(game_name, sources).values():
+                all_listings.extend(listings)
+        else:
+            for code, platform_name, search_func in self.get_search_functions(sources):
+                try:
+                    logger.info(f"正在搜尋 {platform_name}...")
+                    listings = search_func(game_name)
+                    record_source_result(code, 'ok', listings)
+                    self.record_history(game_name, listings)
                     
-                # 在每個平台搜尋後休息
-                time.sleep(random.uniform(2, 4))
-                
-            except Exception as e:
-                logger.error(f"搜尋 {platform_name} 時發生錯誤: {e}")
-                continue
+                    if listings:
+                        all_listings.extend(listings)
+                        logger.info(f"{platform_name} 找到 {len(listings)} 個結果")
+                    else:
+                        logger.info(f"{platform_name} 沒有找到結果")
+                    
+                except Exception as e:
+                    logger.error(f"搜尋 {platform_name} 時發生錯誤: {e}")
+                    record_source_result(code, 'skipped' if isinstance(e, CircuitOpenError) else 'error', [])
+                    continue
         
-        # 過濾重複項目和異常價格
-        unique_listings = []
-        seen_titles = set()
+        unique_listings = self.deduplicate_listings(all_listings)
         
-        for listing in all_listings:
-            # 簡化標題用於比較
-            simple_title = re.sub(r'[^\w\s]', '', listing.title.lower())
-            
-            # 過濾異常價格（太低或太高）
-            if listing.price < 10 or listing.price > 50000:
-                continue
-                
-            # 避免重複
-            if simple_title not in seen_titles:
-                seen_titles.add(simple_title)
-                unique_listings.append(listing)
+        logger.info(f"總共找到 {len(unique_listings)} 個去重後的結果")
+        return unique_listings
+    
+    def deduplicate_listings(self, all_listings):
+        """移除同一筆刊登的重複項目、過濾異常價格，並按價格排序
+        
+        以網址判斷是否為同一筆刊登，標題相同的不同刊登都會保留；
+        相似標題的商品分群見 cluster_listings。
+        """
+        with stage('dedup'):
+            unique_listings = [
+                listing for listing in dedupe_listings(all_listings)
+                # 過濾異常價格（太低或太高）
+                if Config.MIN_PRICE_FILTER <= listing.price <= Config.MAX_PRICE_FILTER
+            ]
         
         # 按價格排序
-        unique_listings.sort(key=lambda x: x.price)
+        with stage('sort'):
+            unique_listings.sort(key=lambda x: x.price)
         
-        logger.info(f"總共找到 {len(unique_listings)} 個去重後的結果")
-        return unique_listings
\ No newline at end of file
+        return unique_listings
+    
+    def cluster_listings(self, listings):
+        """將結果依商品分群（見 dedup.cluster_listings），每群含最低價與中位數價格"""
+        with stage('cluster'):
+            return cluster_listings(listings)
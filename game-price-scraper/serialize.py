@@ -0,0 +1,48 @@
+import json
+
+from models import GameListing, LISTING_FIELDS, listing_to_row
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def listing_to_dict(listing):
+    """將 GameListing 轉換為字典（只在沒有 orjson 時使用）"""
+    return dict(zip(LISTING_FIELDS, listing_to_row(listing)))
+
+
+def _default(obj):
+    if isinstance(obj, GameListing):
+        return listing_to_dict(obj)
+    raise TypeError(f'無法序列化 {type(obj).__name__}')
+
+
+def dumps(obj, newline=False):
+    """將回應序列化為 UTF-8 JSON bytes
+
+    安裝 orjson 時直接編碼 GameListing（dataclass），不先轉成字典；
+    否則退回標準 json 模組。newline=True 時在結尾加上換行（NDJSON）。
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, option=option)
+    payload = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default)
+    return (payload + '\n' if newline else payload).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(payload, status=200):
+    """以 dumps 產生 JSON 回應，取代 jsonify 以避免逐筆轉換刊登"""
+    # 命令列工具（cli.py）也使用本模組，不需要匯入 Flask
+    from flask import Response
+
+    return Response(dumps(payload), status=status, mimetype='application/json')
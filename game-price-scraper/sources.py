@@ -0,0 +1,697 @@
+import asyncio
+import contextvars
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from urllib.parse import quote
+
+from classifier import classify_platforms
+from config import Config
+from driver_pool import get_driver_pool
+from metrics import stage
+from models import GameListing
+from parsers import RUTEN_PARSER, YAHOO_PARSER, PCHOME_PARSER, parse_shopee_search
+from rate_limit import rate_limiter
+from resilience import CircuitOpenError, RateLimitTimeout, RetryPolicy, SourceError, get_breaker
+
+logger = logging.getLogger(__name__)
+
+# 已註冊的平台轉接器 {平台代碼: SourceAdapter}
+SOURCE_REGISTRY = {}
+
+# 非同步搜尋時執行同步 fetch() 的執行緒池 {平台代碼: ThreadPoolExecutor}
+_blocking_executors = {}
+_blocking_executors_lock = threading.Lock()
+
+# 同步深度搜尋時讀取後續頁面的執行緒池（整個程序共用，需要時才建立）
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+def register_source(adapter_cls):
+    """類別裝飾器：註冊平台轉接器，平台代碼需與 Config.PLATFORMS 的 key 相同"""
+    adapter = adapter_cls()
+    SOURCE_REGISTRY[adapter.code] = adapter
+    rate_limiter.configure(adapter.host, *adapter.rate_limit)
+    return adapter_cls
+
+
+def get_source(code):
+    return SOURCE_REGISTRY[code]
+
+
+def get_page_executor():
+    global _page_executor
+    if _page_executor is None:
+        with _page_executor_lock:
+            if _page_executor is None:
+                _page_executor = ThreadPoolExecutor(
+                    max_workers=Config.DEEP_SEARCH_WORKERS, thread_name_prefix='deep-page'
+                )
+    return _page_executor
+
+
+def get_enabled_sources(sources=None):
+    """回傳已啟用的平台轉接器，依 Config.PLATFORMS 的 priority 排序
+
+    sources 可指定只搜尋其中幾個平台（平台代碼列表）。
+    """
+    adapters = []
+    for code, adapter in SOURCE_REGISTRY.items():
+        settings = Config.PLATFORMS.get(code, {})
+        if not settings.get('enabled', False):
+            continue
+        if sources is not None and code not in sources:
+            continue
+        adapters.append(adapter)
+    adapters.sort(key=lambda adapter: Config.PLATFORMS[adapter.code].get('priority', 99))
+    return adapters
+
+
+class DeepSearchResults:
+    """深度搜尋時收集各頁的結果，只保留最便宜的 top_n 個
+
+    sorted_by_price 為 True 時，搜尋結果依價格由低到高排列：之後頁面的價格不會
+    低於已讀取頁面的最高價，因此已有 top_n 個有效結果時即可停止翻頁。
+    下限只依從第一頁起連續讀取成功的頁面計算，中間有頁面失敗或略過時，
+    該頁可能有更便宜的結果，不會因之後的頁面而提前停止。
+    """
+
+    def __init__(self, top_n, sorted_by_price):
+        self.top_n = top_n
+        self.sorted_by_price = sorted_by_price
+        self.listings = []
+        self.pages = 0
+        self.last_page = False
+        self._urls = set()
+        self._floor = 0  # 尚未讀取的頁面可能出現的最低價格
+        self._page_max = {}  # 已讀取、但前面仍有頁面未讀取成功的 {頁碼: 最高價}
+        self._next_page = 1  # 第一個尚未讀取成功的頁碼
+
+    def add(self, page, listings):
+        """加入第 page 頁（從 1 起算）的結果，空白的頁面視為最後一頁"""
+        self.pages += 1
+        if not listings:
+            self.last_page = True
+            return
+        if self.sorted_by_price:
+            self._page_max[page] = max(listing.price for listing in listings)
+            while self._next_page in self._page_max:
+                self._floor = max(self._floor, self._page_max.pop(self._next_page))
+                self._next_page += 1
+        for listing in listings:
+            # 翻頁時結果可能位移，同一個刊登只保留一次
+            if listing.url in self._urls:
+                continue
+            if not Config.MIN_PRICE_FILTER <= listing.price <= Config.MAX_PRICE_FILTER:
+                continue
+            self._urls.add(listing.url)
+            self.listings.append(listing)
+
+    def done(self):
+        """之後的頁面已不可能改變最便宜的 top_n 個結果"""
+        if self.last_page:
+            return True
+        if not self.sorted_by_price or len(self.listings) < self.top_n:
+            return False
+        return self.cheapest()[-1].price <= self._floor
+
+    def cheapest(self):
+        return heapq.nsmallest(self.top_n, self.listings, key=lambda listing: listing.price)
+
+
+class SourceAdapter:
+    """平台轉接器的共同介面
+
+    每個平台宣告：
+    - fetch_method: 'http'（requests + HTML 解析）或 'browser'（Selenium）
+    - selectors: 解析結果頁使用的選擇器
+    - host / rate_limit: 對該主機的 (每秒請求數, 突發量)，由程序共用的限速器執行
+    - base_url: 搜尋網址的前綴，可由 Config.SOURCE_BASE_URLS 覆寫（例如指向
+      benchmarks/fake_marketplace.py 的本機伺服器）
+    - cost: 相對成本，瀏覽器平台遠高於 HTTP 平台
+    - max_results: 每次搜尋最多取得的結果數（另受 MAX_RESULTS_PER_PLATFORM 限制）
+    - max_retries: 失敗時的重試次數，None 表示使用 Config.MAX_RETRIES
+    - max_concurrency: 批次搜尋時對該主機同時進行的搜尋數，None 表示使用
+      Config.BATCH_HOST_CONCURRENCY
+    - sorts_by_price: 搜尋網址可指定依價格由低到高排序，深度搜尋時可提前停止翻頁
+
+    scraper.deep 為 True 時（深度搜尋），search_url() 會帶入頁碼，各平台讀取最多
+    DEEP_SEARCH_MAX_PAGES 頁並回傳最便宜的 DEEP_SEARCH_TOP_N 個結果（見 DeepSearchResults）。
+
+    子類別實作 fetch()；search() 負責斷路器、重試與時限。search_async() 是供
+    AsyncGamePriceScraper 使用的非同步版本：HTTP 平台覆寫 fetch_async() 以
+    非同步 HTTP 客戶端發送請求，其他平台預設在執行緒中執行 fetch()。
+    """
+
+    code = None
+    host = None
+    base_url = None
+    fetch_method = 'http'
+    selectors = None
+    rate_limit = (1.0, 3)
+    cost = 1
+    max_results = 10
+    max_retries = None
+    max_concurrency = None
+    sorts_by_price = False
+
+    # 平台結果的預設欄位
+    condition = '二手'
+    seller = '未知賣家'
+    location = '台灣'
+
+    @property
+    def name(self):
+        return Config.PLATFORMS[self.code]['name']
+
+    @property
+    def limit(self):
+        return min(self.max_results, Config.MAX_RESULTS_PER_PLATFORM)
+
+    @property
+    def concurrency(self):
+        return self.max_concurrency or Config.BATCH_HOST_CONCURRENCY
+
+    def timeout(self, scraper):
+        """單一搜尋的時限（秒）：Config.SOURCE_TIMEOUTS 中該平台的設定，未設定時為 scraper.source_timeout"""
+        return Config.SOURCE_TIMEOUTS.get(self.code) or scraper.source_timeout
+
+    @property
+    def origin(self):
+        return (Config.SOURCE_BASE_URLS.get(self.code) or self.base_url).rstrip('/')
+
+    def search_url(self, game_name, page=1, sort_by_price=False):
+        """搜尋結果頁的網址，page 從 1 開始"""
+        raise NotImplementedError
+
+    def page_limit(self, scraper):
+        """每頁最多解析的結果數，深度搜尋時解析整頁"""
+        return Config.DEEP_SEARCH_PAGE_RESULTS if scraper.deep else self.limit
+
+    def deep_results(self):
+        return DeepSearchResults(Config.DEEP_SEARCH_TOP_N, self.sorts_by_price)
+
+    def deep_budget(self, deadline):
+        """深度搜尋翻頁的截止時間，不超過 DEEP_SEARCH_BUDGET 秒及剩餘的搜尋時限"""
+        return min(time.monotonic() + Config.DEEP_SEARCH_BUDGET, deadline)
+
+    def search(self, scraper, game_name):
+        """搜尋平台並回傳 GameListing 列表
+
+        失敗時依 RetryPolicy 重試（不超過 timeout(scraper)），最終仍失敗
+        則拋出例外；斷路器開啟時直接拋出 CircuitOpenError，不發送任何請求。
+        本機限速器等待逾時（RateLimitTimeout）不是平台的問題，不計入斷路器。
+        """
+        breaker = get_breaker(self.code)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.name} 近期連續失敗，暫時略過")
+
+        logger.info(f"搜尋{self.name}: {game_name}")
+        deadline = time.monotonic() + self.timeout(scraper)
+        policy = RetryPolicy(max_retries=self.max_retries)
+        try:
+            with stage('search', self.code):
+                listings = policy.call(
+                    lambda: self.fetch(scraper, game_name, deadline),
+                    deadline=deadline,
+                    description=f"搜尋{self.name}"
+                )
+        except RateLimitTimeout:
+            breaker.cancel()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        breaker.record_success()
+        return listings
+
+    async def search_async(self, scraper, game_name):
+        """search 的非同步版本，斷路器、重試與時限的規則相同"""
+        breaker = get_breaker(self.code)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.name} 近期連續失敗，暫時略過")
+
+        logger.info(f"搜尋{self.name}: {game_name}")
+        deadline = time.monotonic() + self.timeout(scraper)
+        policy = RetryPolicy(max_retries=self.max_retries)
+        try:
+            with stage('search', self.code):
+                listings = await policy.call_async(
+                    lambda: self.fetch_async(scraper, game_name, deadline),
+                    deadline=deadline,
+                    description=f"搜尋{self.name}"
+                )
+        except RateLimitTimeout:
+            breaker.cancel()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        breaker.record_success()
+        return listings
+
+    def fetch(self, scraper, game_name, deadline):
+        """實際取得並解析一次搜尋結果，失敗時拋出例外"""
+        raise NotImplementedError
+
+    async def fetch_async(self, scraper, game_name, deadline):
+        """fetch 的非同步版本，預設在 blocking_executor() 中執行 fetch()（例如 Selenium 平台）"""
+        loop = asyncio.get_running_loop()
+        # 複製 contextvars，讓執行緒中的各階段耗時記錄到目前請求的追蹤
+        return await loop.run_in_executor(
+            self.blocking_executor(),
+            partial(contextvars.copy_context().run, self.fetch, scraper, game_name, deadline)
+        )
+
+    def blocking_executor(self):
+        """非同步搜尋時執行 fetch() 的執行緒池，大小為 concurrency
+
+        每個平台各自一個，等待瀏覽器的搜尋只在這裡排隊，不會佔滿事件迴圈的預設執行緒池。
+        """
+        executor = _blocking_executors.get(self.code)
+        if executor is None:
+            with _blocking_executors_lock:
+                executor = _blocking_executors.get(self.code)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=self.concurrency, thread_name_prefix=f'{self.code}-fetch'
+                    )
+                    _blocking_executors[self.code] = executor
+        return executor
+
+    def make_listing(self, scraper, title, price, url, seller=None, location=None, platform=None):
+        return GameListing(
+            title=title,
+            price=price,
+            platform=platform or scraper.detect_platform(title),
+            condition=self.condition,
+            seller=seller or self.seller,
+            location=location or self.location,
+            url=url,
+            source=self.name
+        )
+
+    def acquire_slot(self, deadline):
+        """向限速器取得發送許可，只有在主機忙碌時才會等待"""
+        with stage('rate_limit', self.code):
+            allowed = rate_limiter.acquire(self.host, timeout=max(deadline - time.monotonic(), 0))
+        if not allowed:
+            raise RateLimitTimeout(f"{self.name} 需等待的時間超過搜尋時限")
+
+    async def acquire_slot_async(self, deadline):
+        with stage('rate_limit', self.code):
+            allowed = await rate_limiter.acquire_async(self.host, timeout=max(deadline - time.monotonic(), 0))
+        if not allowed:
+            raise RateLimitTimeout(f"{self.name} 需等待的時間超過搜尋時限")
+
+    def build_listings(self, scraper, items, **fields):
+        """將解析出的項目批次辨識遊戲平台並轉換為 GameListing
+
+        fields 為 {GameListing 欄位: 項目字典的鍵}，例如 seller='seller'。
+        """
+        with stage('classify', self.code):
+            platforms = classify_platforms(item['title'] for item in items)
+        with stage('extract', self.code):
+            return [
+                self.make_listing(
+                    scraper, item['title'], item['price'], item['url'], platform=platform,
+                    **{field: item[key] for field, key in fields.items()}
+                )
+                for item, platform in zip(items, platforms)
+            ]
+
+    def request_timeout(self, deadline):
+        """單次請求的逾時秒數，不超過 REQUEST_TIMEOUT 及剩餘的搜尋時限"""
+        return max(min(Config.REQUEST_TIMEOUT, deadline - time.monotonic()), 1)
+
+
+class HttpSourceAdapter(SourceAdapter):
+    """以 requests（或非同步的 httpx）取得結果頁，並以 parsers.ListingParser 解析的平台"""
+
+    fetch_method = 'http'
+
+    def fetch(self, scraper, game_name, deadline):
+        if scraper.deep:
+            return self.fetch_deep(scraper, game_name, deadline)
+        return self.fetch_page(scraper, game_name, deadline)
+
+    async def fetch_async(self, scraper, game_name, deadline):
+        if scraper.async_transport is None:
+            # 未安裝 httpx：與瀏覽器平台相同，在執行緒中執行同步的 fetch()
+            return await super().fetch_async(scraper, game_name, deadline)
+        if scraper.deep:
+            return await self.fetch_deep_async(scraper, game_name, deadline)
+        return await self.fetch_page_async(scraper, game_name, deadline)
+
+    def fetch_page(self, scraper, game_name, deadline, page=1):
+        self.acquire_slot(deadline)
+
+        with stage('fetch', self.code):
+            response = scraper.transport.get(
+                self.search_url(game_name, page, scraper.deep and self.sorts_by_price),
+                headers={'User-Agent': scraper.get_random_user_agent()},
+                timeout=self.request_timeout(deadline)
+            )
+        return self.parse_response(scraper, response)
+
+    async def fetch_page_async(self, scraper, game_name, deadline, page=1):
+        await self.acquire_slot_async(deadline)
+
+        with stage('fetch', self.code):
+            response = await scraper.async_transport.get(
+                self.search_url(game_name, page, scraper.deep and self.sorts_by_price),
+                headers={'User-Agent': scraper.get_random_user_agent()},
+                timeout=self.request_timeout(deadline)
+            )
+        return self.parse_response(scraper, response)
+
+    def fetch_deep(self, scraper, game_name, deadline):
+        """深度搜尋：讀取第一頁後，每次同時讀取 DEEP_SEARCH_PAGE_CONCURRENCY 頁
+
+        第一頁失敗時拋出例外（由 search() 重試）；後續頁面失敗或超過時限只會略過該頁。
+        """
+        results = self.deep_results()
+        results.add(1, self.fetch_page(scraper, game_name, deadline))
+        budget = self.deep_budget(deadline)
+
+        page = 2
+        while page <= Config.DEEP_SEARCH_MAX_PAGES and not results.done() and time.monotonic() < budget:
+            pages = range(page, min(page + Config.DEEP_SEARCH_PAGE_CONCURRENCY, Config.DEEP_SEARCH_MAX_PAGES + 1))
+            futures = [
+                get_page_executor().submit(
+                    contextvars.copy_context().run, self.fetch_page, scraper, game_name, budget, number
+                )
+                for number in pages
+            ]
+            done, not_done = wait(futures, timeout=max(budget - time.monotonic(), 0))
+            for future in not_done:
+                future.cancel()
+            # 依頁碼順序加入，讓空白頁（最後一頁）之後的頁面不再讀取
+            for number, future in zip(pages, futures):
+                if future not in done:
+                    logger.info(f"{self.name} 第 {number} 頁超過深度搜尋時限，略過")
+                    continue
+                try:
+                    results.add(number, future.result())
+                except Exception as e:
+                    logger.warning(f"{self.name} 第 {number} 頁讀取失敗: {e}")
+            if not_done:
+                break
+            page += len(pages)
+
+        logger.info(f"{self.name} 深度搜尋讀取 {results.pages} 頁，共 {len(results.listings)} 個結果")
+        return results.cheapest()
+
+    async def fetch_deep_async(self, scraper, game_name, deadline):
+        """fetch_deep 的非同步版本"""
+        results = self.deep_results()
+        results.add(1, await self.fetch_page_async(scraper, game_name, deadline))
+        budget = self.deep_budget(deadline)
+
+        page = 2
+        while page <= Config.DEEP_SEARCH_MAX_PAGES and not results.done() and time.monotonic() < budget:
+            pages = range(page, min(page + Config.DEEP_SEARCH_PAGE_CONCURRENCY, Config.DEEP_SEARCH_MAX_PAGES + 1))
+            tasks = [
+                asyncio.ensure_future(self.fetch_page_async(scraper, game_name, budget, number))
+                for number in pages
+            ]
+            done, not_done = await asyncio.wait(tasks, timeout=max(budget - time.monotonic(), 0))
+            for task in not_done:
+                task.cancel()
+            for number, task in zip(pages, tasks):
+                if task not in done:
+                    logger.info(f"{self.name} 第 {number} 頁超過深度搜尋時限，略過")
+                    continue
+                try:
+                    results.add(number, task.result())
+                except Exception as e:
+                    logger.warning(f"{self.name} 第 {number} 頁讀取失敗: {e}")
+            if not_done:
+                break
+            page += len(pages)
+
+        logger.info(f"{self.name} 深度搜尋讀取 {results.pages} 頁，共 {len(results.listings)} 個結果")
+        return results.cheapest()
+
+    def parse_response(self, scraper, response):
+        """檢查回應狀態並解析結果頁（requests 與 httpx 的回應皆可）"""
+        rate_limiter.on_response(
+            self.host, response.status_code, response.headers.get('Retry-After')
+        )
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise SourceError(f"HTTP {response.status_code}")
+        if response.status_code != 200:
+            raise SourceError(f"HTTP {response.status_code}", retryable=False)
+
+        # 以預先編譯的選擇器增量解析，取得足夠的項目後即停止
+        with stage('parse', self.code):
+            items = self.selectors.parse(response.content, self.page_limit(scraper))
+        return self.build_listings(scraper, items, seller='seller')
+
+
+@register_source
+class RutenSource(HttpSourceAdapter):
+    code = 'ruten'
+    host = 'www.ruten.com.tw'
+    base_url = 'https://www.ruten.com.tw'
+    selectors = RUTEN_PARSER
+    max_results = 10
+    sorts_by_price = True
+
+    def search_url(self, game_name, page=1, sort_by_price=False):
+        url = f"{self.origin}/find/?q={quote(game_name)}"
+        if sort_by_price:
+            url += '&sort=prc%2Fac'
+        if page > 1:
+            url += f'&p={page}'
+        return url
+
+
+# 在頁面載入前注入：記錄頁面自己發出的搜尋 API 回應，不需要再從 DOM 逐欄讀取
+_SHOPEE_SEARCH_HOOK = r"""
+(function () {
+    if (window.__searchHookInstalled) return;
+    window.__searchHookInstalled = true;
+    var pattern = /\/api\/v4\/search\/search_items/;
+    var store = function (url, body) {
+        if (!pattern.test(url)) return;
+        try { window.__shopeeSearch = typeof body === 'string' ? JSON.parse(body) : body; } catch (e) {}
+    };
+    var originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function (input) {
+            var url = input && input.url ? input.url : String(input);
+            return originalFetch.apply(this, arguments).then(function (response) {
+                if (pattern.test(url)) {
+                    response.clone().text().then(function (text) { store(url, text); });
+                }
+                return response;
+            });
+        };
+    }
+    var open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__searchUrl = String(url);
+        return open.apply(this, arguments);
+    };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        var xhr = this;
+        xhr.addEventListener('load', function () {
+            store(xhr.__searchUrl, xhr.responseType === 'json' ? xhr.response : xhr.responseText);
+        });
+        return send.apply(this, arguments);
+    };
+})();
+"""
+
+# 搜尋 API 已回應或商品項目已出現
+_SHOPEE_READY_SCRIPT = 'return !!window.__shopeeSearch || !!document.querySelector(arguments[0]);'
+
+# 一次取出所有商品項目的欄位，取代逐項逐欄的 find_element 往返
+_SHOPEE_ITEMS_SCRIPT = """
+var selectors = arguments[0], limit = arguments[1];
+var text = function (root, selector) {
+    var element = root.querySelector(selector);
+    return element ? element.textContent.trim() : '';
+};
+return Array.prototype.slice.call(document.querySelectorAll(selectors.item), 0, limit).map(function (item) {
+    var link = item.querySelector(selectors.link);
+    return {
+        title: text(item, selectors.title),
+        price: text(item, selectors.price),
+        url: link ? link.href : null,
+        location: text(item, selectors.location) || null
+    };
+});
+"""
+
+
+@register_source
+class ShopeeSource(SourceAdapter):
+    """蝦皮購物（Selenium）
+
+    等待搜尋結果出現（不再固定等待 3 秒）後，依 Config.SHOPEE_EXTRACTION：
+    - 'api'：讀取頁面自己發出的搜尋 API 回應（見 parsers.parse_shopee_search），
+      沒有攔截到時改由 DOM 擷取
+    - 'dom'：以單次 execute_script 取出所有商品項目的欄位
+
+    深度搜尋時以同一個瀏覽器依序翻頁（不另外借用瀏覽器），依價格排序後取得
+    足夠的結果即停止。
+    """
+
+    code = 'shopee'
+    host = 'shopee.tw'
+    base_url = 'https://shopee.tw'
+    fetch_method = 'browser'
+    selectors = {
+        'item': '[data-sqe="item"]',
+        'title': '[data-sqe="name"]',
+        'price': '.shopee-price',
+        'link': 'a',
+        'location': '.shopee-item-card__location',
+    }
+    rate_limit = (0.5, 2)
+    cost = 20  # 需要啟動 / 借用 Chrome，成本遠高於 HTTP 平台
+    max_results = 8
+    max_retries = 1  # 瀏覽器重試成本高，只重試一次
+    seller = '蝦皮賣家'
+    sorts_by_price = True
+
+    @property
+    def concurrency(self):
+        # 同時搜尋數超過瀏覽器數量只會在池中排隊
+        return min(Config.WEBDRIVER_POOL_SIZE, Config.BATCH_HOST_CONCURRENCY)
+
+    def search_url(self, game_name, page=1, sort_by_price=False):
+        url = f"{self.origin}/search?keyword={quote(game_name)}"
+        if sort_by_price:
+            url += '&order=asc&sortBy=price'
+        if page > 1:
+            url += f'&page={page - 1}'  # 蝦皮的頁碼從 0 開始
+        return url
+
+    def fetch(self, scraper, game_name, deadline):
+        self.acquire_slot(deadline)
+        use_api = Config.SHOPEE_EXTRACTION == 'api'
+        sort_by_price = scraper.deep and self.sorts_by_price
+
+        # 從共用池借出瀏覽器，離開 with 區塊時自動重設並歸還
+        with get_driver_pool().driver() as driver:
+            if use_api:
+                use_api = self.install_search_hook(driver)
+
+            url = self.search_url(game_name, 1, sort_by_price)
+            listings = self.load_page(driver, scraper, url, deadline, use_api)
+            if not scraper.deep:
+                return listings
+
+            results = self.deep_results()
+            results.add(1, listings)
+            budget = self.deep_budget(deadline)
+            for page in range(2, Config.DEEP_SEARCH_MAX_PAGES + 1):
+                if results.done() or time.monotonic() >= budget:
+                    break
+                if not rate_limiter.acquire(self.host, timeout=max(budget - time.monotonic(), 0)):
+                    break
+                url = self.search_url(game_name, page, sort_by_price)
+                try:
+                    results.add(page, self.load_page(driver, scraper, url, budget, use_api))
+                except Exception as e:
+                    logger.warning(f"{self.name} 第 {page} 頁讀取失敗: {e}")
+                    break
+
+        logger.info(f"{self.name} 深度搜尋讀取 {results.pages} 頁，共 {len(results.listings)} 個結果")
+        return results.cheapest()
+
+    def load_page(self, driver, scraper, url, deadline, use_api):
+        """以借出的瀏覽器載入一頁搜尋結果並轉換為 GameListing"""
+        # Selenium 在第一次使用瀏覽器平台時才匯入（見 driver_pool.preload_selenium）
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        # 等待搜尋 API 回應或商品項目出現，最多 SELENIUM_TIMEOUT 秒
+        with stage('fetch', self.code):
+            driver.get(url)
+            timeout = max(min(Config.SELENIUM_TIMEOUT, deadline - time.monotonic()), 1)
+            try:
+                WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                    lambda d: d.execute_script(_SHOPEE_READY_SCRIPT, self.selectors['item'])
+                )
+            except TimeoutException:
+                logger.warning(f"{self.name} 在 {timeout:.0f} 秒內沒有出現搜尋結果")
+
+        items = None
+        limit = self.page_limit(scraper)
+        with stage('parse', self.code):
+            if use_api:
+                data = driver.execute_script('return window.__shopeeSearch || null;')
+                if data:
+                    items = parse_shopee_search(data, limit)
+            if items is None:
+                items = [
+                    dict(item, price=scraper.extract_price(item['price']))
+                    for item in driver.execute_script(_SHOPEE_ITEMS_SCRIPT, self.selectors, limit)
+                ]
+
+        items = [item for item in items if item['price'] and item['title'] and item['url']]
+        return self.build_listings(scraper, items, location='location')
+
+    def install_search_hook(self, driver):
+        """在瀏覽器中註冊搜尋 API 的攔截腳本（每個瀏覽器只需一次），失敗時回傳 False"""
+        if getattr(driver, '_search_hook_installed', False):
+            return True
+        try:
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': _SHOPEE_SEARCH_HOOK})
+        except Exception as e:
+            logger.warning(f"註冊{self.name}搜尋 API 攔截失敗，改由 DOM 擷取: {e}")
+            return False
+        driver._search_hook_installed = True
+        return True
+
+
+@register_source
+class YahooAuctionSource(HttpSourceAdapter):
+    code = 'yahoo'
+    host = 'tw.bid.yahoo.com'
+    base_url = 'https://tw.bid.yahoo.com'
+    selectors = YAHOO_PARSER
+    max_results = 8
+    seller = 'Yahoo賣家'
+    sorts_by_price = True
+
+    def search_url(self, game_name, page=1, sort_by_price=False):
+        url = f"{self.origin}/search/auction/product?p={quote(game_name)}"
+        if sort_by_price:
+            url += '&sort=curp'
+        if page > 1:
+            url += f'&pg={page}'
+        return url
+
+
+@register_source
+class PChome24hSource(HttpSourceAdapter):
+    code = 'pchome'
+    host = '24h.pchome.com.tw'
+    base_url = 'https://24h.pchome.com.tw'
+    selectors = PCHOME_PARSER
+    rate_limit = (2.0, 4)
+    max_results = 5  # PChome通常是新品，限制較少結果
+    condition = '全新'  # PChome多為全新商品
+    seller = 'PChome'
+    sorts_by_price = True
+
+    def search_url(self, game_name, page=1, sort_by_price=False):
+        url = f"{self.origin}/search/v3.3/?q={quote(game_name)}"
+        if sort_by_price:
+            url += '&sort=prc%2Fac'
+        if page > 1:
+            url += f'&page={page}'
+        return url
@@ -1,34 +1,57 @@
 document.addEventListener('DOMContentLoaded', function() {
     const gameInput = document.getElementById('gameInput');
     const searchBtn = document.getElementById('searchBtn');
+    const deepSearch = document.getElementById('deepSearch');
     const loading = document.getElementById('loading');
     const results = document.getElementById('results');
     
-    // 搜尋建議列表
-    const searchSuggestions = [
-        '薩爾達傳說 王國之淚',
-        '超級瑪利歐兄弟 驚奇',
-        '寶可夢 朱紫',
-        'FIFA 24',
-        '戰神',
-        '最後生還者',
-        '血源詛咒',
-        '魔物獵人 崛起'
-    ];
+    // 平台名稱 -> 平台代碼（/results 的 source 參數使用平台代碼）
+    let platformCodes = {};
+    
+    // /results 每頁的結果數
+    const RESULTS_PAGE_SIZE = 20;
+    
+    // 搜尋建議（由 /api/suggest 取得）
+    const suggestionList = document.getElementById('suggestions');
+    let suggestionItems = [];
+    let activeSuggestion = -1;
+    let suggestTimer = null;
+    let suggestController = null;
     
     // 綁定事件
     searchBtn.addEventListener('click', performSearch);
-    gameInput.addEventListener('keypress', function(e) {
-        if (e.key === 'Enter') {
+    gameInput.addEventListener('keydown', function(e) {
+        // 輸入法選字時的按鍵不處理
+        if (e.isComposing) {
+            return;
+        }
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            if (suggestionItems.length > 0) {
+                e.preventDefault();
+                const step = e.key === 'ArrowDown' ? 1 : -1;
+                setActiveSuggestion((activeSuggestion + step + suggestionItems.length) % suggestionItems.length);
+            }
+        } else if (e.key === 'Escape') {
+            hideSuggestions();
+        } else if (e.key === 'Enter') {
+            if (activeSuggestion >= 0) {
+                gameInput.value = suggestionItems[activeSuggestion].name;
+            }
+            hideSuggestions();
             performSearch();
         }
     });
     
-    // 輸入提示
+    // 輸入提示：停止輸入 150 毫秒後取得建議，輸入框為空時顯示熱門搜尋
     gameInput.addEventListener('input', function() {
-        const value = this.value.toLowerCase();
-        // 這裡可以加入搜尋建議功能
+        clearTimeout(suggestTimer);
+        const query = this.value.trim();
+        suggestTimer = setTimeout(() => loadSuggestions(query), 150);
+    });
+    gameInput.addEventListener('focus', function() {
+        loadSuggestions(this.value.trim());
     });
+    gameInput.addEventListener('blur', hideSuggestions);
     
     // 載入支援的平台
     loadSupportedPlatforms();
@@ -52,26 +75,48 @@ document.addEventListener('DOMContentLoaded', function() {
         setLoadingState(true);
         
         try {
-            const response = await fetch('/search', {
+            // 使用串流端點，每個平台完成後立即顯示結果
+            const response = await fetch('/search/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ game_name: gameName }),
-                // 增加超時時間，因為真實搜尋需要更多時間
+                body: JSON.stringify({ game_name: gameName, deep: deepSearch.checked }),
+                // 整體搜尋的超時時間，個別平台的結果會先行顯示
                 signal: AbortSignal.timeout(60000) // 60秒超時
             });
             
             if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                const data = await response.json().catch(() => ({}));
+                throw new Error(data.error || `HTTP ${response.status}: ${response.statusText}`);
             }
             
-            const data = await response.json();
+            const state = { listings: [], totalSources: 0, completedSources: 0, finished: false };
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
             
-            if (data.success) {
-                displayResults(data.results, data.count, data.search_term);
-            } else {
-                throw new Error(data.error || '搜尋失敗');
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                
+                // NDJSON：每一行是一個完整的事件
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.filter(line => line.trim()).forEach(line => {
+                    handleSearchEvent(JSON.parse(line), state, gameName);
+                });
+            }
+            
+            if (buffer.trim()) {
+                handleSearchEvent(JSON.parse(buffer), state, gameName);
+            }
+            
+            if (!state.finished) {
+                throw new Error('搜尋未完成，連線已中斷');
             }
             
         } catch (error) {
@@ -89,8 +134,120 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    function handleSearchEvent(event, state, gameName) {
+        switch (event.type) {
+            case 'start':
+                // 別名會換成標準名稱搜尋（例如「totk」→「薩爾達傳說 王國之淚」）
+                state.searchTerm = event.search_term;
+                state.totalSources = event.sources.length;
+                updateLoadingProgress(0, state.totalSources);
+                break;
+            case 'source':
+                state.completedSources++;
+                updateLoadingProgress(state.completedSources, state.totalSources);
+                if (event.results.length > 0) {
+                    state.listings = state.listings.concat(event.results);
+                    state.listings.sort((a, b) => a.price - b.price);
+                    displayResults(state.listings, state.listings.length, state.searchTerm || gameName);
+                }
+                break;
+            case 'summary':
+                state.finished = true;
+                displayResults(event.results, event.count, event.search_term);
+                // 之後的篩選、排序與分頁由伺服器以快取的結果處理，不需重新搜尋
+                window.currentSearch = { gameName: event.search_term, deep: deepSearch.checked };
+                if (event.count > 0) {
+                    window.refineResults(1);
+                }
+                break;
+            case 'error':
+                throw new Error(event.error || '搜尋失敗');
+        }
+    }
+    
+    async function loadSuggestions(query) {
+        if (suggestController) {
+            suggestController.abort();
+        }
+        suggestController = new AbortController();
+        try {
+            const response = await fetch(`/api/suggest?q=${encodeURIComponent(query)}`, {
+                signal: suggestController.signal
+            });
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            // 回應送達前已繼續輸入或離開輸入框時不顯示
+            if (gameInput.value.trim() !== query || document.activeElement !== gameInput) {
+                return;
+            }
+            showSuggestions(data.suggestions);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('載入搜尋建議失敗:', error);
+            }
+        }
+    }
+    
+    function showSuggestions(suggestions) {
+        suggestionItems = suggestions;
+        activeSuggestion = -1;
+        suggestionList.innerHTML = '';
+        suggestions.forEach(suggestion => {
+            const item = document.createElement('li');
+            item.setAttribute('role', 'option');
+            const name = document.createElement('span');
+            name.textContent = suggestion.name;
+            item.appendChild(name);
+            // 以別名找到時顯示相符的別名，例如「totk」
+            if (suggestion.alias) {
+                const alias = document.createElement('span');
+                alias.className = 'suggestion-alias';
+                alias.textContent = suggestion.alias;
+                item.appendChild(alias);
+            }
+            item.addEventListener('mousedown', function(e) {
+                e.preventDefault(); // 避免輸入框先失去焦點而隱藏建議
+                gameInput.value = suggestion.name;
+                hideSuggestions();
+                performSearch();
+            });
+            suggestionList.appendChild(item);
+        });
+        suggestionList.classList.toggle('hidden', suggestions.length === 0);
+        gameInput.setAttribute('aria-expanded', String(suggestions.length > 0));
+    }
+    
+    function setActiveSuggestion(index) {
+        const items = suggestionList.querySelectorAll('li');
+        items.forEach((item, i) => item.classList.toggle('active', i === index));
+        activeSuggestion = index;
+        items[index].scrollIntoView({ block: 'nearest' });
+    }
+    
+    function hideSuggestions() {
+        clearTimeout(suggestTimer);
+        if (suggestController) {
+            suggestController.abort();
+            suggestController = null;
+        }
+        suggestionItems = [];
+        activeSuggestion = -1;
+        suggestionList.classList.add('hidden');
+        gameInput.setAttribute('aria-expanded', 'false');
+    }
+    
+    function updateLoadingProgress(completed, total) {
+        const message = loading.querySelector('p');
+        message.textContent = total > 0
+            ? `正在搜尋各大平台中... (${completed}/${total})`
+            : '正在搜尋各大平台中...';
+    }
+    
     function setLoadingState(isLoading) {
         if (isLoading) {
+            updateLoadingProgress(0, 0);
             loading.classList.remove('hidden');
             results.innerHTML = '';
             searchBtn.disabled = true;
@@ -148,38 +305,52 @@ document.addEventListener('DOMContentLoaded', function() {
         
         results.innerHTML = `
             <div class="results-header">
-                <h3>「${searchTerm}」搜尋結果 (${count} 個)</h3>
-                <div class="price-stats">
-                    <span>最低價格: <strong>$${priceStats.min.toLocaleString()}</strong></span>
-                    <span>平均價格: <strong>$${priceStats.avg.toLocaleString()}</strong></span>
-                    <span>最高價格: <strong>$${priceStats.max.toLocaleString()}</strong></span>
+                <h3 id="resultsTitle">「${searchTerm}」搜尋結果 (${count} 個)</h3>
+                <div class="price-stats" id="priceStats">
+                    ${priceStatsHtml(priceStats)}
                 </div>
                 <div class="filter-options">
-                    <select id="platformFilter" onchange="filterResults()">
+                    <select id="platformFilter" onchange="refineResults(1)">
                         <option value="all">所有平台</option>
                         ${getUniquePlatforms(listings).map(platform => 
                             `<option value="${platform}">${platform}</option>`
                         ).join('')}
                     </select>
-                    <select id="conditionFilter" onchange="filterResults()">
+                    <select id="conditionFilter" onchange="refineResults(1)">
                         <option value="all">所有狀況</option>
                         <option value="全新">全新</option>
                         <option value="二手">二手</option>
                     </select>
-                    <select id="sortBy" onchange="sortResults()">
-                        <option value="price">價格排序</option>
+                    <select id="sourceFilter" onchange="refineResults(1)">
+                        <option value="all">所有來源</option>
+                        ${getUniqueSources(listings).map(source => 
+                            `<option value="${platformCodes[source] || source}">${source}</option>`
+                        ).join('')}
+                    </select>
+                    <input type="number" id="minPrice" placeholder="最低價" min="0" onchange="refineResults(1)" />
+                    <input type="number" id="maxPrice" placeholder="最高價" min="0" onchange="refineResults(1)" />
+                    <select id="sortBy" onchange="refineResults(1)">
+                        <option value="price">價格由低到高</option>
+                        <option value="-price">價格由高到低</option>
                         <option value="platform">平台排序</option>
                         <option value="condition">狀況排序</option>
+                        <option value="source">來源排序</option>
                     </select>
                 </div>
             </div>
             <div class="results-grid" id="resultsGrid">
                 ${resultsHtml}
             </div>
+            <div class="results-pager" id="resultsPager"></div>
+        `;
+    }
+    
+    function priceStatsHtml(priceStats) {
+        return `
+            <span>最低價格: <strong>$${priceStats.min.toLocaleString()}</strong></span>
+            <span>平均價格: <strong>$${priceStats.avg.toLocaleString()}</strong></span>
+            <span>最高價格: <strong>$${priceStats.max.toLocaleString()}</strong></span>
         `;
-        
-        // 儲存原始結果供過濾使用
-        window.currentResults = listings;
     }
     
     function groupByPlatform(listings) {
@@ -206,6 +377,10 @@ document.addEventListener('DOMContentLoaded', function() {
         return [...new Set(listings.map(l => l.platform))];
     }
     
+    function getUniqueSources(listings) {
+        return [...new Set(listings.map(l => l.source))];
+    }
+    
     function truncateTitle(title, maxLength) {
         return title.length > maxLength ? title.substring(0, maxLength) + '...' : title;
     }
@@ -215,41 +390,69 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // 全域函數供HTML調用
-    window.filterResults = function() {
-        const platformFilter = document.getElementById('platformFilter').value;
-        const conditionFilter = document.getElementById('conditionFilter').value;
-        
-        let filteredResults = window.currentResults;
-        
-        if (platformFilter !== 'all') {
-            filteredResults = filteredResults.filter(item => item.platform === platformFilter);
+    // 以 /results 篩選、排序與分頁已快取的搜尋結果，只取回目前這一頁
+    window.refineResults = async function(page) {
+        const search = window.currentSearch;
+        if (!search) {
+            return;
         }
         
-        if (conditionFilter !== 'all') {
-            filteredResults = filteredResults.filter(item => item.condition === conditionFilter);
-        }
+        const params = new URLSearchParams({
+            game_name: search.gameName,
+            deep: search.deep,
+            sort: document.getElementById('sortBy').value,
+            page: page,
+            limit: RESULTS_PAGE_SIZE
+        });
+        const filters = {
+            platform: document.getElementById('platformFilter').value,
+            condition: document.getElementById('conditionFilter').value,
+            source: document.getElementById('sourceFilter').value
+        };
+        Object.entries(filters).forEach(([name, value]) => {
+            if (value !== 'all') {
+                params.set(name, value);
+            }
+        });
+        ['minPrice', 'maxPrice'].forEach((id, i) => {
+            const value = document.getElementById(id).value;
+            if (value !== '') {
+                params.set(i === 0 ? 'min_price' : 'max_price', value);
+            }
+        });
         
-        updateResultsDisplay(filteredResults);
+        try {
+            const response = await fetch(`/results?${params}`);
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || `HTTP ${response.status}`);
+            }
+            
+            document.getElementById('resultsTitle').textContent =
+                `「${data.search_term}」搜尋結果 (${data.total} 個)`;
+            if (data.price_stats) {
+                document.getElementById('priceStats').innerHTML = priceStatsHtml(data.price_stats);
+            }
+            updateResultsDisplay(data.results);
+            updatePager(data.page, data.pages);
+        } catch (error) {
+            console.error('載入結果失敗:', error);
+            showError(`載入結果失敗: ${error.message}，請重新搜尋`);
+        }
     };
     
-    window.sortResults = function() {
-        const sortBy = document.getElementById('sortBy').value;
-        let sortedResults = [...window.currentResults];
-        
-        switch(sortBy) {
-            case 'price':
-                sortedResults.sort((a, b) => a.price - b.price);
-                break;
-            case 'platform':
-                sortedResults.sort((a, b) => a.platform.localeCompare(b.platform));
-                break;
-            case 'condition':
-                sortedResults.sort((a, b) => a.condition.localeCompare(b.condition));
-                break;
+    function updatePager(page, pages) {
+        const pager = document.getElementById('resultsPager');
+        if (pages <= 1) {
+            pager.innerHTML = '';
+            return;
         }
-        
-        updateResultsDisplay(sortedResults);
-    };
+        pager.innerHTML = `
+            <button ${page <= 1 ? 'disabled' : ''} onclick="refineResults(${page - 1})">上一頁</button>
+            <span>第 ${page} / ${pages} 頁</span>
+            <button ${page >= pages ? 'disabled' : ''} onclick="refineResults(${page + 1})">下一頁</button>
+        `;
+    }
     
     window.toggleCompare = function(index) {
         // 實現商品比較功能
@@ -263,7 +466,7 @@ document.addEventListener('DOMContentLoaded', function() {
             <div class="result-card" data-index="${index}">
                 <div class="result-header">
                     <div class="result-title" title="${listing.title}">${truncateTitle(listing.title, 60)}</div>
-                    <div class="result-price">${listing.price.toLocaleString()}</div>
+                    <div class="result-price">$${listing.price.toLocaleString()}</div>
                 </div>
                 <div class="result-meta">
                     <span class="platform-badge platform-${listing.platform.toLowerCase().replace(/[^a-z0-9]/g, '')}">${listing.platform}</span>
@@ -287,7 +490,9 @@ document.addEventListener('DOMContentLoaded', function() {
         try {
             const response = await fetch('/api/platforms');
             const data = await response.json();
-            console.log('支援的平台:', data.platforms);
+            data.platforms.forEach(platform => {
+                platformCodes[platform.name] = platform.code;
+            });
         } catch (error) {
             console.error('載入平台清單失敗:', error);
         }
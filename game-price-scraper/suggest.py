@@ -0,0 +1,260 @@
+import bisect
+import heapq
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+
+from cache import normalize_game_name
+from config import Config
+from dedup import normalize_title
+from price_history import get_price_history
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR_RE = re.compile(r'[\W_]+')
+_RUN_RE = re.compile(r'([a-z0-9]+)|[^a-z0-9]+')
+
+# 搜尋建議的來源：別名表的標準名稱、使用者搜尋過的名稱、爬取到的商品標題
+ALIAS, SEARCH, TITLE = 'alias', 'search', 'title'
+
+# 每次搜尋的權重（商品標題每出現一次的權重為 1）
+_SEARCH_WEIGHT = 5
+
+
+def compact_key(name):
+    """比對用的鍵：normalize_game_name 後移除空白與標點
+
+    「魔物獵人崛起」與「魔物獵人 崛起」、「FIFA24」與「FIFA 24」、
+    「薩爾達傳說：王國之淚」與「薩爾達傳說 王國之淚」視為相同。
+    """
+    return _SEPARATOR_RE.sub('', normalize_game_name(name))
+
+
+def ngrams(key):
+    """比對部分輸入與錯字用的 n-gram：中文沒有斷詞，取連續兩字；英數字取連續三字
+
+    英數字只取兩字時太容易相符（例如 zelda 與 elden 共有 el、ld）。
+    """
+    grams = set()
+    for run, size in ((match.group(), 3 if match.group(1) else 2) for match in _RUN_RE.finditer(key)):
+        if len(run) <= size:
+            grams.add(run)
+        else:
+            grams.update(run[i:i + size] for i in range(len(run) - size + 1))
+    return grams
+
+
+def load_aliases():
+    """回傳 {標準名稱: [別名]}：Config.GAME_ALIASES 加上 GAME_ALIASES_PATH 的 JSON 檔"""
+    aliases = {name: list(values) for name, values in Config.GAME_ALIASES.items()}
+    if Config.GAME_ALIASES_PATH:
+        try:
+            with open(Config.GAME_ALIASES_PATH, encoding='utf-8') as f:
+                for name, values in json.load(f).items():
+                    aliases.setdefault(name, []).extend(values)
+        except (OSError, ValueError) as e:
+            logger.error(f"載入遊戲別名失敗: {e}")
+    return aliases
+
+
+class _Entry:
+    __slots__ = ('name', 'kind', 'searches', 'titles', 'terms')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.searches = 0
+        self.titles = 0
+        self.terms = {}  # 比對用的鍵 -> 顯示的名稱或別名
+
+    @property
+    def weight(self):
+        return self.searches * _SEARCH_WEIGHT + self.titles
+
+
+class SuggestIndex:
+    """程序內的搜尋建議索引，並將同義的搜尋名稱正規化為同一個名稱
+
+    - 項目來自別名表（中英文名稱、簡稱）、成功的搜尋，以及搜尋結果中出現在
+      多筆刊登的商品標題；啟用價格歷史時，第一次使用時載入有爬取紀錄的遊戲
+    - 依比對用的鍵排序的列表以二分搜尋找出前綴相符的項目，n-gram 的反向索引
+      找出部分相符或有錯字的項目，再依相符程度與搜尋次數排序
+    - canonicalize 將別名與只差在大小寫、全半形、空白或標點的名稱對應到同一個
+      標準名稱，讓等價的搜尋共用同一組快取與爬取；商品標題不會成為標準名稱
+    - 項目數超過 SUGGEST_MAX_ENTRIES 時移除權重最低的搜尋與標題項目
+    """
+
+    def __init__(self, aliases=None, history=None, max_entries=None):
+        self.max_entries = max_entries or Config.SUGGEST_MAX_ENTRIES
+        self._aliases = load_aliases() if aliases is None else aliases
+        self._history = history
+        self._loaded = False
+        self._lock = threading.RLock()
+
+        self._entries = {}     # 標準名稱的鍵 -> _Entry
+        self._canonical = {}   # 別名或搜尋名稱的鍵 -> 標準名稱的鍵
+        self._terms = []       # 依鍵排序的 (比對用的鍵, 標準名稱的鍵)
+        self._grams = {}       # n-gram -> 含此 n-gram 的標準名稱鍵集合
+
+    # 建立索引
+
+    def _ensure_loaded(self):
+        """第一次使用時建立索引，避免匯入 app.py 時讀取價格歷史"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for name, aliases in self._aliases.items():
+                entry = self._add_entry(name, ALIAS)
+                for alias in aliases:
+                    self._add_term(entry, alias)
+            history = self._history or get_price_history()
+            if history is not None:
+                try:
+                    for game_key, searches in history.searched_games(self.max_entries // 2):
+                        entry = self._entries.get(self._canonical.get(compact_key(game_key)))
+                        if entry is None:
+                            entry = self._add_entry(game_key, SEARCH)
+                        entry.searches += searches
+                except Exception as e:
+                    logger.error(f"由價格歷史載入搜尋建議失敗: {e}")
+            self._loaded = True
+
+    def _add_entry(self, name, kind):
+        key = compact_key(name)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(name, kind)
+            self._add_term(entry, name)
+        return entry
+
+    def _add_term(self, entry, term):
+        term_key = compact_key(term)
+        if not term_key or term_key in entry.terms:
+            return
+        entry_key = compact_key(entry.name)
+        entry.terms[term_key] = term
+        bisect.insort(self._terms, (term_key, entry_key))
+        for gram in ngrams(term_key):
+            self._grams.setdefault(gram, set()).add(entry_key)
+        if entry.kind != TITLE:
+            self._canonical.setdefault(term_key, entry_key)
+
+    def record_search(self, game_name, clusters=()):
+        """記錄一次有結果的搜尋，並加入出現在多筆刊登的商品標題"""
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(self._canonical.get(compact_key(game_name)))
+            if entry is None:
+                entry = self._add_entry(game_name, SEARCH)
+                if entry.kind == TITLE:
+                    # 之前只出現在商品標題中，有人搜尋後也可作為標準名稱
+                    entry.kind = SEARCH
+                    entry_key = compact_key(entry.name)
+                    for term_key in entry.terms:
+                        self._canonical.setdefault(term_key, entry_key)
+            entry.searches += 1
+
+            popular = sorted(
+                (cluster for cluster in clusters if cluster.count >= Config.SUGGEST_MIN_CLUSTER_SIZE),
+                key=lambda cluster: cluster.count, reverse=True
+            )
+            for cluster in popular[:Config.SUGGEST_TITLES_PER_SEARCH]:
+                title = normalize_title(cluster.title)
+                if 2 <= len(compact_key(title)) <= Config.SUGGEST_MAX_TITLE_LENGTH:
+                    self._add_entry(title, TITLE).titles += cluster.count
+
+            if len(self._entries) > self.max_entries * 1.1:
+                self._prune_locked()
+
+    def _prune_locked(self):
+        removable = sorted(
+            (entry.weight, key) for key, entry in self._entries.items() if entry.kind != ALIAS
+        )
+        excess = len(self._entries) - self.max_entries
+        removed = {key for _, key in removable[:excess]}
+        for key in removed:
+            del self._entries[key]
+        self._canonical = {term: key for term, key in self._canonical.items() if key not in removed}
+        self._terms = [term for term in self._terms if term[1] not in removed]
+        for gram in list(self._grams):
+            self._grams[gram] -= removed
+            if not self._grams[gram]:
+                del self._grams[gram]
+
+    # 查詢
+
+    def canonicalize(self, game_name):
+        """回傳別名或等價名稱對應的標準名稱，沒有對應時回傳原名稱"""
+        if not Config.SUGGEST_CANONICALIZE:
+            return game_name
+        self._ensure_loaded()
+        with self._lock:
+            key = self._canonical.get(compact_key(game_name))
+            return self._entries[key].name if key is not None else game_name
+
+    def suggest(self, query, limit=None):
+        """回傳 [{'name': 標準名稱, 'alias': 相符的別名或 None, 'searches': 搜尋次數}]
+
+        query 為空時回傳最常搜尋的遊戲。
+        """
+        self._ensure_loaded()
+        limit = limit or Config.SUGGEST_LIMIT
+        query_key = compact_key(query or '')
+        with self._lock:
+            if not query_key:
+                entries = (entry for entry in self._entries.values() if entry.kind != TITLE)
+                top = heapq.nlargest(limit, entries, key=lambda entry: entry.weight)
+                return [self._suggestion(entry, None) for entry in top]
+
+            scores = {}   # 標準名稱的鍵 -> (分數, 相符的鍵)
+            # 前綴相符：完全相符 3 分，其他 2 分
+            start = bisect.bisect_left(self._terms, (query_key,))
+            for term_key, entry_key in self._terms[start:start + Config.SUGGEST_MAX_CANDIDATES]:
+                if not term_key.startswith(query_key):
+                    break
+                score = 3.0 if term_key == query_key else 2.0
+                if score > scores.get(entry_key, (0.0,))[0]:
+                    scores[entry_key] = (score, term_key)
+
+            # 部分相符：查詢的 n-gram 出現在項目中的比例（0 到 1 分）
+            grams = ngrams(query_key)
+            if len(query_key) >= 2:
+                matches = Counter()
+                for gram in grams:
+                    matches.update(self._grams.get(gram, ()))
+                for entry_key, count in matches.items():
+                    similarity = count / len(grams)
+                    if similarity >= Config.SUGGEST_MIN_SIMILARITY and entry_key not in scores:
+                        scores[entry_key] = (similarity, None)
+
+            def rank(item):
+                entry_key, (score, _) = item
+                return score + 0.05 * math.log1p(self._entries[entry_key].weight)
+
+            top = heapq.nlargest(limit, scores.items(), key=rank)
+            return [self._suggestion(self._entries[key], term_key) for key, (_, term_key) in top]
+
+    def _suggestion(self, entry, term_key):
+        alias = entry.terms.get(term_key) if term_key is not None else None
+        return {
+            'name': entry.name,
+            'alias': alias if alias is not None and alias != entry.name else None,
+            'searches': entry.searches,
+        }
+
+    def stats(self):
+        with self._lock:
+            kinds = Counter(entry.kind for entry in self._entries.values())
+            return {
+                'entries': len(self._entries),
+                'terms': len(self._terms),
+                'aliases': kinds[ALIAS],
+                'searches': kinds[SEARCH],
+                'titles': kinds[TITLE],
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# 測試不寫入暫存目錄中的共用快取、價格歷史與追蹤清單，也不啟動瀏覽器預熱與價格追蹤排程
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+os.environ.setdefault('HISTORY_ENABLED', 'False')
+os.environ.setdefault('START_BACKGROUND_TASKS', 'False')
+os.environ.setdefault('WATCH_PATH', os.path.join(tempfile.mkdtemp(), 'price_watch.sqlite3'))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import pytest
+
+from app import app
+
+INVALID_BODIES = [[1], 'game', {'game_name': 5}, {'game_name': None}, {'game_names': 'Zelda'}]
+
+
+@pytest.mark.parametrize('path', ['/search', '/search/stream', '/search/batch'])
+@pytest.mark.parametrize('body', INVALID_BODIES)
+def test_invalid_json_bodies_return_400(path, body):
+    response = app.test_client().post(path, json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('path', ['/search', '/search/stream'])
+@pytest.mark.parametrize('body', INVALID_BODIES)
+def test_asgi_invalid_json_bodies_return_400(path, body):
+    pytest.importorskip('a2wsgi')
+    import asgi
+
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps(body).encode(), 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': [], 'query_string': b''}
+    asyncio.run(asgi.app(scope, receive, send))
+    assert sent[0]['status'] == 400
@@ -0,0 +1,73 @@
+import threading
+
+from cache import SearchCache
+from cache_store import MemoryStore
+from models import GameListing
+
+
+def make_listing(title, price=1000):
+    return GameListing(title, price, 'Nintendo Switch', '二手', '賣家', '台灣', f'https://example.com/{title}', 'ruten')
+
+
+class BlockingStore(MemoryStore):
+    """讀取指定的鍵時停住，直到 release 被設定，模擬很慢的 SQLite / Redis"""
+
+    def __init__(self, slow_key):
+        super().__init__(timeout=60, max_entries=100)
+        self.slow_key = slow_key
+        self.reading = threading.Event()
+        self.release = threading.Event()
+
+    def _get(self, key):
+        if key == self.slow_key:
+            self.reading.set()
+            self.release.wait(5)
+        return super()._get(key)
+
+
+def test_slow_store_read_does_not_block_other_requests():
+    cache = SearchCache(MemoryStore(60, 100))
+    store = BlockingStore(cache.make_key('慢', 'ruten'))
+    cache.store = store
+    cache.set('快', 'ruten', [make_listing('快')])
+
+    slow = threading.Thread(target=lambda: list(cache.iter_results('慢', ['ruten'], lambda *_: iter(()))))
+    slow.start()
+    try:
+        assert store.reading.wait(5)
+        done = threading.Event()
+        fast = threading.Thread(target=lambda: (list(cache.iter_results('快', ['ruten'], None)), done.set()))
+        fast.start()
+        # 另一個請求讀取 store 時，命中快取的請求不需等待
+        assert done.wait(1)
+        assert 'in_flight' in cache.stats()
+    finally:
+        store.release.set()
+        slow.join(5)
+
+
+def test_concurrent_requests_share_one_fetch():
+    cache = SearchCache(MemoryStore(60, 100))
+    calls = []
+    started = threading.Event()
+    finish = threading.Event()
+
+    def fetch(game_name, sources):
+        calls.append(sources)
+        started.set()
+        finish.wait(5)
+        yield 'ruten', [make_listing(game_name)], 'ok'
+
+    results = []
+    first = threading.Thread(target=lambda: results.extend(cache.iter_results('遊戲', ['ruten'], fetch)))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=lambda: results.extend(cache.iter_results('遊戲', ['ruten'], fetch)))
+    second.start()
+    finish.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert [(source, status) for source, _, status, _ in results] == [('ruten', 'ok'), ('ruten', 'ok')]
+    assert cache.get('遊戲', 'ruten')[0].title == '遊戲'
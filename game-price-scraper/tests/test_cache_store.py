@@ -0,0 +1,145 @@
+import fnmatch
+import sqlite3
+import time
+
+import pytest
+
+from cache_store import MemoryStore, RedisStore, SQLiteStore
+from models import GameListing
+
+
+def make_listing(title, price=1000):
+    return GameListing(title, price, 'Nintendo Switch', '二手', '賣家', '台灣', f'https://example.com/{title}', 'ruten')
+
+
+class FakeRedis:
+    """RedisStore 使用到的 redis.Redis 方法（get/setex/expire/delete/scan_iter）"""
+
+    def __init__(self):
+        self.data = {}
+
+    def _alive(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self.data[key]
+            entry = None
+        return entry
+
+    def get(self, key):
+        entry = self._alive(key)
+        return entry[1] if entry else None
+
+    def setex(self, key, seconds, value):
+        self.data[key] = (time.monotonic() + seconds, value)
+
+    def expire(self, key, seconds):
+        entry = self._alive(key)
+        if entry is None:
+            return False
+        self.data[key] = (time.monotonic() + seconds, entry[1])
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match='*'):
+        return [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatch(key, match)]
+
+
+def make_store(backend, tmp_path, timeout=60, max_entries=100):
+    if backend == 'memory':
+        return MemoryStore(timeout, max_entries)
+    if backend == 'sqlite':
+        store = SQLiteStore(str(tmp_path / 'cache.sqlite3'), timeout, max_entries)
+        store.PURGE_EVERY = 1  # 每次寫入都清除，讓淘汰的行為與 MemoryStore 相同
+        return store
+    return RedisStore(timeout, client=FakeRedis())
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request):
+    return request.param
+
+
+def test_round_trip(backend, tmp_path):
+    store = make_store(backend, tmp_path)
+    listings = [make_listing('薩爾達'), make_listing('瑪利歐', 1290)]
+    assert store.get('ruten:薩爾達') is None
+    store.set('ruten:薩爾達', listings)
+    assert store.get('ruten:薩爾達') == listings
+    assert store.size() == 1
+    assert store.stats()['hits'] == 1 and store.stats()['misses'] == 1
+
+
+def test_expired_entries_are_not_returned(backend, tmp_path):
+    if backend == 'redis':
+        pytest.skip('Redis 的期限以整數秒設定，由伺服器處理')
+    store = make_store(backend, tmp_path, timeout=0.05)
+    store.set('key', [make_listing('a')])
+    time.sleep(0.1)
+    assert store.get('key') is None
+    assert store.size() == 0
+
+
+def test_touch_extends_existing_entries_only(backend, tmp_path):
+    store = make_store(backend, tmp_path)
+    assert store.touch('missing') is False
+    store.set('key', [make_listing('a')])
+    assert store.touch('key') is True
+    assert store.get('key') == [make_listing('a')]
+
+
+def test_delete_and_clear(backend, tmp_path):
+    store = make_store(backend, tmp_path)
+    for key in ('a', 'b', 'c'):
+        store.set(key, [make_listing(key)])
+    store.delete('a')
+    assert store.get('a') is None
+    assert store.size() == 2
+    store.clear()
+    assert store.size() == 0
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_evicts_least_recently_used(backend, tmp_path):
+    # SQLite 的最後使用時間精度為快取時間的 1/10
+    store = make_store(backend, tmp_path, timeout=0.5, max_entries=2)
+    store.set('a', [make_listing('a')])
+    store.set('b', [make_listing('b')])
+    time.sleep(0.06)
+    assert store.get('a') is not None  # a 比 b 晚使用
+    store.set('c', [make_listing('c')])
+    assert store.get('b') is None
+    assert store.get('a') is not None
+    assert store.get('c') is not None
+
+
+def test_sqlite_store_adds_access_column_to_old_tables(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE search_cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)')
+    conn.commit()
+    conn.close()
+    store = SQLiteStore(path, 60, 10)
+    store.set('key', [make_listing('a')])
+    assert store.get('key') == [make_listing('a')]
+
+
+def test_sqlite_store_throttles_access_time_updates(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    store = SQLiteStore(path, 60, 10)
+    store.set('key', [make_listing('a')])
+
+    def accessed_at():
+        with sqlite3.connect(path) as conn:
+            return conn.execute('SELECT accessed_at FROM search_cache WHERE key = ?', ('key',)).fetchone()[0]
+
+    written = accessed_at()
+    assert store.get('key') is not None
+    assert accessed_at() == written  # 精度內的讀取不寫入
+
+    with sqlite3.connect(path) as conn:
+        conn.execute('UPDATE search_cache SET accessed_at = ?', (written - 10,))
+    assert store.get('key') is not None
+    assert accessed_at() >= written
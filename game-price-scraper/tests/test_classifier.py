@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from classifier import UNKNOWN_PLATFORM, classify_platform, classify_platforms
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'benchmarks', 'data', 'platform_titles.tsv')
+
+
+def load_titles():
+    with open(DATA_PATH, encoding='utf-8') as f:
+        return [line.split('\t', 1)[1].strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+@pytest.mark.parametrize('titles', [
+    ['二手 遊戲 ps', '5折 特價 薩爾達'],
+    ['xbox', 'one 特價'],
+    ['play station', '4 合輯'],
+    ['任天堂', 'switch 主機'],
+])
+def test_keywords_do_not_match_across_titles(titles):
+    assert classify_platforms(titles) == [classify_platform(title) for title in titles]
+
+
+def test_batch_agrees_with_single_title_on_adjacent_titles():
+    titles = load_titles()
+    assert classify_platforms(titles) == [classify_platform(title) for title in titles]
+
+
+def test_newline_inside_title_is_treated_as_space():
+    assert classify_platform('薩爾達 ps\n5') == 'PlayStation 5'
+    assert classify_platforms(['薩爾達 ps\n5', 'ns']) == ['PlayStation 5', 'Nintendo Switch']
+
+
+def test_unknown_title():
+    assert classify_platforms(['二手 遊戲 ps']) == [UNKNOWN_PLATFORM]
@@ -0,0 +1,42 @@
+from dedup import MinHasher, cluster_listings, title_shingles
+from models import GameListing
+
+
+def listing(title, price, url, platform='Nintendo Switch'):
+    return GameListing(title=title, price=price, platform=platform, condition='二手', seller='seller',
+                       location='台灣', url=url, source='露天拍賣')
+
+
+def test_similar_titles_are_clustered():
+    clusters = cluster_listings([
+        listing('NS 薩爾達傳說 王國之淚 中文版', 1200, 'https://example.com/1'),
+        listing('【現貨】Switch 薩爾達傳說 王國之淚', 1100, 'https://example.com/2'),
+        listing('NS 瑪利歐賽車8 豪華版', 900, 'https://example.com/3'),
+    ])
+    assert sorted(cluster.count for cluster in clusters) == [1, 2]
+
+
+def test_titles_without_tokens_are_never_merged():
+    listings = [
+        listing('!!!', 500, 'https://example.com/1'),
+        listing('🎮🎮', 600, 'https://example.com/2'),
+        listing('【】', 700, 'https://example.com/3'),
+        listing('NS 二手', 800, 'https://example.com/4'),
+    ]
+    assert all(not title_shingles(item.title) for item in listings)
+
+    clusters = cluster_listings(listings)
+    assert len(clusters) == len(listings)
+    assert all(cluster.count == 1 for cluster in clusters)
+
+
+def test_cached_signature_matches_per_permutation_minimum():
+    hasher = MinHasher(num_perm=16)
+    shingles = title_shingles('NS 薩爾達傳說 王國之淚 中文版')
+    expected = tuple(
+        min((a * h + b) & ((1 << 64) - 1) for h in shingles)
+        for a, b in hasher._params
+    )
+    assert hasher.signature(shingles) == expected
+    assert hasher.signature(shingles) is hasher.signature(shingles)
+    assert hasher.signature(frozenset()) == (0,) * 16
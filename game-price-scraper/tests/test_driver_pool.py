@@ -0,0 +1,57 @@
+import sys
+import types
+
+import pytest
+
+from driver_pool import WebDriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def delete_all_cookies(self):
+        pass
+
+    def execute_script(self, script):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def selenium_exceptions(monkeypatch):
+    """selenium.common.exceptions 的 WebDriverException 與 TimeoutException（未安裝 Selenium 時以同名類別代替）"""
+    try:
+        from selenium.common import exceptions
+    except ImportError:
+        exceptions = types.ModuleType('selenium.common.exceptions')
+        exceptions.WebDriverException = type('WebDriverException', (Exception,), {})
+        exceptions.TimeoutException = type('TimeoutException', (exceptions.WebDriverException,), {})
+        monkeypatch.setitem(sys.modules, 'selenium.common.exceptions', exceptions)
+    return exceptions
+
+
+def test_crashed_driver_is_discarded(selenium_exceptions):
+    pool = WebDriverPool(FakeDriver, max_size=1)
+    with pytest.raises(selenium_exceptions.WebDriverException):
+        with pool.driver() as driver:
+            raise selenium_exceptions.WebDriverException('chrome not reachable')
+    assert driver.quit_called
+    assert pool.stats()['discarded'] == 1
+    with pool.driver() as replacement:
+        assert replacement is not driver
+
+
+def test_driver_is_reused_after_wait_timeouts_and_other_errors(selenium_exceptions):
+    pool = WebDriverPool(FakeDriver, max_size=1)
+    for error in (selenium_exceptions.TimeoutException('no results'), ValueError('parse error')):
+        with pytest.raises(type(error)):
+            with pool.driver() as driver:
+                raise error
+        assert not driver.quit_called
+    assert pool.stats()['discarded'] == 0
@@ -0,0 +1,96 @@
+import asyncio
+import multiprocessing
+import os
+
+import pytest
+
+from metrics import Registry, archive_snapshot, clear_snapshots
+
+
+def make_registry(directory):
+    registry = Registry(str(directory))
+    requests = registry.counter('requests_total', '請求數', ('endpoint',))
+    seconds = registry.histogram('request_seconds', '耗時', ('endpoint',), buckets=(0.1, 1))
+    return registry, requests, seconds
+
+
+def worker(directory, count):
+    registry, requests, seconds = make_registry(directory)
+    requests.inc('/search', amount=count)
+    seconds.observe(0.05, '/search')
+    registry.write_snapshot()
+
+
+def run_worker(directory, count):
+    process = multiprocessing.get_context('fork').Process(target=worker, args=(directory, count))
+    process.start()
+    process.join(10)
+    return process.pid
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='需要 fork')
+def test_render_sums_all_worker_processes(tmp_path):
+    registry, requests, seconds = make_registry(tmp_path)
+    requests.inc('/search')
+    run_worker(tmp_path, 2)
+    run_worker(tmp_path, 4)
+
+    output = registry.render()
+    assert 'requests_total{endpoint="/search"} 7' in output
+    assert 'request_seconds_count{endpoint="/search"} 2' in output
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='需要 fork')
+def test_counts_survive_worker_restarts(tmp_path):
+    registry, _, _ = make_registry(tmp_path)
+    first = run_worker(tmp_path, 3)
+    archive_snapshot(str(tmp_path), first)
+    second = run_worker(tmp_path, 2)
+    archive_snapshot(str(tmp_path), second)
+
+    assert sorted(os.listdir(tmp_path)) == ['archive.json']
+    assert 'requests_total{endpoint="/search"} 5' in registry.render()
+    clear_snapshots(str(tmp_path))
+    assert 'requests_total{endpoint="/search"}' not in registry.render()
+
+
+def test_asgi_routes_record_request_metrics():
+    pytest.importorskip('a2wsgi')
+    import asgi
+    from metrics import http_requests
+
+    before = http_requests.value('/search', 'POST', '400')
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'{}', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/search', 'headers': [], 'query_string': b''}
+    asyncio.run(asgi.app(scope, receive, send))
+    assert sent[0]['status'] == 400
+    assert http_requests.value('/search', 'POST', '400') == before + 1
+
+
+def test_asgi_latency_covers_the_whole_streamed_response():
+    pytest.importorskip('a2wsgi')
+    import asgi
+    from metrics import http_request_seconds
+
+    async def stream(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            await send({'type': 'http.response.body', 'body': b'{}\n', 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send(message):
+        pass
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/test/stream', 'headers': [], 'query_string': b''}
+    asyncio.run(asgi.call_instrumented(stream, scope, None, send))
+    *_, total, count = http_request_seconds.snapshot()[('/test/stream',)]
+    assert count == 1
+    assert total >= 0.15
@@ -0,0 +1,45 @@
+from parsers import PCHOME_PARSER, RUTEN_PARSER
+
+# 露天的商品容器 div.rt-item 內含同為 div、class 為 item 的區塊（備用容器的選擇器）
+NESTED_RUTEN_PAGE = '''
+<html><head><meta charset="utf-8"></head><body>
+<div class="search-result">
+  <div class="rt-item">
+    <div class="item image"><img src="/a.jpg"></div>
+    <a class="rt-item-title" href="/item/1">薩爾達傳說 王國之淚</a>
+    <div class="item price-row"><b class="rt-item-price">$1,290</b></div>
+    <span class="rt-item-seller">賣家一</span>
+  </div>
+  <div class="rt-item">
+    <div class="item">
+      <a class="rt-item-title" href="/item/2">瑪利歐賽車8 豪華版</a>
+    </div>
+    <b class="rt-item-price">$1,150</b>
+  </div>
+</div>
+</body></html>
+'''.encode('utf-8')
+
+FALLBACK_ONLY_PAGE = '''
+<html><body>
+<ul class="list">
+  <li class="item"><h5><a href="/prod/1">艾爾登法環</a></h5><span class="price">$990</span></li>
+  <li class="item"><h5><a href="/prod/2">皮克敏4</a></h5><span class="price">$1,390</span></li>
+</ul>
+</body></html>
+'''.encode('utf-8')
+
+
+def test_fallback_blocks_inside_items_do_not_clear_the_item():
+    items = RUTEN_PARSER.parse(NESTED_RUTEN_PAGE, 10)
+    assert items == [
+        {'title': '薩爾達傳說 王國之淚', 'price': 1290,
+         'url': 'https://www.ruten.com.tw/item/1', 'seller': '賣家一'},
+        {'title': '瑪利歐賽車8 豪華版', 'price': 1150,
+         'url': 'https://www.ruten.com.tw/item/2', 'seller': None},
+    ]
+
+
+def test_fallback_items_are_used_when_page_has_no_primary_items():
+    items = PCHOME_PARSER.parse(FALLBACK_ONLY_PAGE, 10)
+    assert [(item['title'], item['price']) for item in items] == [('艾爾登法環', 990), ('皮克敏4', 1390)]
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from config import Config
+from rate_limit import rate_limiter
+from resilience import CircuitBreaker, RateLimitTimeout, RetryPolicy, SourceError, get_breaker
+from scraper import GamePriceScraper
+from sources import SourceAdapter
+
+
+def flaky(error, failures):
+    """前 failures 次呼叫拋出 error，之後回傳 'ok'"""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return 'ok'
+    return func, calls
+
+
+@pytest.mark.parametrize('error', [
+    requests.ConnectionError('connection reset'),
+    TimeoutError('timed out'),
+    SourceError('HTTP 503'),
+])
+def test_retries_transport_errors(error):
+    func, calls = flaky(error, 2)
+    assert RetryPolicy(max_retries=2, base_delay=0).call(func) == 'ok'
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize('error', [
+    ValueError('bad price'),
+    KeyError('title'),
+    SourceError('HTTP 404', retryable=False),
+])
+def test_does_not_retry_parser_bugs_or_permanent_errors(error):
+    func, calls = flaky(error, 2)
+    with pytest.raises(type(error)):
+        RetryPolicy(max_retries=2, base_delay=0).call(func)
+    assert len(calls) == 1
+
+
+def test_async_policy_uses_the_same_errors():
+    func, calls = flaky(KeyError('title'), 1)
+
+    async def call():
+        return func()
+
+    with pytest.raises(KeyError):
+        asyncio.run(RetryPolicy(max_retries=2, base_delay=0).call_async(call))
+    assert len(calls) == 1
+
+
+class ThrottledSource(SourceAdapter):
+    """每次搜尋都在本機限速器上等不到許可的測試平台"""
+
+    code = 'throttled'
+    host = 'throttled.test'
+
+    def fetch(self, scraper, game_name, deadline):
+        self.acquire_slot(time.monotonic())
+        return []
+
+
+def test_local_rate_limit_wait_does_not_open_breaker(monkeypatch):
+    monkeypatch.setitem(Config.PLATFORMS, 'throttled', {'name': 'throttled', 'enabled': True, 'priority': 9})
+    rate_limiter.configure('throttled.test', 0.001, 1)
+    source = ThrottledSource()
+    scraper = GamePriceScraper(source_timeout=1)
+    source.acquire_slot(time.monotonic() + 1)  # 用掉唯一的許可
+
+    for _ in range(Config.CIRCUIT_FAILURE_THRESHOLD + 1):
+        with pytest.raises(RateLimitTimeout):
+            source.search(scraper, '遊戲')
+    assert get_breaker('throttled').snapshot()['state'] == CircuitBreaker.CLOSED
+
+
+def test_cancelled_trial_lets_the_next_request_probe():
+    breaker = CircuitBreaker('probe', failure_threshold=1, cooldown=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.cancel()
+    assert breaker.allow()
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from config import Config
+from scraper import GamePriceScraper
+from sources import SOURCE_REGISTRY, SourceAdapter
+
+
+class SleepySource(SourceAdapter):
+    """固定耗時後回傳空結果的測試平台"""
+
+    rate_limit = (1000.0, 1000)
+
+    def __init__(self, code, delay):
+        self.code = code
+        self.host = f'{code}.test'
+        self.delay = delay
+
+    def fetch(self, scraper, game_name, deadline):
+        time.sleep(self.delay)
+        return []
+
+
+@pytest.fixture
+def sleepy_sources(monkeypatch):
+    """註冊兩個耗時 0.3 秒的平台：fast 的時限 0.1 秒，slow 的時限 1 秒"""
+    monkeypatch.setattr(Config, 'PLATFORMS', {
+        'fast': {'name': 'fast', 'enabled': True, 'priority': 1},
+        'slow': {'name': 'slow', 'enabled': True, 'priority': 2},
+    })
+    monkeypatch.setattr(Config, 'SOURCE_TIMEOUTS', {'fast': 0.1, 'slow': 1.0})
+    monkeypatch.setattr(Config, 'MAX_RETRIES', 0)
+    for code in ('fast', 'slow'):
+        monkeypatch.setitem(SOURCE_REGISTRY, code, SleepySource(code, 0.3))
+
+
+def test_each_source_uses_its_own_timeout(sleepy_sources):
+    scraper = GamePriceScraper(source_timeout=0.5, search_deadline=5)
+    statuses = {code: status for code, _, status in scraper.iter_platform_results('遊戲')}
+    assert statuses == {'fast': 'timeout', 'slow': 'ok'}
+
+
+def test_batch_search_uses_each_source_timeout(sleepy_sources):
+    scraper = GamePriceScraper(source_timeout=0.5, search_deadline=5)
+    tasks = [('遊戲', 'fast'), ('遊戲', 'slow')]
+    statuses = {code: status for _, code, _, status in scraper.iter_batch_results(tasks, max_workers=1)}
+    assert statuses == {'fast': 'timeout', 'slow': 'ok'}
+
+
+def test_async_scraper_keeps_the_sync_api(sleepy_sources):
+    from async_scraper import AsyncGamePriceScraper
+
+    async def collect(scraper):
+        return {code: status async for code, _, status in scraper.aiter_platform_results('遊戲')}
+
+    scraper = AsyncGamePriceScraper(source_timeout=0.5, search_deadline=5, async_transport=object())
+    statuses = {code: status for code, _, status in scraper.iter_platform_results('遊戲')}
+    assert statuses == {'fast': 'timeout', 'slow': 'ok'}
+    assert asyncio.run(collect(scraper)) == {'fast': 'timeout', 'slow': 'ok'}
@@ -0,0 +1,60 @@
+from config import Config
+from models import GameListing
+from sources import DeepSearchResults, HttpSourceAdapter
+
+
+def make_listing(title, price):
+    return GameListing(title, price, 'Nintendo Switch', '二手', '賣家', '台灣', f'https://example.com/{title}', 'ruten')
+
+
+def make_page(page, prices):
+    return [make_listing(f'p{page}-{i}', price) for i, price in enumerate(prices)]
+
+
+class PagedSource(HttpSourceAdapter):
+    """依價格排序、每頁 3 個結果的測試平台，failing 中的頁碼讀取失敗"""
+
+    code = 'paged'
+    host = 'paged.test'
+    sorts_by_price = True
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requested = []
+
+    def fetch_page(self, scraper, game_name, deadline, page=1):
+        self.requested.append(page)
+        if page in self.failing:
+            raise ConnectionError(f'第 {page} 頁讀取失敗')
+        return make_page(page, [page * 1000 + i for i in range(3)])
+
+
+class DeepScraper:
+    deep = True
+
+
+def test_floor_advances_only_over_contiguous_pages():
+    results = DeepSearchResults(4, sorted_by_price=True)
+    results.add(1, make_page(1, [1000, 1100, 1200]))
+    results.add(3, make_page(3, [3000, 3100, 3200]))  # 第 2 頁失敗
+    assert not results.done()
+
+    results.add(2, make_page(2, [2000, 2100, 2200]))
+    assert results.done()
+
+
+def test_failed_middle_page_does_not_stop_deep_search_early(monkeypatch):
+    monkeypatch.setitem(Config.PLATFORMS, 'paged', {'name': 'paged', 'enabled': False})
+    monkeypatch.setattr(Config, 'DEEP_SEARCH_TOP_N', 4)
+    monkeypatch.setattr(Config, 'DEEP_SEARCH_MAX_PAGES', 5)
+    monkeypatch.setattr(Config, 'DEEP_SEARCH_PAGE_CONCURRENCY', 2)
+
+    complete = PagedSource()
+    complete.fetch_deep(DeepScraper(), '遊戲', float('inf'))
+    assert sorted(complete.requested) == [1, 2, 3]
+
+    # 第 2 頁失敗時，第 3 頁的價格不能作為下限，繼續讀取到最後一頁
+    source = PagedSource(failing={2})
+    listings = source.fetch_deep(DeepScraper(), '遊戲', float('inf'))
+    assert sorted(source.requested) == [1, 2, 3, 4, 5]
+    assert [listing.price for listing in listings] == [1000, 1001, 1002, 3000]
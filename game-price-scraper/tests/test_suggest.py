@@ -0,0 +1,22 @@
+from dedup import ListingCluster
+from models import GameListing
+from suggest import SuggestIndex, compact_key
+
+
+def make_listing(title, price=1000):
+    return GameListing(title, price, 'Nintendo Switch', '二手', '賣家', '台灣', f'https://example.com/{title}', 'ruten')
+
+
+def test_searched_title_canonicalizes_all_of_its_terms():
+    index = SuggestIndex(aliases={})
+    cluster = ListingCluster('NS 薩爾達傳說 王國之淚 中文版', 'Nintendo Switch',
+                             [make_listing('a'), make_listing('b')])
+    index.record_search('薩爾達', [cluster])
+    entry = index._entries[compact_key('薩爾達傳說 王國之淚')]
+    index._add_term(entry, 'TOTK')
+    # 商品標題還不是標準名稱
+    assert index.canonicalize('TOTK') == 'TOTK'
+
+    index.record_search('薩爾達傳說王國之淚')
+    assert index.canonicalize('薩爾達傳說：王國之淚') == '薩爾達傳說 王國之淚'
+    assert index.canonicalize('totk') == '薩爾達傳說 王國之淚'
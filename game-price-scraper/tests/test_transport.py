@@ -0,0 +1,28 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+import transport
+from transport import AsyncHttpTransport, get_default_async_transport
+
+pytest.importorskip('httpx')
+
+
+def test_http2_falls_back_to_http11_without_h2(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None if name == 'h2' else find_spec(name))
+    options = {}
+    monkeypatch.setattr(transport.httpx, 'AsyncClient', lambda **kwargs: options.update(kwargs))
+
+    AsyncHttpTransport(http2=True)
+    assert options['http2'] is False
+
+
+def test_no_async_transport_without_httpx(monkeypatch):
+    monkeypatch.setattr(transport, 'httpx', None)
+
+    async def get():
+        return get_default_async_transport()
+
+    assert asyncio.run(get()) is None
@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from cache import SearchCache
+from cache_store import MemoryStore
+from config import Config
+from models import GameListing
+from watch import PriceWatchScheduler, WatchStore
+
+
+def make_listing(title, price=1000):
+    return GameListing(title, price, 'Nintendo Switch', '二手', '賣家', '台灣', f'https://example.com/{title}', 'ruten')
+
+
+class FakeScraper:
+    """每個 (遊戲, 平台) 都回傳一筆固定結果，並記錄被要求更新的項目"""
+
+    def __init__(self, requested):
+        self.requested = requested
+
+    def iter_batch_results(self, tasks):
+        for game_name, source in tasks:
+            self.requested.append((game_name, source))
+            yield game_name, source, [make_listing(game_name)], 'ok'
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """模擬兩個 gunicorn worker：各自有 store 連線，共用同一個 SQLite 檔案"""
+    path = str(tmp_path / 'price_watch.sqlite3')
+    requested = []
+    leader = PriceWatchScheduler(
+        SearchCache(MemoryStore(60, 100)), lambda: FakeScraper(requested), watchlist=[],
+        store=WatchStore(path)
+    )
+    follower = PriceWatchScheduler(
+        SearchCache(MemoryStore(60, 100)), lambda: FakeScraper(requested), watchlist=[],
+        store=WatchStore(path)
+    )
+    return leader, follower, requested
+
+
+def test_leader_refreshes_watch_added_on_another_worker(workers):
+    leader, follower, requested = workers
+    assert follower.watch('艾爾登法環')
+
+    assert leader.run_once() == len(Config.PLATFORMS)
+    assert {game_name for game_name, _ in requested} == {'艾爾登法環'}
+    assert leader.cache.get('艾爾登法環', 'ruten')[0].title == '艾爾登法環'
+    # 更新後的排程寫回共用的資料庫，下一輪不會再到期
+    assert leader.run_once() == 0
+    assert follower.stats()['pairs'] == len(Config.PLATFORMS)
+
+
+def test_search_counts_are_shared_between_workers(workers):
+    leader, follower, requested = workers
+    leader.record_search('薩爾達傳說 王國之淚')
+    follower.record_search('薩爾達傳說 王國之淚')
+    follower.record_search('薩爾達傳說 王國之淚')
+    # 搜尋次數在寫入前只累計在各 worker 中
+    assert leader.store.flush_searches() == [('薩爾達傳說 王國之淚', 1, False)]
+    assert leader.watchlist() == []
+    follower.flush_searches()
+
+    expected = [{'game_name': '薩爾達傳說 王國之淚', 'pinned': False, 'searches': Config.WATCH_POPULAR_THRESHOLD}]
+    assert leader.watchlist() == expected
+    assert follower.watchlist() == expected
+    assert leader.run_once() == len(Config.PLATFORMS)
+
+
+def test_unwatch_on_another_worker_stops_refreshes(workers):
+    leader, follower, requested = workers
+    leader.watch('艾爾登法環')
+    assert follower.unwatch('艾爾登法環')
+    assert leader.watchlist() == []
+    assert leader.run_once() == 0
+
+
+def test_full_watchlist_evicts_least_recently_searched(workers, monkeypatch):
+    leader, follower, _ = workers
+    monkeypatch.setattr(Config, 'WATCH_MAX_TITLES', 2)
+    monkeypatch.setattr(Config, 'WATCH_POPULAR_THRESHOLD', 1)
+    leader.watch('固定追蹤')
+    leader.record_search('舊的遊戲')
+    leader.flush_searches()
+    follower.record_search('新的遊戲')
+    follower.flush_searches()
+    assert [item['game_name'] for item in leader.watchlist()] == ['固定追蹤', '新的遊戲']
+
+
+def test_another_worker_takes_over_when_the_leader_stops(workers, tmp_path, monkeypatch):
+    leader, follower, _ = workers
+    monkeypatch.setattr(Config, 'WATCH_LOCK_PATH', str(tmp_path / 'price_watch.lock'))
+    monkeypatch.setattr(Config, 'WATCH_FLUSH_INTERVAL', 0.02)
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 2
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    leader.start()
+    assert wait_for(lambda: leader.leader)
+    follower.start()
+    follower.record_search('艾爾登法環')
+    # 未取得檔案鎖的 worker 仍會寫入搜尋次數
+    searches = 'SELECT game_key, searches FROM watch_searches'
+    assert wait_for(lambda: leader.store._connection().execute(searches).fetchall() == [('艾爾登法環', 1)])
+    assert not follower.leader
+
+    leader.stop()
+    try:
+        assert wait_for(lambda: follower.leader)
+        assert follower.stats()['running']
+    finally:
+        follower.stop()
@@ -0,0 +1,290 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import Config
+from metrics import transport_seconds
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class HostTimings:
+    """各主機的連線與回應時間統計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _entry(self, host):
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = {
+                'requests': 0,
+                'connections': 0,
+                'connect_total': 0.0,
+                'connect_max': 0.0,
+                'tls_total': 0.0,
+                'tls_max': 0.0,
+                'ttfb_total': 0.0,
+                'ttfb_max': 0.0,
+            }
+            self._hosts[host] = entry
+        return entry
+
+    def record_connection(self, host, connect, tls=0.0):
+        """記錄一次新建立的連線（TCP 連線時間與 TLS 交握時間）"""
+        with self._lock:
+            entry = self._entry(host)
+            entry['connections'] += 1
+            entry['connect_total'] += connect
+            entry['connect_max'] = max(entry['connect_max'], connect)
+            entry['tls_total'] += tls
+            entry['tls_max'] = max(entry['tls_max'], tls)
+        transport_seconds.observe(connect, host, 'connect')
+        if tls:
+            transport_seconds.observe(tls, host, 'tls')
+
+    def record_request(self, host, ttfb):
+        """記錄一次請求從送出到收到回應標頭的時間"""
+        with self._lock:
+            entry = self._entry(host)
+            entry['requests'] += 1
+            entry['ttfb_total'] += ttfb
+            entry['ttfb_max'] = max(entry['ttfb_max'], ttfb)
+        transport_seconds.observe(ttfb, host, 'ttfb')
+
+    def snapshot(self):
+        with self._lock:
+            hosts = {host: dict(entry) for host, entry in self._hosts.items()}
+
+        report = {}
+        for host, entry in hosts.items():
+            connections = entry['connections']
+            requests_count = entry['requests']
+            report[host] = {
+                'requests': requests_count,
+                'new_connections': connections,
+                'reused_ratio': round(1 - connections / requests_count, 3) if requests_count else 0.0,
+                'avg_connect_ms': round(entry['connect_total'] / connections * 1000, 1) if connections else 0.0,
+                'max_connect_ms': round(entry['connect_max'] * 1000, 1),
+                'avg_tls_ms': round(entry['tls_total'] / connections * 1000, 1) if connections else 0.0,
+                'max_tls_ms': round(entry['tls_max'] * 1000, 1),
+                'avg_ttfb_ms': round(entry['ttfb_total'] / requests_count * 1000, 1) if requests_count else 0.0,
+                'max_ttfb_ms': round(entry['ttfb_max'] * 1000, 1),
+            }
+        return report
+
+
+# 整個程序共用的連線時間統計
+host_timings = HostTimings()
+
+
+class _TimingHTTPConnection(HTTPConnection):
+    """記錄 TCP 連線時間的 HTTP 連線"""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        host_timings.record_connection(self.host, time.perf_counter() - start)
+
+
+class _TimingHTTPSConnection(HTTPSConnection):
+    """分別記錄 TCP 連線與 TLS 交握時間的 HTTPS 連線"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        conn = super()._new_conn()
+        self._tcp_connect_time = time.perf_counter() - start
+        return conn
+
+    def connect(self):
+        self._tcp_connect_time = 0.0
+        start = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - start
+        host_timings.record_connection(
+            self.host, self._tcp_connect_time, total - self._tcp_connect_time
+        )
+
+
+class _TimingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimingHTTPConnection
+
+
+class _TimingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimingHTTPSConnection
+
+
+class _TimingHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimingHTTPConnectionPool,
+            'https': _TimingHTTPSConnectionPool,
+        }
+
+
+class HttpTransport:
+    """整個程序共用、執行緒安全的 HTTP 傳輸層
+
+    所有執行緒共用同一個連線池（每個主機最多 pool_maxsize 條 keep-alive 連線），
+    各執行緒使用自己的 requests.Session 以避免共用 cookie / header 狀態。
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, headers=None):
+        self.pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self._adapter = _TimingHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        self._local = threading.local()
+
+    def session(self):
+        """回傳目前執行緒專用的 Session，所有 Session 共用同一個連線池"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        response = self.session().request(method, url, **kwargs)
+        # elapsed 為送出請求到解析完回應標頭的時間 (TTFB)
+        host_timings.record_request(urlsplit(response.url).hostname, response.elapsed.total_seconds())
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def stats(self):
+        return host_timings.snapshot()
+
+    def close(self):
+        self._adapter.close()
+
+
+class AsyncHttpTransport:
+    """選用的非同步 HTTP 傳輸層，支援 HTTP/2（需安裝 httpx[http2]）
+
+    與 HttpTransport 共用 host_timings 統計，連線與 TLS 時間由 httpcore 的
+    trace 事件取得。要求 HTTP/2 但未安裝 h2 時改用 HTTP/1.1。
+    """
+
+    def __init__(self, http2=None, max_connections=None, headers=None):
+        if httpx is None:
+            raise RuntimeError('非同步傳輸層需要安裝 httpx: pip install "httpx[http2]"')
+
+        http2 = Config.HTTP2_ENABLED if http2 is None else http2
+        if http2 and importlib.util.find_spec('h2') is None:
+            logger.warning('未安裝 h2，非同步傳輸層改用 HTTP/1.1（pip install "httpx[http2]" 以啟用 HTTP/2）')
+            http2 = False
+        max_connections = max_connections or Config.HTTP_POOL_MAXSIZE * Config.HTTP_POOL_CONNECTIONS
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            headers=dict(DEFAULT_HEADERS if headers is None else headers),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            follow_redirects=True
+        )
+
+    async def get(self, url, **kwargs):
+        timings = {}
+
+        async def trace(event_name, info):
+            timings[event_name] = time.perf_counter()
+
+        extensions = dict(kwargs.pop('extensions', None) or {})
+        extensions['trace'] = trace
+        start = time.perf_counter()
+        response = await self.client.get(url, extensions=extensions, **kwargs)
+
+        host = response.url.host
+        if 'connection.connect_tcp.complete' in timings:
+            connect = timings['connection.connect_tcp.complete'] - timings['connection.connect_tcp.started']
+            tls = 0.0
+            if 'connection.start_tls.complete' in timings:
+                tls = timings['connection.start_tls.complete'] - timings['connection.start_tls.started']
+            host_timings.record_connection(host, connect, tls)
+        headers_done = next(
+            (value for name, value in timings.items() if name.endswith('receive_response_headers.complete')),
+            time.perf_counter()
+        )
+        host_timings.record_request(host, headers_done - start)
+        return response
+
+    def stats(self):
+        return host_timings.snapshot()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """取得整個程序共用的 HttpTransport"""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HttpTransport()
+    return _default_transport
+
+
+# 每個事件迴圈各自一個 AsyncHttpTransport（httpx 的連線池不能跨事件迴圈使用）
+_async_transports = weakref.WeakKeyDictionary()
+
+
+def get_default_async_transport():
+    """取得目前事件迴圈共用的 AsyncHttpTransport，需在協程中呼叫
+
+    未安裝 httpx 時回傳 None，HTTP 平台改在執行緒中以 requests 搜尋
+    （見 HttpSourceAdapter.fetch_async）。
+    """
+    if httpx is None:
+        return None
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.get(loop)
+    if transport is None:
+        transport = AsyncHttpTransport()
+        _async_transports[loop] = transport
+    return transport
+
+
+async def close_default_async_transport():
+    """關閉目前事件迴圈共用的 AsyncHttpTransport（ASGI 伺服器關閉時呼叫）"""
+    transport = _async_transports.pop(asyncio.get_running_loop(), None)
+    if transport is not None:
+        await transport.aclose()
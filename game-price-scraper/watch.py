@@ -0,0 +1,492 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from cache import normalize_game_name
+from config import Config
+from models import listing_to_row
+from serialize import dumps
+from sources import get_enabled_sources
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def listings_hash(listings):
+    """結果列表的內容雜湊，順序不同但內容相同的結果視為相同"""
+    rows = sorted(dumps(listing_to_row(listing)) for listing in listings)
+    return hashlib.sha1(b'\n'.join(rows)).hexdigest()
+
+
+class WatchEntry:
+    """單一 (遊戲, 平台) 的更新排程，next_run 為 time.time() 的時間點"""
+
+    __slots__ = ('game_name', 'source', 'interval', 'next_run', 'last_hash',
+                 'last_refreshed', 'changes', 'refreshes', 'failures')
+
+    def __init__(self, game_name, source, interval, next_run):
+        self.game_name = game_name
+        self.source = source
+        self.interval = interval
+        self.next_run = next_run
+        self.last_hash = None
+        self.last_refreshed = None
+        self.changes = 0
+        self.refreshes = 0
+        self.failures = 0
+
+
+class WatchStore:
+    """追蹤清單、搜尋次數與各 (遊戲, 平台) 排程的 SQLite 資料庫
+
+    同一台機器上的所有 gunicorn worker 共用：任何 worker 收到的追蹤清單變更都
+    寫入此資料庫，執行排程的 worker 每輪由資料庫讀取到期的項目，
+    因此各 worker 的 /api/watchlist 回應相同。時間皆為 time.time()，可跨程序比較。
+
+    搜尋次數先累計在各程序的記憶體中，由 flush_searches 以一個交易寫入，
+    搜尋本身不需等待資料庫的寫入鎖。
+    """
+
+    PURGE_EVERY = 100  # 每寫入幾次搜尋次數清除一次過久未搜尋的搜尋次數
+
+    def __init__(self, path=None):
+        self.path = path or Config.WATCH_PATH
+        self._local = threading.local()
+        self._pending = {}  # {遊戲鍵: [遊戲名稱, 搜尋次數, 最後搜尋時間]}，尚未寫入的搜尋
+        self._pending_lock = threading.Lock()
+        self._flushes = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS watch_titles ('
+                ' game_key TEXT PRIMARY KEY,'
+                ' game_name TEXT NOT NULL,'
+                ' pinned INTEGER NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS watch_searches ('
+                ' game_key TEXT PRIMARY KEY,'
+                ' searches INTEGER NOT NULL,'
+                ' last_searched REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS watch_entries ('
+                ' game_key TEXT NOT NULL,'
+                ' source TEXT NOT NULL,'
+                ' game_name TEXT NOT NULL,'
+                ' interval REAL NOT NULL,'
+                ' next_run REAL NOT NULL,'
+                ' last_hash TEXT,'
+                ' last_refreshed REAL,'
+                ' changes INTEGER NOT NULL DEFAULT 0,'
+                ' refreshes INTEGER NOT NULL DEFAULT 0,'
+                ' failures INTEGER NOT NULL DEFAULT 0,'
+                ' PRIMARY KEY (game_key, source))'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_watch_entries_next_run ON watch_entries (next_run)'
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # SQLite 連線不能跨 fork 使用（gunicorn preload_app 時在 master 程序建立）
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    # 追蹤清單
+
+    def add(self, game_name, pinned, sources, interval, max_titles):
+        """加入遊戲及其各平台的排程（立即到期），回傳是否為新加入
+
+        已在清單中的遊戲只會更新 pinned；自動加入（pinned 為 False）時清單已滿則
+        淘汰最久沒被搜尋的自動加入項目，沒有可淘汰的項目時不加入。
+        """
+        key = normalize_game_name(game_name)
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT pinned FROM watch_titles WHERE game_key = ?', (key,)).fetchone()
+            if row is not None:
+                if pinned and not row[0]:
+                    conn.execute('UPDATE watch_titles SET pinned = 1 WHERE game_key = ?', (key,))
+                return False
+            if not pinned and conn.execute('SELECT COUNT(*) FROM watch_titles').fetchone()[0] >= max_titles:
+                oldest = conn.execute(
+                    'SELECT t.game_key, t.game_name FROM watch_titles t'
+                    ' LEFT JOIN watch_searches s ON s.game_key = t.game_key'
+                    ' WHERE t.pinned = 0 ORDER BY COALESCE(s.last_searched, 0) LIMIT 1'
+                ).fetchone()
+                if oldest is None:
+                    return False
+                logger.info(f"價格追蹤清單已滿，移除: {oldest[1]}")
+                self._remove(conn, oldest[0])
+            conn.execute(
+                'INSERT INTO watch_titles (game_key, game_name, pinned) VALUES (?, ?, ?)',
+                (key, game_name, int(pinned))
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO watch_entries (game_key, source, game_name, interval, next_run)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                [(key, source, game_name, interval, now) for source in sources]
+            )
+        return True
+
+    def remove(self, game_name):
+        with self._transaction() as conn:
+            return self._remove(conn, normalize_game_name(game_name))
+
+    @staticmethod
+    def _remove(conn, key):
+        removed = conn.execute('DELETE FROM watch_titles WHERE game_key = ?', (key,)).rowcount > 0
+        conn.execute('DELETE FROM watch_searches WHERE game_key = ?', (key,))
+        conn.execute('DELETE FROM watch_entries WHERE game_key = ?', (key,))
+        return removed
+
+    def record_search(self, game_name):
+        """記錄一次搜尋，先累計在記憶體中，由 flush_searches 寫入資料庫"""
+        key = normalize_game_name(game_name)
+        now = time.time()
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = [game_name, 1, now]
+            else:
+                pending[1] += 1
+                pending[2] = now
+
+    def flush_searches(self):
+        """將累計的搜尋次數以一個交易寫入，回傳 [(遊戲名稱, 搜尋次數, 是否已在追蹤清單中)]
+
+        寫入失敗時搜尋次數放回記憶體，下次再寫入。
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return []
+
+        results = []
+        try:
+            with self._transaction() as conn:
+                conn.executemany(
+                    'INSERT INTO watch_searches (game_key, searches, last_searched) VALUES (?, ?, ?)'
+                    ' ON CONFLICT (game_key) DO UPDATE SET'
+                    ' searches = searches + excluded.searches,'
+                    ' last_searched = MAX(last_searched, excluded.last_searched)',
+                    [(key, searches, last_searched) for key, (_, searches, last_searched) in pending.items()]
+                )
+                for key, (game_name, _, _) in pending.items():
+                    searches = conn.execute(
+                        'SELECT searches FROM watch_searches WHERE game_key = ?', (key,)
+                    ).fetchone()[0]
+                    watched = conn.execute(
+                        'SELECT 1 FROM watch_titles WHERE game_key = ?', (key,)
+                    ).fetchone() is not None
+                    results.append((game_name, searches, watched))
+        except sqlite3.Error:
+            with self._pending_lock:
+                for key, (game_name, searches, last_searched) in pending.items():
+                    current = self._pending.setdefault(key, [game_name, 0, last_searched])
+                    current[1] += searches
+                    current[2] = max(current[2], last_searched)
+            raise
+
+        self._flushes += 1
+        if self._flushes % self.PURGE_EVERY == 0:
+            self._connection().execute(
+                'DELETE FROM watch_searches WHERE last_searched < ?'
+                ' AND game_key NOT IN (SELECT game_key FROM watch_titles)',
+                (time.time() - Config.WATCH_SEARCH_TTL,)
+            )
+        return results
+
+    def titles(self):
+        """回傳 [(顯示名稱, 是否手動加入, 搜尋次數)]，依加入順序排列"""
+        return self._connection().execute(
+            'SELECT t.game_name, t.pinned, COALESCE(s.searches, 0) FROM watch_titles t'
+            ' LEFT JOIN watch_searches s ON s.game_key = t.game_key ORDER BY t.rowid'
+        ).fetchall()
+
+    # 排程
+
+    def due(self, now, limit):
+        """回傳 next_run 不晚於 now 的項目，最久未更新的優先"""
+        rows = self._connection().execute(
+            'SELECT game_name, source, interval, next_run, last_hash, last_refreshed,'
+            ' changes, refreshes, failures FROM watch_entries'
+            ' WHERE next_run <= ? ORDER BY next_run LIMIT ?',
+            (now, limit)
+        ).fetchall()
+        entries = []
+        for game_name, source, interval, next_run, *state in rows:
+            entry = WatchEntry(game_name, source, interval, next_run)
+            (entry.last_hash, entry.last_refreshed, entry.changes,
+             entry.refreshes, entry.failures) = state
+            entries.append(entry)
+        return entries
+
+    def save(self, entry):
+        """寫回更新後的排程；遊戲在更新期間被移出清單時不會重新加入"""
+        self._connection().execute(
+            'UPDATE watch_entries SET interval = ?, next_run = ?, last_hash = ?, last_refreshed = ?,'
+            ' changes = ?, refreshes = ?, failures = ? WHERE game_key = ? AND source = ?',
+            (entry.interval, entry.next_run, entry.last_hash, entry.last_refreshed, entry.changes,
+             entry.refreshes, entry.failures, normalize_game_name(entry.game_name), entry.source)
+        )
+
+    def schedule_stats(self):
+        """回傳 (遊戲數, (遊戲, 平台) 數, 最早的 next_run, 平均更新間隔)"""
+        conn = self._connection()
+        titles = conn.execute('SELECT COUNT(*) FROM watch_titles').fetchone()[0]
+        pairs, next_run, avg_interval = conn.execute(
+            'SELECT COUNT(*), MIN(next_run), AVG(interval) FROM watch_entries'
+        ).fetchone()
+        return titles, pairs, next_run, avg_interval
+
+
+class PriceWatchScheduler:
+    """在背景定期更新熱門遊戲的搜尋結果，寫入搜尋快取
+
+    - 追蹤清單包含 Config.WATCHLIST 的遊戲，以及搜尋次數達 WATCH_POPULAR_THRESHOLD
+      的遊戲（最多 WATCH_MAX_TITLES 個，滿了淘汰最久沒被搜尋的自動加入項目）
+    - 每個 (遊戲, 平台) 有各自的更新間隔：結果有變動時間隔減半，沒有變動時
+      乘以 WATCH_BACKOFF，介於 WATCH_MIN_INTERVAL 與 WATCH_MAX_INTERVAL 之間
+    - 以內容雜湊判斷結果是否變動；沒有變動時只延長快取期限，不重寫快取內容
+    - 到期的項目以 GamePriceScraper.iter_batch_results 批次更新，
+      同樣受各主機的並行數、限速器與斷路器控制
+    - 追蹤清單、搜尋次數與排程存放在各 worker 共用的 WatchStore；多個 worker 時
+      以檔案鎖確保只有一個程序執行排程，其他 worker 的變更最晚在
+      WATCH_POLL_INTERVAL 秒內被讀取
+    - 每個 worker 的背景執行緒每 WATCH_FLUSH_INTERVAL 秒寫入累計的搜尋次數，
+      並重新嘗試取得檔案鎖：執行排程的程序結束後，由其中一個 worker 接手
+    """
+
+    def __init__(self, cache, scraper_factory, watchlist=None, store=None):
+        self.cache = cache
+        self.scraper_factory = scraper_factory
+        self.store = store or WatchStore()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self._last_flush = time.monotonic()
+        self.leader = False  # 本程序是否持有檔案鎖、負責執行排程
+
+        # 本程序的更新次數（只有執行排程的 worker 會增加）
+        self.refreshed = 0
+        self.unchanged = 0
+        self.errors = 0
+
+        for game_name in Config.WATCHLIST if watchlist is None else watchlist:
+            self.watch(game_name)
+
+    # 追蹤清單
+
+    def watch(self, game_name, pinned=True):
+        """將遊戲加入追蹤清單，回傳是否為新加入"""
+        sources = [adapter.code for adapter in get_enabled_sources()]
+        # 新項目立即更新一次，之後依變動程度調整間隔
+        if not self.store.add(game_name, pinned, sources, Config.WATCH_DEFAULT_INTERVAL, Config.WATCH_MAX_TITLES):
+            return False
+        self._wakeup.set()
+        logger.info(f"價格追蹤加入: {game_name}")
+        return True
+
+    def unwatch(self, game_name):
+        return self.store.remove(game_name)
+
+    def record_search(self, game_name):
+        """記錄一次使用者搜尋；搜尋次數達門檻的遊戲在寫入時自動加入追蹤清單"""
+        self.store.record_search(game_name)
+        # 沒有背景執行緒時（未啟用 WATCH_ENABLED）由搜尋請求定期寫入
+        if self._thread is None and time.monotonic() - self._last_flush >= Config.WATCH_FLUSH_INTERVAL:
+            self.flush_searches()
+
+    def flush_searches(self):
+        """寫入本程序累計的搜尋次數，並將達門檻的遊戲加入追蹤清單"""
+        self._last_flush = time.monotonic()
+        try:
+            for game_name, searches, watched in self.store.flush_searches():
+                if searches >= Config.WATCH_POPULAR_THRESHOLD and not watched:
+                    self.watch(game_name, pinned=False)
+        except sqlite3.Error as e:
+            # 記錄失敗不影響搜尋本身
+            logger.error(f"記錄價格追蹤的搜尋次數失敗: {e}")
+
+    def watchlist(self):
+        return [
+            {'game_name': game_name, 'pinned': bool(pinned), 'searches': searches}
+            for game_name, pinned, searches in self.store.titles()
+        ]
+
+    # 排程
+
+    def due_entries(self, now=None, limit=None):
+        """回傳已到期的項目，最久未更新的優先"""
+        now = time.time() if now is None else now
+        return self.store.due(now, limit or Config.WATCH_BATCH_SIZE)
+
+    def run_once(self):
+        """更新一輪已到期的項目，回傳更新的項目數"""
+        entries = self.due_entries()
+        if not entries:
+            return 0
+
+        by_task = {(entry.game_name, entry.source): entry for entry in entries}
+        scraper = self.scraper_factory()
+        for game_name, source, listings, status in scraper.iter_batch_results(list(by_task)):
+            entry = by_task.get((game_name, source))
+            if entry is not None:
+                self._apply(entry, listings, status)
+        return len(entries)
+
+    def _apply(self, entry, listings, status):
+        now = time.time()
+        if status != 'ok':
+            # 失敗或被斷路器略過時不動快取，稍後以原間隔重試
+            entry.failures += 1
+            entry.next_run = now + entry.interval
+            self.store.save(entry)
+            with self._lock:
+                self.errors += 1
+            return
+
+        digest = listings_hash(listings)
+        entry.refreshes += 1
+        entry.failures = 0
+        entry.last_refreshed = now
+
+        if digest == entry.last_hash and self.cache.touch(entry.game_name, entry.source):
+            entry.interval = min(entry.interval * Config.WATCH_BACKOFF, Config.WATCH_MAX_INTERVAL)
+            with self._lock:
+                self.unchanged += 1
+        else:
+            if entry.last_hash is not None:
+                entry.changes += 1
+                entry.interval = max(entry.interval / 2, Config.WATCH_MIN_INTERVAL)
+            self.cache.set(entry.game_name, entry.source, listings)
+            entry.last_hash = digest
+            with self._lock:
+                self.refreshed += 1
+        entry.next_run = now + entry.interval
+        self.store.save(entry)
+
+    def _seconds_until_next(self):
+        next_run = self.store.schedule_stats()[2]
+        if next_run is None:
+            return None
+        return max(next_run - time.time(), 0.0)
+
+    def _run(self):
+        logger.info("價格追蹤背景執行緒已啟動")
+        while not self._stop.is_set():
+            self.flush_searches()
+            if not self.leader and self._acquire_leader_lock():
+                self.leader = True
+                logger.info("價格追蹤排程已啟動")
+
+            wait = Config.WATCH_FLUSH_INTERVAL
+            if self.leader:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"價格追蹤更新失敗: {e}", exc_info=True)
+
+                try:
+                    next_wait = self._seconds_until_next()
+                except sqlite3.Error as e:
+                    logger.error(f"讀取價格追蹤排程失敗: {e}")
+                    next_wait = None
+                # 至少間隔 WATCH_TICK 秒，避免連續失敗時空轉；最多間隔 WATCH_POLL_INTERVAL 秒，
+                # 讓其他 worker 加入的遊戲不需等到目前最早的項目到期
+                next_wait = Config.WATCH_POLL_INTERVAL if next_wait is None else max(next_wait, Config.WATCH_TICK)
+                wait = min(wait, next_wait, Config.WATCH_POLL_INTERVAL)
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+    # 啟動與停止
+
+    def start(self):
+        """啟動背景執行緒：定期寫入搜尋次數，並在取得檔案鎖後執行排程
+
+        其他程序已在執行排程時，每輪重新嘗試取得檔案鎖。
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush_searches()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.leader = False
+
+    def _acquire_leader_lock(self):
+        if fcntl is None:
+            return True
+        path = Config.WATCH_LOCK_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def stats(self):
+        """排程狀態；running（本程序是否執行排程）與更新次數只反映本程序，
+        其他欄位由共用的 WatchStore 計算"""
+        titles, pairs, next_run, avg_interval = self.store.schedule_stats()
+        with self._lock:
+            stats = {
+                'running': self.leader,
+                'titles': titles,
+                'pairs': pairs,
+                'refreshed': self.refreshed,
+                'unchanged': self.unchanged,
+                'errors': self.errors,
+            }
+        if pairs:
+            stats['next_run_in'] = round(max(next_run - time.time(), 0.0), 1)
+            stats['avg_interval'] = round(avg_interval, 1)
+        return stats